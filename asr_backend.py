@@ -0,0 +1,87 @@
+import os
+import sys
+import pandas as pd
+import framework_config as config
+
+# CPU inference backends for the local HF models (transcribe_indic / transcribe_indic_whisper).
+#   fp32 - the model as downloaded
+#   int8 - torch dynamic quantization of every nn.Linear (weights int8, activations
+#          quantized on the fly). No export step, works for CTC and seq2seq generate alike.
+BACKENDS = ('fp32', 'int8')
+
+def backend_from_argv(argv=None):
+    """'int8' if --int8 was passed, else 'fp32'."""
+    argv = sys.argv[1:] if argv is None else argv
+    return 'int8' if '--int8' in argv else 'fp32'
+
+def prepare_model(model, backend='fp32'):
+    """Returns the model ready for CPU inference on the given backend."""
+    import torch
+
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend {backend!r}, expected one of {BACKENDS}")
+    model.eval()
+    if backend == 'int8':
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    return model
+
+def output_csv(name, backend='fp32'):
+    """transcribed_metadata_<name>[_int8].csv, so backends never overwrite each other."""
+    suffix = '' if backend == 'fp32' else f"_{backend}"
+    return os.path.join(config.AUDIO_DOWNLOAD_DIR, f"transcribed_metadata_{name}{suffix}.csv")
+
+def word_edit_distance(reference, hypothesis):
+    """Levenshtein distance over whitespace-separated words."""
+    ref, hyp = reference.split(), hypothesis.split()
+    previous = list(range(len(hyp) + 1))
+    for i, r in enumerate(ref, 1):
+        current = [i] + [0] * len(hyp)
+        for j, h in enumerate(hyp, 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (r != h))
+        previous = current
+    return previous[-1]
+
+def word_error_rate(reference, hypothesis):
+    words = len(reference.split())
+    if words == 0:
+        return 0.0 if not hypothesis.split() else 1.0
+    return word_edit_distance(reference, hypothesis) / words
+
+def parity_report(name, backend='int8', top_n=10):
+    """Reports WER drift of a backend's transcripts against the fp32 ones for the same run."""
+    reference_path = output_csv(name, 'fp32')
+    candidate_path = output_csv(name, backend)
+    for path in (reference_path, candidate_path):
+        if not os.path.exists(path):
+            print(f"Transcript file not found: {path}")
+            return
+
+    ref = pd.read_csv(reference_path)[['sample_id', 'transcript']]
+    cand = pd.read_csv(candidate_path)[['sample_id', 'transcript']]
+    df = ref.merge(cand, on='sample_id', suffixes=('_fp32', f"_{backend}"))
+
+    # Only compare rows both runs actually transcribed
+    usable = df[~df['transcript_fp32'].astype(str).str.startswith('ERROR')
+                & ~df[f"transcript_{backend}"].astype(str).str.startswith('ERROR')].copy()
+    usable['ref'] = usable['transcript_fp32'].fillna('').astype(str)
+    usable['hyp'] = usable[f"transcript_{backend}"].fillna('').astype(str)
+    usable['edits'] = [word_edit_distance(r, h) for r, h in zip(usable['ref'], usable['hyp'])]
+    usable['words'] = usable['ref'].str.split().str.len()
+    usable['wer'] = [word_error_rate(r, h) for r, h in zip(usable['ref'], usable['hyp'])]
+
+    corpus_wer = usable['edits'].sum() / max(usable['words'].sum(), 1)
+    print(f"\n--- ASR Parity: {name} {backend} vs fp32 ---")
+    print(f"Compared Samples: {len(usable)} (of {len(df)} matched)")
+    print(f"Corpus WER drift: {corpus_wer:.2%}")
+    print(f"Identical transcripts: {(usable['edits'] == 0).sum()}")
+    print(f"Median per-file WER drift: {usable['wer'].median():.2%}")
+
+    print(f"\n--- Largest Drifts (Top {top_n}) ---")
+    for _, row in usable.sort_values('wer', ascending=False).head(top_n).iterrows():
+        print(f"Sample {row['sample_id']} | WER {row['wer']:.2%}")
+        print(f"  > fp32: {row['ref'][:100]}")
+        print(f"  > {backend}: {row['hyp'][:100]}")
+
+if __name__ == "__main__":
+    # Usage: python asr_backend.py <indic|indic_whisper>
+    parity_report(sys.argv[1] if len(sys.argv) > 1 else 'indic')
@@ -0,0 +1,265 @@
+import os
+import time
+import collections
+import framework_config as config
+import audio_decode
+import audio_store
+
+# Pluggable ASR engines for the transcribe.py driver.
+# An engine only knows how to turn a batch of audio files into text; the driver owns
+# metadata loading, VAD skips, dedup, concurrency, retries and the output CSV.
+
+class AsrEngine:
+    name = None             # Registry / CLI name
+    model_id = None
+    language = None
+    metadata_file = 'downloaded_metadata.csv'  # Input metadata in AUDIO_DOWNLOAD_DIR
+    output_name = None      # Writes transcribed_metadata_<output_name>.csv ('' -> transcribed_metadata.csv)
+    batch_size = 1          # Items per transcribe_batch call (None = everything in one call)
+    max_in_flight = 1       # Batches the driver may run concurrently
+    max_retries = 0         # Extra attempts for items that raise
+    # Async mode (engines implementing transcribe_async)
+    async_in_flight = 1     # Concurrent requests
+    async_max_retries = 0   # Extra attempts for rate limits / transient errors
+    requests_per_minute = None       # Quota the async scheduler paces against (None = unlimited)
+    audio_seconds_per_minute = None
+    stat_columns = ()       # Extra per-file output columns, filled from item_stats
+
+    def params(self):
+        """Settings that change the output for the same audio (part of the cache key)."""
+        return {}
+
+    def audio_path(self, row):
+        return audio_store.resolve_audio(row)
+
+    def transcribe_batch(self, items):
+        """
+        items: list of dicts with 'key', 'filepath' and 'row'.
+        Returns one entry per item: the transcript, or an Exception to have the driver retry it.
+        """
+        raise NotImplementedError
+
+    def submit_batch(self, items, executor):
+        """Asynchronous submission: returns a Future resolving to transcribe_batch's result."""
+        return executor.submit(self.transcribe_batch, items)
+
+    def item_stats(self, key):
+        """stat_columns values for a file transcribed in this run ({} if none)."""
+        return {}
+
+    def audio_seconds(self, item):
+        """Length of the audio being sent, for audio-seconds rate limits."""
+        row = item['row']
+        compact_seconds = row.get('compact_seconds')
+        if item['filepath'] == row.get('compact_file_path') and compact_seconds == compact_seconds:
+            return float(compact_seconds)
+        duration = row.get('duration_seconds')
+        if duration is not None and duration == duration: # not NaN
+            return float(duration)
+        return audio_decode.probe_duration(item['filepath'])
+
+    async def transcribe_async(self, item):
+        """Coroutine transcribing one item for the asyncio driver; raises on failure."""
+        raise NotImplementedError(f"{self.name} has no async mode")
+
+class WhisperApiEngine(AsrEngine):
+    name = 'whisper'
+    model_id = 'whisper-1'
+    output_name = ''
+    max_in_flight = 8
+    max_retries = 3
+    # Async mode: concurrent requests and the quota they are scheduled against
+    async_in_flight = getattr(config, 'WHISPER_ASYNC_IN_FLIGHT', 32)
+    async_max_retries = 6
+    requests_per_minute = getattr(config, 'WHISPER_REQUESTS_PER_MINUTE', 500)
+    audio_seconds_per_minute = getattr(config, 'WHISPER_AUDIO_SECONDS_PER_MINUTE', 3600)
+
+    def __init__(self, prompt=None):
+        from openai import OpenAI
+        self.client = OpenAI(api_key=config.OPENAI_API_KEY)
+        self.async_client = None
+        self.prompt = prompt
+
+    def params(self):
+        return {'prompt': self.prompt}
+
+    def audio_path(self, row):
+        # Send the speech-compacted audio when available
+        return audio_store.resolve_upload_audio(row)
+
+    def transcribe_batch(self, items):
+        results = []
+        for item in items:
+            try:
+                kwargs = {'prompt': self.prompt} if self.prompt else {}
+                with open(item['filepath'], "rb") as audio_file:
+                    transcript = self.client.audio.transcriptions.create(
+                        model=self.model_id, file=audio_file, **kwargs)
+                results.append(transcript.text)
+            except Exception as e:
+                results.append(e)
+        return results
+
+    async def transcribe_async(self, item):
+        if self.async_client is None:
+            from openai import AsyncOpenAI
+            # Retries are scheduled by the driver's rate limiter, not the SDK
+            self.async_client = AsyncOpenAI(api_key=config.OPENAI_API_KEY, max_retries=0)
+        kwargs = {'prompt': self.prompt} if self.prompt else {}
+        with open(item['filepath'], "rb") as audio_file:
+            audio_bytes = audio_file.read()
+        transcript = await self.async_client.audio.transcriptions.create(
+            model=self.model_id, file=(os.path.basename(item['filepath']), audio_bytes), **kwargs)
+        return transcript.text
+
+class EnhancedWhisperApiEngine(WhisperApiEngine):
+    name = 'enhanced_whisper'
+    metadata_file = 'enhanced_metadata.csv'
+    output_name = 'enhanced'
+
+    def __init__(self):
+        super().__init__(prompt="This is a Telugu political survey. The audio is in Telugu. Transcribe in Telugu script.")
+
+    def audio_path(self, row):
+        # file_path already points at the enhanced WAV
+        return audio_store.resolve_audio(row)
+
+class IndicWav2Vec2Engine(AsrEngine):
+    name = 'indic'
+    language = 'te'
+    output_name = 'indic'
+    batch_size = None # transcribe_indic does its own length bucketing over the whole set
+
+    def __init__(self, backend='fp32'):
+        import transcribe_indic
+        import asr_backend
+        from transformers import Wav2Vec2ForCTC, Wav2Vec2Processor
+
+        self.model_id = transcribe_indic.MODEL_ID
+        self.backend = backend
+        self.output_name = 'indic' if backend == 'fp32' else f"indic_{backend}"
+        self._transcribe = transcribe_indic.transcribe_batched
+        self.processor = Wav2Vec2Processor.from_pretrained(self.model_id)
+        self.model = asr_backend.prepare_model(Wav2Vec2ForCTC.from_pretrained(self.model_id), backend)
+
+    def params(self):
+        return {'backend': self.backend}
+
+    def transcribe_batch(self, items):
+        jobs = [{'row': item['row'], 'filepath': item['filepath']} for item in items]
+        return self._transcribe(jobs, self.processor, self.model)
+
+class IndicWhisperEngine(AsrEngine):
+    name = 'indic_whisper'
+    language = 'te'
+    output_name = 'indic_whisper'
+    batch_size = 16
+    stat_columns = ('asr_seconds', 'rtf') # Wall time per file and real-time factor (asr / audio seconds)
+    burst_gap_seconds = 0.05 # Results closer together than this came out of the same pipeline batch
+
+    def __init__(self, backend='fp32', pipeline_batch_size=8):
+        import torch
+        import transcribe_indic_whisper
+        import asr_backend
+        from transformers import pipeline
+
+        self.model_id = transcribe_indic_whisper.MODEL_ID
+        self.backend = backend
+        self.pipeline_batch_size = pipeline_batch_size
+        self.output_name = 'indic_whisper' if backend == 'fp32' else f"indic_whisper_{backend}"
+        device = "mps" if torch.backends.mps.is_available() and backend == 'fp32' else "cpu"
+        self.transcriber = pipeline("automatic-speech-recognition", model=self.model_id, device=device, chunk_length_s=30)
+        self.transcriber.model = asr_backend.prepare_model(self.transcriber.model, backend)
+        self.timings = {} # key -> (asr seconds, audio seconds)
+
+    def params(self):
+        return {'backend': self.backend, 'chunk_length_s': 30}
+
+    def item_stats(self, key):
+        if key not in self.timings:
+            return {}
+        asr_seconds, audio_seconds = self.timings[key]
+        return {'asr_seconds': round(asr_seconds, 3),
+                'rtf': round(asr_seconds / audio_seconds, 4) if audio_seconds else None}
+
+    def transcribe_batch(self, items):
+        """
+        Feeds the pipeline a generator of decoded audio so its 30s chunks are batched
+        (pipeline_batch_size chunks per forward pass) across files, decoding each file
+        only when the pipeline reaches it.
+        """
+        import pcm_cache
+
+        results = [None] * len(items)
+        fed = collections.deque() # (position, audio seconds) in the order the pipeline receives them
+
+        def audio_source():
+            for i, item in enumerate(items):
+                audio_data, sample_rate = pcm_cache.load_audio(item['row'], item['filepath'])
+                if audio_data is None:
+                    results[i] = "ERROR: Failed to load audio with AV"
+                    continue
+                fed.append((i, len(audio_data) / sample_rate))
+                yield {"raw": audio_data, "sampling_rate": sample_rate}
+
+        # A pipeline batch's results come out back-to-back, so its wall time is shared
+        # across that burst in proportion to audio length
+        burst = [] # (position, audio seconds)
+        burst_start = last_result = run_start = time.time()
+
+        def flush_burst(end_time):
+            burst_audio = sum(seconds for _, seconds in burst) or 1.0
+            for i, seconds in burst:
+                self.timings[items[i]['key']] = ((end_time - burst_start) * seconds / burst_audio, seconds)
+            burst.clear()
+
+        for out in self.transcriber(audio_source(), batch_size=self.pipeline_batch_size):
+            now = time.time()
+            i, audio_seconds = fed.popleft()
+            if burst and now - last_result > self.burst_gap_seconds:
+                flush_burst(last_result)
+                burst_start = last_result
+            burst.append((i, audio_seconds))
+            results[i] = out['text']
+            last_result = now
+        flush_burst(last_result)
+
+        total_audio = sum(self.timings[item['key']][1] for item in items if item['key'] in self.timings)
+        if total_audio:
+            print(f"  {len(items)} files, RTF {(last_result - run_start) / total_audio:.3f}")
+        return results
+
+class SarvamBatchEngine(AsrEngine):
+    name = 'sarvam'
+    model_id = 'saaras:v3'
+    language = 'te-IN'
+    output_name = 'sarvam'
+    batch_size = 20      # Sarvam batch job limit
+    max_in_flight = 4    # Jobs running at once
+    max_retries = 1
+
+    def __init__(self):
+        import transcribe_sarvam_batch
+        self.client = transcribe_sarvam_batch.make_client()
+
+    def params(self):
+        return {'mode': 'transcribe'}
+
+    def audio_path(self, row):
+        return audio_store.resolve_upload_audio(row)
+
+    def transcribe_batch(self, items):
+        # Same job pipeline as the orchestrator: verified uploads, adaptive polling
+        # and a separate output directory per job
+        import sarvam_orchestrator
+
+        # Rows sharing a blob were already merged by the driver, so filenames are unique
+        try:
+            return sarvam_orchestrator.run_chunk(self.client, [item['filepath'] for item in items])
+        except Exception as e:
+            return [e] * len(items)
+
+ENGINES = {
+    engine.name: engine
+    for engine in [WhisperApiEngine, EnhancedWhisperApiEngine, IndicWav2Vec2Engine, IndicWhisperEngine, SarvamBatchEngine]
+}
@@ -0,0 +1,127 @@
+import av
+import numpy as np
+
+# Shared PyAV decoder for every ASR / enhancement script.
+# All models here expect 16kHz mono float32.
+SAMPLE_RATE = 16000
+WINDOW_SECONDS = 30
+
+def _decoded_chunks(container, sample_rate):
+    """Yields 1-D float32 arrays of resampled mono audio, frame by frame."""
+    audio_stream = container.streams.audio[0]
+    resampler = av.AudioResampler(format='fltp', layout='mono', rate=sample_rate)
+
+    for frame in container.decode(audio_stream):
+        frame.pts = None # Ignore PTS to avoid warning
+        for r_frame in resampler.resample(frame):
+            yield r_frame.to_ndarray().reshape(-1)
+
+    # Flush the resampler
+    for r_frame in resampler.resample(None) or []:
+        yield r_frame.to_ndarray().reshape(-1)
+
+def _duration_seconds(container):
+    audio_stream = container.streams.audio[0]
+    if audio_stream.duration and audio_stream.time_base:
+        return float(audio_stream.duration * audio_stream.time_base)
+    if container.duration:
+        return container.duration / av.time_base
+    return 0.0
+
+def probe_duration(filepath):
+    """Duration in seconds from the container header (no decoding)."""
+    try:
+        with av.open(filepath) as container:
+            return _duration_seconds(container)
+    except Exception as e:
+        print(f"AV Probe Error for {filepath}: {e}")
+        return 0.0
+
+def load_audio(filepath, sample_rate=SAMPLE_RATE):
+    """
+    Decodes a file to a 1-D float32 mono array at sample_rate.
+    Frames are written straight into one buffer preallocated from the stream duration
+    (grown if the header under-reports), so there is no per-frame list or concatenate.
+    Returns (audio, sample_rate), or (None, None) on failure.
+    """
+    try:
+        with av.open(filepath) as container:
+            # Small slack so resampler padding doesn't force a grow
+            capacity = int(_duration_seconds(container) * sample_rate) + sample_rate
+            buffer = np.empty(capacity, dtype=np.float32)
+            filled = 0
+
+            for chunk in _decoded_chunks(container, sample_rate):
+                end = filled + len(chunk)
+                if end > len(buffer):
+                    grown = np.empty(max(end, int(len(buffer) * 1.5)), dtype=np.float32)
+                    grown[:filled] = buffer[:filled]
+                    buffer = grown
+                buffer[filled:end] = chunk
+                filled = end
+
+        if filled == 0:
+            return None, None
+        return buffer[:filled], sample_rate
+    except Exception as e:
+        print(f"AV Load Error for {filepath}: {e}")
+        return None, None
+
+def iter_audio_windows(filepath, window_seconds=WINDOW_SECONDS, hop_seconds=None, sample_rate=SAMPLE_RATE):
+    """
+    Streams a file as fixed-size float32 windows of window_seconds at sample_rate.
+    With hop_seconds < window_seconds consecutive windows overlap by the difference.
+    Only the final window can be shorter. Memory use is one window regardless of file length.
+    Decode errors are raised to the caller.
+    """
+    window = int(window_seconds * sample_rate)
+    hop = int(hop_seconds * sample_rate) if hop_seconds else window
+    overlap = max(window - hop, 0)
+    buffer = np.empty(window, dtype=np.float32)
+    filled = 0
+    fresh = 0 # samples added since the last yielded window
+
+    with av.open(filepath) as container:
+        for chunk in _decoded_chunks(container, sample_rate):
+            pos = 0
+            while pos < len(chunk):
+                take = min(window - filled, len(chunk) - pos)
+                buffer[filled:filled + take] = chunk[pos:pos + take]
+                filled += take
+                fresh += take
+                pos += take
+
+                if filled == window:
+                    yield buffer.copy()
+                    # Carry the overlap into the next window
+                    buffer[:overlap] = buffer[hop:]
+                    filled = overlap
+                    fresh = 0
+
+    if fresh > 0:
+        yield buffer[:filled].copy()
+
+def transcode(input_path, output, codec='pcm_s16le', container_format='wav', bit_rate=None, sample_rate=SAMPLE_RATE):
+    """
+    Re-encodes input_path as mono audio at sample_rate into output (a path or file object),
+    e.g. 16kHz mono WAV (the default) or low-bitrate MP3 ('libmp3lame', 'mp3', 32000).
+    Frames are streamed straight through; errors are raised to the caller.
+    """
+    with av.open(input_path) as container, av.open(output, mode='w', format=container_format) as out:
+        out_stream = out.add_stream(codec, rate=sample_rate, layout='mono')
+        if bit_rate:
+            out_stream.codec_context.bit_rate = bit_rate
+        # Resample straight into the sample format the encoder wants
+        resampler = av.AudioResampler(format=out_stream.codec_context.format.name, layout='mono', rate=sample_rate)
+
+        def mux(frames):
+            for r_frame in frames or []:
+                for packet in out_stream.encode(r_frame):
+                    out.mux(packet)
+
+        for frame in container.decode(container.streams.audio[0]):
+            frame.pts = None
+            mux(resampler.resample(frame))
+        mux(resampler.resample(None))
+        for packet in out_stream.encode(None): # Flush the encoder
+            out.mux(packet)
@@ -1,9 +1,89 @@
 import pandas as pd
 import requests
 import os
+import sys
+import concurrent.futures
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import framework_config as config
+import audio_store
 
-def download_audio_samples():
+# Concurrent download settings
+MAX_WORKERS = 16          # Parallel downloads (also the connection pool size)
+CHUNK_BYTES = 64 * 1024   # Streamed to disk in chunks of this size
+MAX_ATTEMPTS = 3          # Per-file attempts; each retry resumes from the .part file
+TIMEOUT = (10, 60)        # (connect, read) seconds
+
+def make_session(pool_size=MAX_WORKERS):
+    """Creates a requests session with a connection pool sized for the worker count."""
+    session = requests.Session()
+    retry = Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504],
+                  allowed_methods=["GET", "HEAD"])
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+def download_file(session, url, filepath):
+    """
+    Streams url to filepath via a '.part' file, resuming it with a Range request
+    if a previous attempt was interrupted.
+    """
+    part_path = filepath + '.part'
+    last_error = None
+
+    for attempt in range(MAX_ATTEMPTS):
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        headers = {'Range': f'bytes={offset}-'} if offset else {}
+        try:
+            with session.get(url, headers=headers, stream=True, timeout=TIMEOUT) as response:
+                if response.status_code == 416:
+                    # Range not satisfiable: the partial file already holds the whole body
+                    break
+                if response.status_code == 206:
+                    mode = 'ab'
+                elif response.status_code == 200:
+                    # Server ignored the Range header; start over
+                    mode = 'wb'
+                else:
+                    raise Exception(f"Status {response.status_code}")
+
+                with open(part_path, mode) as f:
+                    for chunk in response.iter_content(chunk_size=CHUNK_BYTES):
+                        if chunk:
+                            f.write(chunk)
+            break
+        except Exception as e:
+            last_error = e
+            print(f"  Attempt {attempt+1} failed for {url}: {e}")
+    else:
+        raise Exception(f"Giving up after {MAX_ATTEMPTS} attempts: {last_error}")
+
+    os.replace(part_path, filepath)
+
+def legacy_downloads(records):
+    """
+    (filepath, sample_id, url) for files saved by the pre-store downloader as
+    '<validity>_<sample_id>.mp3' in AUDIO_DOWNLOAD_DIR. The old metadata CSV, when
+    present, gives the URL each file was actually fetched from.
+    """
+    urls = {}
+    metadata_path = os.path.join(config.AUDIO_DOWNLOAD_DIR, 'downloaded_metadata.csv')
+    if os.path.exists(metadata_path):
+        old = pd.read_csv(metadata_path)
+        if {'file_path', 'url'} <= set(old.columns):
+            urls = dict(zip(old['file_path'], old['url']))
+
+    entries = []
+    for i, record in enumerate(records):
+        url = record.get('Audio URL')
+        sample_id = record.get('Sample ID', f'sample_{i}')
+        filepath = os.path.join(config.AUDIO_DOWNLOAD_DIR, f"{record.get('Valid or Not')}_{sample_id}.mp3")
+        if isinstance(url, str) and os.path.isfile(filepath):
+            entries.append((filepath, sample_id, urls.get(filepath, url)))
+    return entries
+
+def download_audio_samples(max_workers=MAX_WORKERS):
     print("Loading Excel file...")
     try:
         xl = pd.ExcelFile(config.EXCEL_FILE_PATH)
@@ -17,60 +97,96 @@ def download_audio_samples():
         print("Required columns 'Audio URL' or 'Valid or Not' missing.")
         return
 
-    # Filter Valid and Invalid
     # We want ALL records for the full run
-    
-    # samples_to_download = df.to_dict('records')
-    # Filter for random subset or full? User said "validate for all the records".
-    # Let's take all.
     samples_to_download = df.to_dict('records')
 
-    print(f"Downloading all {len(samples_to_download)} samples...")
+    print(f"Downloading all {len(samples_to_download)} samples with {max_workers} workers...")
 
-    samples_metadata = []
+    # Files from before the audio store are moved in once, so they aren't fetched again
+    ingested = audio_store.ingest_files(legacy_downloads(samples_to_download))
+    if ingested:
+        print(f"Ingested {ingested} previously downloaded files into the audio store")
+
+    index = audio_store.load_index()
+    known = set(zip(index['sample_id'].astype(str), index['url'], index['sha256']))
+    session = make_session(max_workers)
+
+    def remember(sample_id, url, sha256):
+        if (str(sample_id), url, sha256) not in known:
+            known.add((str(sample_id), url, sha256))
+            audio_store.record(sample_id, url, sha256)
 
+    def fetch(url, sample_id):
+        """Returns the blob hash for url, downloading only if it isn't stored yet."""
+        # Already stored (by this or another survey / label)? Then there is nothing to fetch.
+        entry = audio_store.lookup(index, sample_id=sample_id, url=url)
+        if entry is not None:
+            print(f"Stored: {sample_id} -> {entry['sha256'][:12]}")
+            remember(sample_id, url, entry['sha256'])
+            return entry['sha256']
+        try:
+            tmp_path = audio_store.incoming_path(url)
+            download_file(session, url, tmp_path)
+            sha256 = audio_store.put_file(tmp_path)
+            remember(sample_id, url, sha256)
+            print(f"Downloaded: {sample_id} -> {sha256[:12]}")
+            return sha256
+        except Exception as e:
+            print(f"Error downloading {url}: {e}")
+            return None
+
+    # One fetch per distinct URL so duplicate rows never race on the same .part file
+    first_sample = {}
+    for i, record in enumerate(samples_to_download):
+        url = record.get('Audio URL')
+        if isinstance(url, str) and url.startswith('http') and url not in first_sample:
+            first_sample[url] = record.get('Sample ID', f'sample_{i}')
+
+    url_hashes = {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(fetch, url, sid): url for url, sid in first_sample.items()}
+        for future in concurrent.futures.as_completed(futures):
+            url_hashes[futures[future]] = future.result()
+
+    samples_metadata = []
     for i, record in enumerate(samples_to_download):
         url = record.get('Audio URL')
         sample_id = record.get('Sample ID', f'sample_{i}')
         validity = record.get('Valid or Not')
-        
+
         if not isinstance(url, str) or not url.startswith('http'):
             print(f"Skipping invalid URL for sample {sample_id}")
             continue
 
-        filename = f"{validity}_{sample_id}.mp3"
-        filepath = os.path.join(config.AUDIO_DOWNLOAD_DIR, filename)
+        sha256 = url_hashes.get(url)
+        if sha256 is None:
+            continue
+        remember(sample_id, url, sha256)
 
-        try:
-            response = requests.get(url, timeout=10)
-            if response.status_code == 200:
-                with open(filepath, 'wb') as f:
-                    f.write(response.content)
-                print(f"Downloaded: {filename}")
-                
-                # Save metadata for next steps
-                samples_metadata.append({
-                    'file_path': filepath,
-                    'url': url,
-                    'sample_id': sample_id,
-                    'ground_truth_validity': validity,
-                    'qc_remark': record.get('QC Remark'),
-                    'qc_comment': record.get('QC Comment'),
-                    # Store key fields to validate against
-                    'Q1': record.get('Q1: స్థానికంగా మీకున్న ప్రధానమైన సమస్యలు ఏమిటి?'),
-                    'Caste': record.get('Caste'),
-                    'Age': record.get('Q15: వయసు'),
-                    
-                })
-            else:
-                print(f"Failed to download {url}: Status {response.status_code}")
-        except Exception as e:
-            print(f"Error downloading {url}: {e}")
+        # Save metadata for next steps
+        samples_metadata.append({
+            'file_path': audio_store.blob_path(sha256),
+            'url': url,
+            'sample_id': sample_id,
+            'ground_truth_validity': validity,
+            'qc_remark': record.get('QC Remark'),
+            'qc_comment': record.get('QC Comment'),
+            # Store key fields to validate against
+            'Q1': record.get('Q1: స్థానికంగా మీకున్న ప్రధానమైన సమస్యలు ఏమిటి?'),
+            'Caste': record.get('Caste'),
+            'Age': record.get('Q15: వయసు'),
+            'audio_hash': sha256,
+        })
+
+    unique_blobs = len({r['audio_hash'] for r in samples_metadata})
 
     # Save metadata to CSV for the next script to use
     metadata_df = pd.DataFrame(samples_metadata)
     metadata_df.to_csv(os.path.join(config.AUDIO_DOWNLOAD_DIR, 'downloaded_metadata.csv'), index=False)
-    print("Download complete. Metadata saved.")
+    print(f"Download complete. {len(samples_metadata)}/{len(samples_to_download)} samples "
+          f"({unique_blobs} unique blobs). Metadata saved.")
 
 if __name__ == "__main__":
-    download_audio_samples()
+    # Usage: python audio_downloader.py [max_workers]
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else MAX_WORKERS
+    download_audio_samples(max_workers=workers)
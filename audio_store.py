@@ -0,0 +1,133 @@
+import os
+import shutil
+import hashlib
+import threading
+import pandas as pd
+import framework_config as config
+
+# Content-addressed audio store.
+# Blobs live at blobs/<aa>/<sha256><ext>, so identical bytes are stored once no matter
+# how many samples, surveys or validity labels point at them. audio_index.csv maps
+# sample_id/url -> sha256 and is appended to as downloads complete.
+STORE_DIR = os.path.join(config.AUDIO_DOWNLOAD_DIR, 'blobs')
+INCOMING_DIR = os.path.join(STORE_DIR, 'incoming')
+INDEX_PATH = os.path.join(config.AUDIO_DOWNLOAD_DIR, 'audio_index.csv')
+INDEX_COLUMNS = ['sample_id', 'url', 'sha256', 'size', 'ext']
+
+_index_lock = threading.Lock()
+
+def file_sha256(filepath):
+    """Returns the hex sha256 of a file, read in chunks."""
+    h = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            h.update(block)
+    return h.hexdigest()
+
+def blob_path(sha256, ext='.mp3'):
+    return os.path.join(STORE_DIR, sha256[:2], sha256 + ext)
+
+def has_blob(sha256, ext='.mp3', size=None):
+    path = blob_path(sha256, ext)
+    if not os.path.exists(path):
+        return False
+    return size is None or pd.isna(size) or os.path.getsize(path) == int(size)
+
+def incoming_path(url, ext='.mp3'):
+    """Stable scratch path for a URL so interrupted downloads can be resumed."""
+    os.makedirs(INCOMING_DIR, exist_ok=True)
+    return os.path.join(INCOMING_DIR, hashlib.sha1(url.encode('utf-8')).hexdigest() + ext)
+
+def put_file(src_path, ext=None):
+    """Moves src_path into the store and returns its sha256. Duplicate bytes are dropped."""
+    if ext is None:
+        ext = os.path.splitext(src_path)[1] or '.mp3'
+    sha256 = file_sha256(src_path)
+    dest = blob_path(sha256, ext)
+    if os.path.exists(dest):
+        os.remove(src_path)
+    else:
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        shutil.move(src_path, dest)
+    return sha256
+
+def load_index():
+    """Returns the index as a DataFrame, latest entry per (sample_id, url) winning."""
+    if not os.path.exists(INDEX_PATH):
+        return pd.DataFrame(columns=INDEX_COLUMNS)
+    index = pd.read_csv(INDEX_PATH, dtype={'sample_id': str})
+    return index.drop_duplicates(subset=['sample_id', 'url'], keep='last')
+
+def record(sample_id, url, sha256, ext='.mp3'):
+    """Appends a sample_id/url -> blob mapping to the index (thread-safe)."""
+    size = os.path.getsize(blob_path(sha256, ext))
+    row = pd.DataFrame([[str(sample_id), url, sha256, size, ext]], columns=INDEX_COLUMNS)
+    with _index_lock:
+        write_header = not os.path.exists(INDEX_PATH)
+        row.to_csv(INDEX_PATH, mode='a', header=write_header, index=False)
+
+def lookup(index, sample_id=None, url=None):
+    """
+    Finds a stored blob for a url (preferred) or sample_id. Returns an index row dict or None.
+    The sample_id fallback only applies when the row has no url or the stored url is the same,
+    so a sample whose URL changed is downloaded again instead of getting the old audio.
+    """
+    for column, value in (('url', url), ('sample_id', sample_id)):
+        if value is None:
+            continue
+        hits = index[index[column] == str(value)]
+        for entry in reversed(hits.to_dict('records')):
+            if column == 'sample_id' and url is not None and entry['url'] != url:
+                continue
+            if has_blob(entry['sha256'], entry['ext'], entry['size']):
+                return entry
+    return None
+
+def ingest_files(entries):
+    """
+    One-time import of audio downloaded before the store existed.
+    entries: (filepath, sample_id, url) tuples; existing files are moved into the store
+    and indexed. Returns the number of files ingested.
+    """
+    ingested = 0
+    for filepath, sample_id, url in entries:
+        if not os.path.isfile(filepath):
+            continue
+        sha256 = put_file(filepath)
+        record(sample_id, url, sha256, os.path.splitext(filepath)[1] or '.mp3')
+        ingested += 1
+    return ingested
+
+def audio_key(row):
+    """Dedup key for a metadata row: the content hash, or the file path for old metadata."""
+    audio_hash = row.get('audio_hash')
+    if isinstance(audio_hash, str) and audio_hash:
+        return audio_hash
+    return row.get('file_path')
+
+def resolve_audio(row):
+    """Path to a metadata row's audio: file_path if present, else the stored blob."""
+    filepath = row.get('file_path')
+    if isinstance(filepath, str) and os.path.exists(filepath):
+        return filepath
+    audio_hash = row.get('audio_hash')
+    if isinstance(audio_hash, str) and audio_hash:
+        ext = os.path.splitext(str(filepath))[1] or '.mp3'
+        path = blob_path(audio_hash, ext)
+        if os.path.exists(path):
+            return path
+    return filepath
+
+def resolve_upload_audio(row):
+    """
+    Audio to send to paid ASR: the speech-compacted file (compact_audio.py) if present
+    and smaller than the original, else the original.
+    """
+    original = resolve_audio(row)
+    compact = row.get('compact_file_path')
+    if isinstance(compact, str) and compact and os.path.exists(compact):
+        if not (isinstance(original, str) and os.path.exists(original)):
+            return compact
+        if os.path.getsize(compact) < os.path.getsize(original):
+            return compact
+    return original
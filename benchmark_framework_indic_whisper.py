@@ -1,6 +1,7 @@
 import pandas as pd
 import os
 import framework_config as config
+import prevalidation
 from sklearn.metrics import accuracy_score, precision_score, recall_score, confusion_matrix
 
 def benchmark_results_indic_whisper():
@@ -32,6 +33,9 @@ def benchmark_results_indic_whisper():
     print(f"False Negatives: {fn}")
     print(f"True Positives: {tp}")
 
+    # Accuracy and estimated cost of the rule tier vs the LLM tier
+    prevalidation.print_tier_report(df)
+
     print("\n--- Detailed Breakdown ---")
     for index, row in df.iterrows():
         status = "MATCH" if row['gt_bool'] == row['llm_bool'] else "MISMATCH"
@@ -0,0 +1,173 @@
+import os
+import sys
+import json
+import concurrent.futures
+import numpy as np
+import pandas as pd
+import soundfile as sf
+import framework_config as config
+import audio_decode
+import audio_store
+import vad
+
+# Speech-segment compaction: keeps only VAD speech (plus a little padding), joined by
+# short silences, so paid ASR sees far fewer seconds. A JSON map per file translates
+# compacted timestamps back to the original recording.
+PAD_SECONDS = 0.25   # Context kept either side of each speech segment
+JOIN_SECONDS = 0.3   # Silence inserted between kept segments so ASR sees a boundary
+COMPACT_CODEC = ('libmp3lame', 'mp3', 32000) # codec, container, bit rate: same speech-grade MP3 as sarvam_upload
+
+# Compacted files are derived audio, kept out of the content-addressed blob store
+COMPACT_DIR = os.path.join(config.AUDIO_DOWNLOAD_DIR, 'compact')
+
+def compact_paths(filepath):
+    """(COMPACT_DIR/<name>_compact.mp3, COMPACT_DIR/<name>_compact.json) for an input file."""
+    name_part, _ = os.path.splitext(os.path.basename(filepath))
+    os.makedirs(COMPACT_DIR, exist_ok=True)
+    base = os.path.join(COMPACT_DIR, f"{name_part}_compact")
+    return f"{base}.{COMPACT_CODEC[1]}", base + '.json'
+
+def padded_segments(segments, duration):
+    """Pads speech segments and merges any that now overlap."""
+    kept = []
+    for start, end in segments:
+        start, end = max(start - PAD_SECONDS, 0.0), min(end + PAD_SECONDS, duration)
+        if kept and start <= kept[-1][1]:
+            kept[-1][1] = max(kept[-1][1], end)
+        else:
+            kept.append([start, end])
+    return kept
+
+def build_time_map(segments):
+    """[{compact_start, compact_end, original_start, original_end}, ...] for padded segments."""
+    time_map = []
+    cursor = 0.0
+    for start, end in segments:
+        length = end - start
+        time_map.append({
+            'compact_start': round(cursor, 3),
+            'compact_end': round(cursor + length, 3),
+            'original_start': round(start, 3),
+            'original_end': round(end, 3),
+        })
+        cursor += length + JOIN_SECONDS
+    return time_map
+
+def to_original_time(time_map, t):
+    """Maps a timestamp in the compacted audio back to the original recording."""
+    for entry in time_map:
+        if t <= entry['compact_end']:
+            offset = max(t - entry['compact_start'], 0.0)
+            return entry['original_start'] + offset
+    return time_map[-1]['original_end'] if time_map else t
+
+def compact_file(filepath, segments, out_path, sr=audio_decode.SAMPLE_RATE):
+    """
+    Streams filepath into out_path keeping only the given [start, end] second ranges.
+    A .wav out_path is written as 16-bit PCM; anything else is encoded with COMPACT_CODEC,
+    since uncompressed output is many times larger than the MP3 it came from.
+    """
+    if os.path.splitext(out_path)[1].lower() == '.wav':
+        _compact_to_wav(filepath, segments, out_path, sr)
+        return
+    codec, container_format, bit_rate = COMPACT_CODEC
+    wav_path = out_path + '.part.wav'
+    try:
+        _compact_to_wav(filepath, segments, wav_path, sr)
+        audio_decode.transcode(wav_path, out_path, codec=codec, container_format=container_format,
+                               bit_rate=bit_rate, sample_rate=sr)
+    finally:
+        if os.path.exists(wav_path):
+            os.remove(wav_path)
+
+def _compact_to_wav(filepath, segments, out_path, sr):
+    bounds = [(int(s * sr), int(e * sr)) for s, e in segments]
+    gap = np.zeros(int(JOIN_SECONDS * sr), dtype=np.float32)
+    position = 0 # sample offset of the current window in the original
+    seg_idx = 0
+
+    with sf.SoundFile(out_path, 'w', samplerate=sr, channels=1, subtype='PCM_16') as out:
+        for window in audio_decode.iter_audio_windows(filepath, sample_rate=sr):
+            window_end = position + len(window)
+            while seg_idx < len(bounds) and bounds[seg_idx][0] < window_end:
+                seg_start, seg_end = bounds[seg_idx]
+                lo = max(seg_start, position)
+                hi = min(seg_end, window_end)
+                if hi > lo:
+                    out.write(window[lo - position:hi - position])
+                if seg_end > window_end:
+                    break # segment continues into the next window
+                seg_idx += 1
+                if seg_idx < len(bounds):
+                    out.write(gap)
+            position = window_end
+
+def compact_sample(filepath):
+    """VAD + compaction for one file. Returns a metadata dict, or None if nothing was written."""
+    analysis = vad.analyze_speech(filepath)
+    if analysis is None or not analysis['segments']:
+        return None
+
+    segments = padded_segments(analysis['segments'], analysis['duration_seconds'])
+    time_map = build_time_map(segments)
+    out_path, map_path = compact_paths(filepath)
+    compact_file(filepath, segments, out_path)
+    with open(map_path, 'w') as f:
+        json.dump(time_map, f)
+
+    return {
+        'duration_seconds': analysis['duration_seconds'],
+        'speech_seconds': analysis['speech_seconds'],
+        'speech_ratio': analysis['speech_ratio'],
+        'compact_file_path': out_path,
+        'compact_map_path': map_path,
+        'compact_seconds': time_map[-1]['compact_end'],
+    }
+
+def _compact_worker(filepath):
+    try:
+        return compact_sample(filepath)
+    except Exception as e:
+        print(f"Compaction Error for {filepath}: {e}")
+        return None
+
+def compact_samples(workers=os.cpu_count()):
+    metadata_path = os.path.join(config.AUDIO_DOWNLOAD_DIR, 'downloaded_metadata.csv')
+    if not os.path.exists(metadata_path):
+        print("Metadata file not found. Run downloader first.")
+        return
+
+    df = pd.read_csv(metadata_path)
+
+    # One compaction per distinct audio, skipping recordings VAD already rejected
+    paths = {}
+    for index, row in df.iterrows():
+        filepath = audio_store.resolve_audio(row)
+        if os.path.exists(filepath) and vad.has_speech(row):
+            paths.setdefault(audio_store.audio_key(row), filepath)
+
+    print(f"Compacting {len(paths)} recordings with {workers} workers...")
+    keys = list(paths)
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        results = dict(zip(keys, executor.map(_compact_worker, [paths[k] for k in keys], chunksize=4)))
+
+    columns = ['duration_seconds', 'speech_seconds', 'speech_ratio',
+               'compact_file_path', 'compact_map_path', 'compact_seconds']
+    for column in columns:
+        values = []
+        for _, row in df.iterrows():
+            result = results.get(audio_store.audio_key(row))
+            values.append(result[column] if result else row.get(column))
+        df[column] = values
+
+    original = df.drop_duplicates('audio_hash' if 'audio_hash' in df.columns else 'file_path')
+    total = original['duration_seconds'].sum()
+    kept = original['compact_seconds'].sum()
+    df.to_csv(metadata_path, index=False)
+    print(f"Compaction complete. {kept / 60:.1f} of {total / 60:.1f} audio minutes kept "
+          f"({kept / total:.0%}). Saved to {metadata_path}" if total else "Compaction complete.")
+
+if __name__ == "__main__":
+    # Usage: python compact_audio.py [workers]
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else os.cpu_count()
+    compact_samples(workers=workers)
@@ -0,0 +1,27 @@
+import sys
+import types
+import tempfile
+import pytest
+
+# Unit tests run without the real framework_config.py (it holds API keys and is not
+# committed). This stand-in points every on-disk store at a scratch directory.
+_config = types.ModuleType('framework_config')
+_config.AUDIO_DOWNLOAD_DIR = tempfile.mkdtemp(prefix='survey_bot_tests_')
+_config.EXCEL_FILE_PATH = None
+_config.OPENAI_API_KEY = 'test-key'
+_config.SARVAM_API_KEY = 'test-key'
+_config.VALIDATION_MODEL = 'gpt-4o'
+sys.modules['framework_config'] = _config
+
+# Ad-hoc scripts that call live APIs on import, not pytest tests
+collect_ignore = ['test_chatbot.py', 'test_intensive.py', 'test_search_logic.py',
+                  'test_strict.py', 'test_ui_questions.py']
+
+@pytest.fixture
+def mock_server(request):
+    """Base URL of a fresh mock_api_server; parametrize indirectly with MockConfig overrides."""
+    import mock_api_server
+    overrides = getattr(request, 'param', {})
+    server = mock_api_server.serve(mock_api_server.MockConfig(latency=0, jitter=0, **overrides), port=0)
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
@@ -1,28 +1,12 @@
-import av
 import os
 import sys
+import audio_decode
 
 def convert_to_wav(input_path, output_path):
+    # 16kHz mono PCM via the shared decoder
     print(f"Converting {input_path} -> {output_path}")
     try:
-        with av.open(input_path) as input_container:
-            in_stream = input_container.streams.audio[0]
-            
-            with av.open(output_path, 'w', 'wav') as output_container:
-                out_stream = output_container.add_stream('pcm_s16le', rate=16000)
-                # out_stream.layout = 'mono' # This might span multiple attrs depending on version
-                # Correct way for newer PyAV might be adding options or setting channels
-                # Let's try simpler add_stream if possible or keep as is but check error
-                pass
-                
-                for frame in input_container.decode(in_stream):
-                    for packet in out_stream.encode(frame):
-                        output_container.mux(packet)
-                
-                # Flush
-                for packet in out_stream.encode(None):
-                    output_container.mux(packet)
-                    
+        audio_decode.transcode(input_path, output_path)
         print("Conversion successful.")
         return True
     except Exception as e:
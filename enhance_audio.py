@@ -1,47 +1,205 @@
 import os
+import sys
+import heapq
+import concurrent.futures
 import pandas as pd
 import numpy as np
 import noisereduce as nr
 import soundfile as sf
-import av
 import framework_config as config
+import audio_decode
+import pcm_cache
+import audio_store
 
-def load_audio_av_np(filepath):
-    """Loads audio using PyAV, resamples to 16kHz, and returns numpy array."""
+# Parallel mode: each worker holds at most one decoded file, and at most
+# IN_FLIGHT_PER_WORKER tasks per worker are queued at once to bound memory.
+IN_FLIGHT_PER_WORKER = 2
+
+# Streaming mode: recordings longer than STREAM_MIN_SECONDS are denoised block by block
+# so STFT intermediates never cover more than one block.
+STREAM_MIN_SECONDS = 300
+STREAM_BLOCK_SECONDS = 30
+STREAM_OVERLAP_SECONDS = 1
+NOISE_FRAME_SECONDS = 0.5     # Frame size used to find quiet (noise-only) audio
+NOISE_PROFILE_SECONDS = 3.0   # Total noise clip kept (quietest frames)
+NOISE_SCAN_SECONDS = 60       # Noise is estimated from the leading minute only
+TARGET_DB = -3.0
+
+# Enhanced files are derived audio, kept out of the content-addressed blob store
+ENHANCED_DIR = os.path.join(config.AUDIO_DOWNLOAD_DIR, 'enhanced')
+# Columns describing the raw audio that don't hold for the enhanced copy
+RAW_AUDIO_COLUMNS = ['compact_file_path', 'compact_map_path', 'compact_seconds']
+
+def cleaned_path(filepath):
+    """Output path for an enhanced file: ENHANCED_DIR/<name>_cleaned.wav."""
+    name_part, ext_part = os.path.splitext(os.path.basename(filepath))
+    os.makedirs(ENHANCED_DIR, exist_ok=True)
+    # Save as WAV for compatibility (soundfile writes wav easily)
+    return os.path.join(ENHANCED_DIR, f"{name_part}_cleaned.wav")
+
+def enhance_waveform(y, sr):
+    """Noise reduction + peak normalisation of a mono waveform."""
+    # 1. Noise Reduction (Spectral Gating)
+    # Assuming the noise profile is stationary (hiss, hum)
+    # We use a conservative reduction to avoid artifacts
+    # noisereduce expects [samples] for mono
+    reduced_noise = nr.reduce_noise(y=y, sr=sr, stationary=True, prop_decrease=0.75)
+
+    # 2. Normalization
+    # Normalize to -3dB
+    max_val = np.max(np.abs(reduced_noise))
+    if max_val > 0:
+        target_amp = 10 ** (TARGET_DB / 20)
+        norm_factor = target_amp / max_val
+        return reduced_noise * norm_factor
+    return reduced_noise
+
+def estimate_noise_clip(filepath, sr=audio_decode.SAMPLE_RATE):
+    """Noise profile for streaming mode: the quietest frames of the leading NOISE_SCAN_SECONDS."""
+    keep = max(int(NOISE_PROFILE_SECONDS / NOISE_FRAME_SECONDS), 1)
+    quietest = [] # max-heap on RMS via negation: (-rms, frame_no, frame)
+    frames = audio_decode.iter_audio_windows(filepath, window_seconds=NOISE_FRAME_SECONDS, sample_rate=sr)
+
+    for frame_no, frame in enumerate(frames):
+        if frame_no * NOISE_FRAME_SECONDS >= NOISE_SCAN_SECONDS:
+            break
+        rms = float(np.sqrt(np.mean(frame ** 2)))
+        if len(quietest) < keep:
+            heapq.heappush(quietest, (-rms, frame_no, frame))
+        elif rms < -quietest[0][0]:
+            heapq.heapreplace(quietest, (-rms, frame_no, frame))
+    frames.close()
+
+    if not quietest:
+        return None
+    # Keep time order so the clip isn't a shuffle of tiny pieces
+    return np.concatenate([frame for _, _, frame in sorted(quietest, key=lambda item: item[1])])
+
+def enhance_file_streaming(filepath, new_filepath, sr=audio_decode.SAMPLE_RATE):
+    """
+    Constant-memory version of enhance_waveform for long recordings.
+    The noise profile is estimated once, then overlapping blocks are denoised against it and
+    cross-faded (overlap-add) into a float WAV written incrementally. A second block-wise pass
+    applies the peak normalisation once the global peak is known.
+    """
+    noise_clip = estimate_noise_clip(filepath, sr)
+    if noise_clip is None:
+        raise Exception("Failed to load audio with AV")
+
+    overlap = int(STREAM_OVERLAP_SECONDS * sr)
+    fade_in = np.linspace(0.0, 1.0, overlap, dtype=np.float32)
+    fade_out = 1.0 - fade_in
+    tmp_path = new_filepath + '.stream.tmp.wav'
+    peak = 0.0
+    prev_tail = None
+
+    blocks = audio_decode.iter_audio_windows(
+        filepath, window_seconds=STREAM_BLOCK_SECONDS,
+        hop_seconds=STREAM_BLOCK_SECONDS - STREAM_OVERLAP_SECONDS, sample_rate=sr)
+
+    with sf.SoundFile(tmp_path, 'w', samplerate=sr, channels=1, subtype='FLOAT') as out:
+        for block in blocks:
+            reduced = nr.reduce_noise(y=block, sr=sr, y_noise=noise_clip, stationary=True,
+                                      prop_decrease=0.75).astype(np.float32)
+            if prev_tail is not None:
+                n = min(len(prev_tail), len(reduced))
+                reduced[:n] = prev_tail[:n] * fade_out[:n] + reduced[:n] * fade_in[:n]
+            # Hold back the overlap region for the next block to blend into
+            ready = reduced[:-overlap] if len(reduced) > overlap else reduced[:0]
+            prev_tail = reduced[len(ready):].copy()
+            out.write(ready)
+            peak = max(peak, float(np.max(np.abs(ready), initial=0.0)))
+        if prev_tail is not None:
+            out.write(prev_tail)
+            peak = max(peak, float(np.max(np.abs(prev_tail), initial=0.0)))
+
+    # 2. Normalization pass
+    norm_factor = (10 ** (TARGET_DB / 20)) / peak if peak > 0 else 1.0
+    block_frames = int(STREAM_BLOCK_SECONDS * sr)
+    with sf.SoundFile(tmp_path, 'r') as src, sf.SoundFile(new_filepath, 'w', samplerate=sr, channels=1) as dst:
+        for block in src.blocks(blocksize=block_frames, dtype='float32'):
+            dst.write(block * norm_factor)
+    os.remove(tmp_path)
+    return new_filepath
+
+def enhance_file(filepath, new_filepath, load=None):
+    """
+    Enhances one file to new_filepath, streaming if it is longer than STREAM_MIN_SECONDS.
+    load() supplies (y, sr) for the in-memory path (e.g. from the PCM cache).
+    """
+    if audio_decode.probe_duration(filepath) > STREAM_MIN_SECONDS:
+        return enhance_file_streaming(filepath, new_filepath)
+
+    y, sr = load() if load else audio_decode.load_audio(filepath)
+    if y is None:
+        raise Exception("Failed to load audio with AV")
+    sf.write(new_filepath, enhance_waveform(y, sr), sr)
+    return new_filepath
+
+_worker_cache = None
+
+def _enhance_worker(position, key, filepath):
+    """Process-pool task. Never raises, so one bad file can't take down the run."""
+    global _worker_cache
     try:
-        container = av.open(filepath)
-        audio_stream = container.streams.audio[0]
-        
-        resampler = av.AudioResampler(format='fltp', layout='mono', rate=16000)
-        
-        audio_frames = []
-        for frame in container.decode(audio_stream):
-            frame.pts = None
-            resampled_frames = resampler.resample(frame)
-            for r_frame in resampled_frames:
-                audio_frames.append(r_frame.to_ndarray())
-        
-        resampled_frames = resampler.resample(None)
-        if resampled_frames:
-             for r_frame in resampled_frames:
-                audio_frames.append(r_frame.to_ndarray())
-
-        if not audio_frames:
-             return None, None
-             
-        # Concatenate: av returns [channels, samples] or [samples]
-        audio_data = np.concatenate(audio_frames, axis=1)
-        
-        # Flatten to 1D for mono processing
-        if audio_data.ndim > 1 and audio_data.shape[0] == 1:
-            audio_data = audio_data.squeeze()
-            
-        return audio_data, 16000
+        # Workers only read the PCM cache; the parent process is its single writer
+        if _worker_cache is None:
+            _worker_cache = pcm_cache.PcmCache()
+
+        def load():
+            y = _worker_cache.get(key)
+            if y is None:
+                return audio_decode.load_audio(filepath)
+            return y, audio_decode.SAMPLE_RATE
+
+        new_filepath = enhance_file(filepath, cleaned_path(filepath), load)
+        return position, new_filepath, None
     except Exception as e:
-        print(f"AV Load Error for {filepath}: {e}")
-        return None, None
+        return position, "", str(e)
+
+def enhance_parallel(jobs, workers):
+    """
+    Runs (key, filepath) jobs on a process pool and returns output paths in job order
+    ("" for failures). Submission is windowed so only workers * IN_FLIGHT_PER_WORKER
+    files are in flight at any time.
+    """
+    results = [""] * len(jobs)
+    max_in_flight = workers * IN_FLIGHT_PER_WORKER
+    pending = iter(enumerate(jobs))
+    completed = 0
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        in_flight = {}
+
+        def refill():
+            while len(in_flight) < max_in_flight:
+                try:
+                    position, (key, filepath) = next(pending)
+                except StopIteration:
+                    return
+                in_flight[executor.submit(_enhance_worker, position, key, filepath)] = position
+
+        refill()
+        while in_flight:
+            finished, _ = concurrent.futures.wait(in_flight, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in finished:
+                position = in_flight.pop(future)
+                try:
+                    _, new_filepath, error = future.result()
+                except Exception as e:
+                    # Worker process died (e.g. OOM kill)
+                    new_filepath, error = "", str(e)
+                completed += 1
+                if error:
+                    print(f"[{completed}/{len(jobs)}] Error enhancing {jobs[position][1]}: {error}")
+                else:
+                    print(f"[{completed}/{len(jobs)}] Saved {os.path.basename(new_filepath)}")
+                results[position] = new_filepath
+            refill()
 
-def enhance_audio_samples():
+    return results
+
+def enhance_audio_samples(workers=1):
     metadata_path = os.path.join(config.AUDIO_DOWNLOAD_DIR, 'downloaded_metadata.csv')
     if not os.path.exists(metadata_path):
         print("Metadata file not found. Run downloader first.")
@@ -50,72 +208,91 @@ def enhance_audio_samples():
     df = pd.read_csv(metadata_path)
     print(f"Enhancing {len(df)} files...")
 
+    if workers > 1:
+        enhanced_files = enhance_samples_parallel(df, workers)
+    else:
+        enhanced_files = enhance_samples_serial(df)
+
+    # Update metadata with new file paths
+    # Keep original path, update 'file_path' to point to cleaned version for downstream scripts
+    df['original_file_path'] = df['file_path']
+    df['file_path'] = enhanced_files
+
+    # Remove empty entries if enhancement failed
+    df = df[df['file_path'] != ""].copy()
+
+    # The raw blob hash and compacted copy would make audio_key / pcm_cache / resolve_upload_audio
+    # serve the un-enhanced audio, so key enhanced rows by the enhanced file's own hash
+    df = df.drop(columns=[c for c in RAW_AUDIO_COLUMNS if c in df.columns])
+    hashes = {path: audio_store.file_sha256(path) for path in df['file_path'].unique()}
+    df['audio_hash'] = df['file_path'].map(hashes)
+
+    output_csv = os.path.join(config.AUDIO_DOWNLOAD_DIR, 'enhanced_metadata.csv')
+    df.to_csv(output_csv, index=False)
+    print(f"Enhancement complete. Saved metadata to {output_csv}")
+
+def enhance_samples_serial(df):
     enhanced_files = []
+    # audio key -> enhanced path, so duplicate audio is only decoded once
+    done = {}
 
     for index, row in df.iterrows():
-        filepath = row['file_path']
+        filepath = audio_store.resolve_audio(row)
         sample_id = row['sample_id']
-        
+        key = audio_store.audio_key(row)
+
+        if key in done:
+            print(f"Reusing enhanced audio for {sample_id} (duplicate audio)")
+            enhanced_files.append(done[key])
+            continue
+
         if not os.path.exists(filepath):
             print(f"File not found: {filepath}")
             enhanced_files.append("")
             continue
 
         print(f"Processing {sample_id}...")
-        
+
         try:
-            # Load audio using AV
-            y, sr = load_audio_av_np(filepath)
-            
-            if y is None:
-                raise Exception("Failed to load audio with AV")
-            
-            # 1. Noise Reduction (Spectral Gating)
-            # Assuming the noise profile is stationary (hiss, hum)
-            # We use a conservative reduction to avoid artifacts
-            # noisereduce expects [samples] for mono
-            reduced_noise = nr.reduce_noise(y=y, sr=sr, stationary=True, prop_decrease=0.75)
-            
-            # 2. Normalization
-            # Normalize to -3dB
-            max_val = np.max(np.abs(reduced_noise))
-            if max_val > 0:
-                target_db = -3.0
-                target_amp = 10 ** (target_db / 20)
-                norm_factor = target_amp / max_val
-                normalized_audio = reduced_noise * norm_factor
-            else:
-                normalized_audio = reduced_noise
-
-            # Save enhanced file
-            dir_name = os.path.dirname(filepath)
-            base_name = os.path.basename(filepath)
-            name_part, ext_part = os.path.splitext(base_name)
-            
-            # Save as WAV for compatibility (soundfile writes wav easily)
-            new_filename = f"{name_part}_cleaned.wav"
-            new_filepath = os.path.join(dir_name, new_filename)
-            
-            sf.write(new_filepath, normalized_audio, sr)
-            print(f"  > Saved to {new_filename}")
-            
+            # Audio is served from the decoded PCM cache after the first run;
+            # long recordings are streamed from the file instead
+            new_filepath = enhance_file(filepath, cleaned_path(filepath),
+                                        lambda: pcm_cache.load_audio(row, filepath))
+            print(f"  > Saved to {os.path.basename(new_filepath)}")
+
             enhanced_files.append(new_filepath)
-            
+            done[key] = new_filepath
+
         except Exception as e:
             print(f"Error enhancing {sample_id}: {e}")
             enhanced_files.append("")
 
-    # Update metadata with new file paths
-    # Keep original path, update 'file_path' to point to cleaned version for downstream scripts
-    df['original_file_path'] = df['file_path']
-    df['file_path'] = enhanced_files
-    
-    # Remove empty entries if enhancement failed
-    df = df[df['file_path'] != ""]
-    
-    output_csv = os.path.join(config.AUDIO_DOWNLOAD_DIR, 'enhanced_metadata.csv')
-    df.to_csv(output_csv, index=False)
-    print(f"Enhancement complete. Saved metadata to {output_csv}")
+    return enhanced_files
+
+def enhance_samples_parallel(df, workers):
+    # One job per distinct audio; rows are mapped back to their job afterwards
+    jobs = []
+    job_of_key = {}
+    row_keys = []
+
+    for index, row in df.iterrows():
+        filepath = audio_store.resolve_audio(row)
+        key = audio_store.audio_key(row)
+        if not os.path.exists(filepath):
+            print(f"File not found: {filepath}")
+            row_keys.append(None)
+            continue
+        if key not in job_of_key:
+            job_of_key[key] = len(jobs)
+            jobs.append((key, filepath))
+        row_keys.append(key)
+
+    print(f"Enhancing {len(jobs)} distinct files on {workers} worker processes...")
+    outputs = enhance_parallel(jobs, workers)
+
+    return [outputs[job_of_key[key]] if key is not None else "" for key in row_keys]
 
 if __name__ == "__main__":
-    enhance_audio_samples()
+    # Usage: python enhance_audio.py [workers]   (default 1 = serial)
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else 1
+    enhance_audio_samples(workers=workers)
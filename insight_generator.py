@@ -3,6 +3,8 @@ import json
 import time
 import openai
 import os
+import sys
+import openai_batch
 
 # --- SETUP ---
 try:
@@ -103,7 +105,7 @@ def search_transcripts(keywords, topic, df):
         
     return context_text, citations
 
-def synthesize_qualitative_answer(query, context):
+def synthesis_messages(query, context):
     prompt = f"""
     User Query: {query}
     Context (Telugu Transcripts):
@@ -116,33 +118,37 @@ def synthesize_qualitative_answer(query, context):
     - Answer in English (for the report).
     - If the context mentions the topic but has no clear opinion, state that.
     """
+    return [{"role": "user", "content": prompt}]
+
+def synthesize_qualitative_answer(query, context):
     try:
         response = client.chat.completions.create(
             model="gpt-4o",
-            messages=[{"role": "user", "content": prompt}]
+            messages=synthesis_messages(query, context)
         )
         return response.choices[0].message.content
     except Exception as e:
         return f"Error: {e}"
 
-def generate_full_response(query):
-    # 1. Decision (Mock logic or use Prompt)
+def decision_messages(query):
     # Using the Chatbot System Prompt for Decision
-    
     system_prompt = """
     You are a data analyst assistant.
     If the user asks for QUALITATIVE info/feedback/opinion:
        - Return a JSON object with: {"type": "search", "keywords": ["..."], "topic": "..."}
        - Keywords should be Telugu terms if possible.
     """
-    
+    return [
+        {"role": "system", "content": system_prompt}, # simplified prompt
+        {"role": "user", "content": query}
+    ]
+
+def generate_full_response(query):
+    # 1. Decision (Mock logic or use Prompt)
     try:
         dec_resp = client.chat.completions.create(
             model="gpt-4o",
-            messages=[
-                {"role": "system", "content": system_prompt}, # simplified prompt
-                {"role": "user", "content": query}
-            ],
+            messages=decision_messages(query),
             response_format={"type": "json_object"}
         )
         decision = json.loads(dec_resp.choices[0].message.content)
@@ -162,6 +168,42 @@ def generate_full_response(query):
     except Exception as e:
         return f"Error: {e}", []
 
+def generate_batch_responses(queries):
+    """
+    Same answers as generate_full_response, through the OpenAI Batch API: one batch
+    for every decision, then one for every synthesis. No rate-limit sleeps needed.
+    """
+    decisions = openai_batch.run(
+        {f"decision-{i}": {"messages": decision_messages(q), "response_format": {"type": "json_object"},
+                           "temperature": None} for i, q in enumerate(queries)},
+        name="insights_decisions", model="gpt-4o", client=client)
+
+    results = [("Not a qualitative query (skipped)", []) for _ in queries]
+    syntheses = {}
+    for i, q in enumerate(queries):
+        if f"decision-{i}" not in decisions:
+            results[i] = ("Error: decision request failed in batch", [])
+            continue
+        try:
+            decision = json.loads(decisions[f"decision-{i}"])
+        except Exception as e:
+            results[i] = (f"Error: {e}", [])
+            continue
+        if decision.get("type") == "search":
+            keywords = decision.get("keywords", [])
+            context, citations = search_transcripts(keywords, decision.get("topic", ""), df)
+            if context:
+                syntheses[f"synthesis-{i}"] = {"messages": synthesis_messages(q, context), "temperature": None}
+                results[i] = (None, citations)
+            else:
+                results[i] = (f"No transcripts found for keywords: {keywords}", [])
+
+    if syntheses:
+        answers = openai_batch.run(syntheses, name="insights_syntheses", model="gpt-4o", client=client)
+        for i, (ans, cits) in enumerate(results):
+            if ans is None:
+                results[i] = (answers.get(f"synthesis-{i}", "Error: synthesis request failed in batch"), cits)
+    return results
 
 # --- COMPLEX QUESTIONS ---
 questions = [
@@ -179,9 +221,13 @@ print("="*60)
 
 report_content = "# Insight Report: Political Survey Data\n\n"
 
+# --batch-api: run every LLM call as an OpenAI batch job (cheaper, no rate-limit sleeps)
+use_batch_api = '--batch-api' in sys.argv
+batch_results = generate_batch_responses(questions) if use_batch_api else None
+
 for i, q in enumerate(questions):
     print(f"Processing Q{i+1}: {q}")
-    ans, cits = generate_full_response(q)
+    ans, cits = batch_results[i] if use_batch_api else generate_full_response(q)
     
     print(f" -> Generated {len(ans)} chars.")
     
@@ -190,7 +236,8 @@ for i, q in enumerate(questions):
     report_content += f"**Core Evidence:** {', '.join(cits)}\n\n"
     report_content += "---\n\n"
     
-    time.sleep(1) # Rate limit safety
+    if not use_batch_api:
+        time.sleep(1) # Rate limit safety
 
 # Save
 with open("report_insights.md", "w") as f:
@@ -0,0 +1,80 @@
+import time
+import framework_config as config
+import rate_limiter
+import llm_cache
+
+# Chat-completion backends for the LLM validators. Every call is metered by a shared
+# AdaptiveRateLimiter (requests/min and tokens/min), so any number of worker threads
+# can call complete() and the process as a whole stays inside the account's quota.
+REQUESTS_PER_MINUTE = getattr(config, 'VALIDATION_REQUESTS_PER_MINUTE', 500)
+TOKENS_PER_MINUTE = getattr(config, 'VALIDATION_TOKENS_PER_MINUTE', 30000)
+OUTPUT_TOKEN_ALLOWANCE = 150 # Reserved per call for the short JSON verdict
+MAX_RETRIES = 6
+# Replay identical temperature-0 requests from llm_cache instead of paying for them again
+USE_CACHE = getattr(config, 'VALIDATION_CACHE', True)
+
+def estimate_tokens(messages):
+    """
+    Prompt tokens from the real message text. ~4 UTF-8 bytes per token holds for English
+    and Telugu alike (Telugu letters are 3 bytes and tokenize into short pieces).
+    """
+    size = sum(len(str(m.get('content', '')).encode('utf-8')) for m in messages)
+    return size // 4 + 4 * len(messages)
+
+class OpenAIChatBackend:
+    def __init__(self, model=None, temperature=0, limiter=None, cache=None):
+        from openai import OpenAI
+        self.model = model or config.VALIDATION_MODEL
+        self.temperature = temperature
+        # Retries go through our limiter, not the SDK's own backoff
+        self.client = OpenAI(api_key=config.OPENAI_API_KEY, base_url=getattr(config, 'OPENAI_BASE_URL', None),
+                             max_retries=0)
+        self.limiter = limiter or rate_limiter.shared_limiter(
+            f"openai:{self.model}", requests=REQUESTS_PER_MINUTE, tokens=TOKENS_PER_MINUTE)
+        # Sampled replies (temperature > 0) are not reproducible, so they are never cached
+        if cache is None and USE_CACHE and temperature == 0:
+            cache = llm_cache.shared_cache()
+        self.cache = cache or None
+
+    def complete(self, messages, response_format=None, max_tokens=None, validate=None):
+        """
+        Returns the reply text. Rate limits and transient errors are retried; others raise.
+        validate(reply) should raise on a reply the caller can't use: only complete replies
+        it accepts are cached, so a truncated or garbled one is asked for again next time.
+        """
+        if self.cache:
+            key = llm_cache.fingerprint(self.model, messages, self.temperature, response_format, max_tokens)
+            cached = self.cache.get(key)
+            if cached is not None and llm_cache.cacheable(cached, validate=validate):
+                return cached
+
+        estimated = estimate_tokens(messages) + (max_tokens or OUTPUT_TOKEN_ALLOWANCE)
+        kwargs = {'response_format': response_format} if response_format else {}
+        if max_tokens:
+            kwargs['max_tokens'] = max_tokens
+
+        for attempt in range(MAX_RETRIES + 1):
+            self.limiter.acquire(requests=1, tokens=estimated)
+            try:
+                raw = self.client.chat.completions.with_raw_response.create(
+                    model=self.model, messages=messages, temperature=self.temperature, **kwargs)
+            except Exception as e:
+                if attempt == MAX_RETRIES or not rate_limiter.is_retryable(e):
+                    raise
+                retry_after = rate_limiter.retry_after_seconds(e)
+                self.limiter.observe_headers(getattr(getattr(e, 'response', None), 'headers', None))
+                if getattr(e, 'status_code', None) == 429:
+                    self.limiter.on_rate_limited(retry_after)
+                time.sleep(rate_limiter.backoff_seconds(attempt, retry_after))
+                continue
+
+            self.limiter.observe_headers(raw.headers)
+            response = raw.parse()
+            if response.usage:
+                self.limiter.settle('tokens', estimated, response.usage.total_tokens)
+            self.limiter.on_success()
+            choice = response.choices[0]
+            content = choice.message.content
+            if self.cache and llm_cache.cacheable(content, choice.finish_reason, validate):
+                self.cache.put(key, self.model, content)
+            return content
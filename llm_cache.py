@@ -0,0 +1,80 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+import framework_config as config
+
+# Persistent cache of chat-completion replies, keyed by a fingerprint of everything that
+# shapes the answer (model, messages, temperature, response format). Validators run at
+# temperature 0, so reruns with an unchanged prompt and record cost nothing.
+CACHE_PATH = os.path.join(config.AUDIO_DOWNLOAD_DIR, 'llm_cache.sqlite')
+
+def fingerprint(model, messages, temperature=0, response_format=None, max_tokens=None):
+    """sha256 over the request fields that change the reply."""
+    payload = json.dumps({
+        'model': model, 'messages': messages, 'temperature': temperature,
+        'response_format': response_format, 'max_tokens': max_tokens,
+    }, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def cacheable(response, finish_reason='stop', validate=None):
+    """
+    True if a reply may be stored or replayed: the model finished on its own (not cut off
+    by max_tokens or a content filter) and validate(response), the caller's parser, accepts it.
+    """
+    if finish_reason != 'stop' or not isinstance(response, str) or not response:
+        return False
+    if validate is None:
+        return True
+    try:
+        validate(response)
+    except Exception:
+        return False
+    return True
+
+class LLMCache:
+    def __init__(self, path=CACHE_PATH):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                fingerprint TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                response TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+        """)
+        self.conn.commit()
+
+    def get(self, key):
+        with self._lock:
+            row = self.conn.execute("SELECT response FROM responses WHERE fingerprint=?", (key,)).fetchone()
+            if row:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return row[0] if row else None
+
+    def put(self, key, model, response):
+        if not isinstance(response, str) or not response:
+            return
+        with self._lock:
+            self.conn.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)",
+                              (key, model, response, time.time()))
+            self.conn.commit()
+
+_shared = None
+_shared_lock = threading.Lock()
+
+def shared_cache():
+    """One LLMCache (one SQLite connection) for the whole process."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = LLMCache()
+        return _shared
@@ -0,0 +1,541 @@
+import re
+import sys
+import json
+import base64
+import time
+import uuid
+import random
+import hashlib
+import threading
+import collections
+from email.parser import BytesParser
+from email.policy import HTTP
+from urllib.parse import urlparse
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from rate_limiter import TokenBucket
+
+# Local stand-in for the Sarvam and OpenAI endpoints the pipeline uses (including the
+# OpenAI files/batches endpoints), so the orchestrator, validators and chatbot can be
+# load-tested offline. --job-seconds and --job-fail-rate also apply to OpenAI batches.
+#
+# Usage: python mock_api_server.py [--port 8765] [--latency 0.2] [--jitter 0.1]
+#            [--rate-429 0.0] [--fail-rate 0.0] [--rpm 0] [--tpm 0]
+#            [--job-seconds 5] [--job-fail-rate 0.0] [--seed 0]
+# Then point the clients at it:
+#   OPENAI_BASE_URL=http://127.0.0.1:8765/v1   (read by the OpenAI SDK)
+#   SARVAM_BASE_URL=http://127.0.0.1:8765      (environment or framework_config)
+#
+# Fault injection is deterministic: the outcome of a request depends only on the
+# seed, the request itself and how many times it has been retried, not on timing
+# or the order concurrent requests arrive in.
+DEFAULT_PORT = 8765
+
+class MockConfig:
+    def __init__(self, latency=0.2, jitter=0.1, rate_429=0.0, fail_rate=0.0, rpm=0, tpm=0,
+                 job_seconds=5.0, job_fail_rate=0.0, retry_after=1.0, truncate_rate=0.0, seed=0):
+        self.latency = latency           # Mean seconds added to every API call
+        self.jitter = jitter             # +/- uniform spread around latency
+        self.rate_429 = rate_429         # Probability of an injected 429
+        self.fail_rate = fail_rate       # Probability of an injected 500
+        self.rpm = rpm                   # Enforced requests/minute per API (0 = unlimited)
+        self.tpm = tpm                   # Enforced OpenAI tokens/minute (0 = unlimited)
+        self.job_seconds = job_seconds   # Sarvam batch job run time after /start
+        self.job_fail_rate = job_fail_rate
+        self.retry_after = retry_after   # Retry-After sent with every 429
+        self.truncate_rate = truncate_rate # Probability a chat reply is cut off (finish_reason 'length')
+        self.seed = seed
+
+class MockState:
+    """Everything the server remembers: jobs, blobs, quotas, attempt counts and stats."""
+    def __init__(self, config):
+        self.config = config
+        self.lock = threading.Lock()
+        self.jobs = {}          # job_id -> job dict
+        self.blobs = {}         # blob path -> bytes
+        self.files = {}         # OpenAI file id -> {'meta': ..., 'data': bytes}
+        self.batches = {}       # OpenAI batch id -> batch dict
+        self.attempts = collections.Counter()
+        self.stats = collections.Counter()
+        self.buckets = {}
+        if config.rpm:
+            self.buckets['openai_requests'] = TokenBucket(config.rpm)
+            self.buckets['sarvam_requests'] = TokenBucket(config.rpm)
+        if config.tpm:
+            self.buckets['openai_tokens'] = TokenBucket(config.tpm)
+
+    def rng(self, method, path, body):
+        """Per-request RNG: same request + same retry count -> same outcome."""
+        key = hashlib.sha256(method.encode() + path.encode() + body).hexdigest()
+        with self.lock:
+            self.attempts[key] += 1
+            attempt = self.attempts[key]
+        return random.Random(f"{self.config.seed}:{key}:{attempt}")
+
+    def take(self, costs):
+        """Charges the quota buckets. Returns seconds until the request would fit, or 0."""
+        with self.lock:
+            now = time.monotonic()
+            waits = [self.buckets[name].wait_time(cost, now) for name, cost in costs.items() if name in self.buckets]
+            wait = max(waits, default=0.0)
+            if wait > 0:
+                return wait
+            for name, cost in costs.items():
+                if name in self.buckets:
+                    self.buckets[name].take(cost)
+            return 0.0
+
+    def remaining(self, name):
+        bucket = self.buckets.get(name)
+        if bucket is None:
+            return None
+        with self.lock:
+            bucket.wait_time(0, time.monotonic()) # refill
+            return int(bucket.tokens), int(bucket.capacity)
+
+def estimate_tokens(text):
+    return max(len(text) // 4, 1)
+
+def mock_transcript(name, size):
+    digest = hashlib.sha256(f"{name}:{size}".encode()).hexdigest()[:8]
+    return f"మాక్ ట్రాన్స్క్రిప్ట్ {digest} ({name}, {size} bytes)"
+
+def mock_chat_content(messages, response_format, rng):
+    """A plausible reply for the prompts this repo sends."""
+    text = "\n".join(str(m.get('content', '')) for m in messages)
+    if not response_format or response_format.get('type') != 'json_object':
+        return f"Mock answer ({estimate_tokens(text)} prompt tokens)."
+    if '"results"' in text and '"is_valid"' in text:
+        # Batched validation: one verdict per "Sample ID:" line in the prompt
+        sample_ids = re.findall(r"Sample ID: (\S+)", text)
+        results = []
+        for sample_id in sample_ids:
+            valid = rng.random() < 0.7
+            results.append({"sample_id": sample_id, "is_valid": valid,
+                            "reason": "Mock validation: " + ("consistent" if valid else "not discussed")})
+        return json.dumps({"results": results})
+    if '"is_valid"' in text:
+        valid = rng.random() < 0.7
+        return json.dumps({"is_valid": valid, "reason": "Mock validation: " + ("consistent" if valid else "not discussed")})
+    if '"search"' in text:
+        return json.dumps({"type": "search", "keywords": ["రోడ్లు", "నీళ్ళు"], "topic": "mock"})
+    return json.dumps({"type": "chat", "response": "Mock chat response."})
+
+def mock_finish(content, config, rng):
+    """(content, finish_reason): occasionally cut off mid-reply, as with a max_tokens hit."""
+    if config.truncate_rate and rng.random() < config.truncate_rate:
+        return content[:len(content) // 2], "length"
+    return content, "stop"
+
+def parse_multipart(content_type, body):
+    """field name -> (filename, bytes) for file parts, or str for plain fields."""
+    message = BytesParser(policy=HTTP).parsebytes(
+        f"Content-Type: {content_type}\r\n\r\n".encode() + body)
+    fields = {}
+    for part in message.iter_parts():
+        name = part.get_param('name', header='content-disposition')
+        payload = part.get_payload(decode=True) or b''
+        filename = part.get_filename()
+        fields[name] = (filename, payload) if filename else payload.decode(errors='replace')
+    return fields
+
+class MockHandler(BaseHTTPRequestHandler):
+    state = None # MockState, set by serve()
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass # Quiet: per-route counts are available at /mock/stats
+
+    # --- plumbing ---
+
+    def _body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        return self.rfile.read(length) if length else b''
+
+    def _send(self, status, payload=None, headers=None, raw=None, content_type='application/json'):
+        data = raw if raw is not None else json.dumps(payload if payload is not None else {}).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _error(self, status, message, code, headers=None):
+        self._send(status, {"error": {"message": message, "type": code, "code": code}}, headers)
+
+    def _base_url(self):
+        return f"http://{self.headers.get('Host', f'127.0.0.1:{DEFAULT_PORT}')}"
+
+    def _chaos(self, api, body, tokens=0):
+        """Latency, quota and injected faults for an API call. Returns True if a response was sent."""
+        state, config = self.state, self.state.config
+        route = f"{self.command} {urlparse(self.path).path}"
+        state.stats[f"{api} requests"] += 1
+        rng = state.rng(self.command, self.path, body)
+        time.sleep(max(config.latency + rng.uniform(-config.jitter, config.jitter), 0.0))
+
+        costs = {f"{api}_requests": 1}
+        if api == 'openai':
+            costs['openai_tokens'] = tokens
+        wait = state.take(costs)
+        if wait > 0 or rng.random() < config.rate_429:
+            state.stats[f"{api} 429"] += 1
+            retry_after = max(wait, config.retry_after)
+            self._error(429, f"Rate limit reached for {route} (mock)", "rate_limit_exceeded",
+                        {'Retry-After': f"{retry_after:.2f}", **self._rate_headers()})
+            return True
+        if rng.random() < config.fail_rate:
+            state.stats[f"{api} 500"] += 1
+            self._error(500, "Injected server error (mock)", "server_error")
+            return True
+        return False
+
+    def _rate_headers(self):
+        headers = {}
+        for name, header in (('openai_requests', 'requests'), ('openai_tokens', 'tokens')):
+            remaining = self.state.remaining(name)
+            if remaining:
+                headers[f"x-ratelimit-remaining-{header}"] = str(remaining[0])
+                headers[f"x-ratelimit-limit-{header}"] = str(remaining[1])
+        return headers
+
+    # --- routing ---
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if path == '/mock/stats':
+            return self._send(200, dict(self.state.stats))
+        if path.startswith('/blob/'):
+            return self._blob_get(path)
+        if path.startswith('/speech-to-text/job/v1/') and path.endswith('/status'):
+            return self._sarvam_status(path.split('/')[-2])
+        if path.startswith('/v1/files/') and path.endswith('/content'):
+            return self._openai_file_content(path.split('/')[-2])
+        if path.startswith('/v1/batches/'):
+            return self._openai_batch_status(path.split('/')[-1])
+        self._error(404, f"No mock for GET {path}", "not_found")
+
+    def do_PUT(self):
+        path = urlparse(self.path).path
+        if path.startswith('/blob/'):
+            return self._blob_put(path)
+        self._error(404, f"No mock for PUT {path}", "not_found")
+
+    def do_POST(self):
+        path = urlparse(self.path).path
+        body = self._body()
+        routes = {
+            '/v1/chat/completions': self._openai_chat,
+            '/v1/audio/transcriptions': self._openai_transcription,
+            '/v1/files': self._openai_file_upload,
+            '/v1/batches': self._openai_batch_create,
+            '/speech-to-text': self._sarvam_transcribe,
+            '/speech-to-text/job/v1': self._sarvam_create,
+            '/speech-to-text/job/v1/upload-files': self._sarvam_upload_links,
+            '/speech-to-text/job/v1/download-files': self._sarvam_download_links,
+        }
+        if path in routes:
+            return routes[path](body)
+        if path.startswith('/speech-to-text/job/v1/') and path.endswith('/start'):
+            return self._sarvam_start(path.split('/')[-2], body)
+        self._error(404, f"No mock for POST {path}", "not_found")
+
+    # --- OpenAI ---
+
+    def _openai_chat(self, body):
+        request = json.loads(body or b'{}')
+        messages = request.get('messages', [])
+        prompt_tokens = sum(estimate_tokens(str(m.get('content', ''))) for m in messages)
+        if self._chaos('openai', body, tokens=prompt_tokens):
+            return
+        rng = self.state.rng('chat', '', body)
+        content, finish_reason = mock_finish(mock_chat_content(messages, request.get('response_format'), rng),
+                                             self.state.config, rng)
+        completion_tokens = estimate_tokens(content)
+        self._send(200, {
+            "id": f"chatcmpl-mock-{uuid.uuid4().hex[:12]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get('model', 'mock'),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": finish_reason}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                      "total_tokens": prompt_tokens + completion_tokens},
+        }, self._rate_headers())
+
+    def _openai_transcription(self, body):
+        if self._chaos('openai', body):
+            return
+        fields = parse_multipart(self.headers.get('Content-Type', ''), body)
+        filename, audio = fields.get('file', ('audio', b''))
+        self._send(200, {"text": mock_transcript(filename, len(audio))}, self._rate_headers())
+
+    # --- OpenAI files and batches ---
+
+    def _openai_file_upload(self, body):
+        if self._chaos('openai', body):
+            return
+        fields = parse_multipart(self.headers.get('Content-Type', ''), body)
+        filename, data = fields.get('file', ('upload.jsonl', b''))
+        meta = {"id": f"file-mock-{uuid.uuid4().hex[:12]}", "object": "file", "bytes": len(data),
+                "created_at": int(time.time()), "filename": filename, "purpose": fields.get('purpose', 'batch')}
+        self._store_file(meta, data)
+        self._send(200, meta)
+
+    def _store_file(self, meta, data):
+        with self.state.lock:
+            self.state.files[meta['id']] = {'meta': meta, 'data': data}
+
+    def _openai_file_content(self, file_id):
+        if self._chaos('openai', b''):
+            return
+        with self.state.lock:
+            entry = self.state.files.get(file_id)
+        if entry is None:
+            return self._error(404, f"No such File object: {file_id}", "not_found")
+        self._send(200, raw=entry['data'], content_type='application/octet-stream')
+
+    def _openai_batch_create(self, body):
+        if self._chaos('openai', body):
+            return
+        request = json.loads(body or b'{}')
+        with self.state.lock:
+            entry = self.state.files.get(request.get('input_file_id'))
+        if entry is None:
+            return self._error(400, f"Invalid input_file_id: {request.get('input_file_id')}", "invalid_request_error")
+        lines = [json.loads(line) for line in entry['data'].decode().splitlines() if line.strip()]
+        batch = {
+            "id": f"batch_mock_{uuid.uuid4().hex[:12]}", "object": "batch", "endpoint": request.get('endpoint'),
+            "input_file_id": request['input_file_id'], "completion_window": request.get('completion_window', '24h'),
+            "status": "in_progress", "output_file_id": None, "error_file_id": None, "errors": None,
+            "created_at": int(time.time()), "in_progress_at": int(time.time()), "completed_at": None,
+            "metadata": request.get('metadata'),
+            "request_counts": {"total": len(lines), "completed": 0, "failed": 0},
+        }
+        with self.state.lock:
+            self.state.batches[batch['id']] = batch
+        self._send(200, batch)
+
+    def _finish_batch(self, batch):
+        """Runs every request of a batch once its run time has passed, writing output and error files."""
+        if batch['status'] != 'in_progress' or time.time() - batch['created_at'] < self.state.config.job_seconds:
+            return
+        with self.state.lock:
+            if batch['status'] != 'in_progress':
+                return
+            batch['status'] = 'finalizing'
+        with self.state.lock:
+            data = self.state.files[batch['input_file_id']]['data']
+        outputs, errors = [], []
+        for line in data.decode().splitlines():
+            if not line.strip():
+                continue
+            request = json.loads(line)
+            rng = self.state.rng('batch', request['custom_id'], json.dumps(request['body'], sort_keys=True).encode())
+            if rng.random() < self.state.config.job_fail_rate:
+                errors.append({"id": f"batch_req_{uuid.uuid4().hex[:12]}", "custom_id": request['custom_id'],
+                               "response": None,
+                               "error": {"code": "server_error", "message": "Injected batch request failure (mock)"}})
+                continue
+            body = request['body']
+            content, finish_reason = mock_finish(mock_chat_content(body.get('messages', []), body.get('response_format'), rng),
+                                                 self.state.config, rng)
+            prompt_tokens = sum(estimate_tokens(str(m.get('content', ''))) for m in body.get('messages', []))
+            outputs.append({"id": f"batch_req_{uuid.uuid4().hex[:12]}", "custom_id": request['custom_id'], "error": None,
+                            "response": {"status_code": 200, "request_id": uuid.uuid4().hex, "body": {
+                                "id": f"chatcmpl-mock-{uuid.uuid4().hex[:12]}", "object": "chat.completion",
+                                "created": int(time.time()), "model": body.get('model', 'mock'),
+                                "choices": [{"index": 0, "message": {"role": "assistant", "content": content},
+                                             "finish_reason": finish_reason}],
+                                "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": estimate_tokens(content),
+                                          "total_tokens": prompt_tokens + estimate_tokens(content)}}}})
+        for kind, lines in (('output_file_id', outputs), ('error_file_id', errors)):
+            if lines:
+                payload = "".join(json.dumps(l, ensure_ascii=False) + "\n" for l in lines).encode()
+                meta = {"id": f"file-mock-{uuid.uuid4().hex[:12]}", "object": "file", "bytes": len(payload),
+                        "created_at": int(time.time()), "filename": f"{batch['id']}_{kind}.jsonl",
+                        "purpose": "batch_output"}
+                self._store_file(meta, payload)
+                batch[kind] = meta['id']
+        with self.state.lock:
+            batch.update(status='completed', completed_at=int(time.time()),
+                         request_counts={"total": len(outputs) + len(errors), "completed": len(outputs),
+                                         "failed": len(errors)})
+        self.state.stats["batch requests"] += len(outputs) + len(errors)
+
+    def _openai_batch_status(self, batch_id):
+        if self._chaos('openai', b''):
+            return
+        with self.state.lock:
+            batch = self.state.batches.get(batch_id)
+        if batch is None:
+            return self._error(404, f"No batch found with id '{batch_id}'", "not_found")
+        self._finish_batch(batch)
+        self._send(200, batch)
+
+    # --- Sarvam sync ---
+
+    def _sarvam_transcribe(self, body):
+        if self._chaos('sarvam', body):
+            return
+        fields = parse_multipart(self.headers.get('Content-Type', ''), body)
+        filename, audio = fields.get('file', ('audio', b''))
+        self._send(200, {"request_id": uuid.uuid4().hex, "transcript": mock_transcript(filename, len(audio)),
+                         "language_code": fields.get('language_code', 'te-IN')})
+
+    # --- Sarvam batch jobs ---
+
+    def _job(self, job_id):
+        job = self.state.jobs.get(job_id)
+        if job is None:
+            self._error(404, f"Job {job_id} not found", "not_found")
+        return job
+
+    def _sarvam_create(self, body):
+        if self._chaos('sarvam', body):
+            return
+        request = json.loads(body or b'{}')
+        job_id = f"{time.strftime('%Y%m%d')}_{uuid.uuid4()}"
+        with self.state.lock:
+            self.state.jobs[job_id] = {'job_id': job_id, 'state': 'Accepted', 'files': [], 'started_at': None,
+                                       'failed': False, 'parameters': request.get('job_parameters', {}),
+                                       'created_at': time.time()}
+        self._send(200, {"job_id": job_id, "job_state": "Accepted", "storage_container_type": "Azure",
+                         "job_parameters": request.get('job_parameters', {})})
+
+    def _sarvam_upload_links(self, body):
+        if self._chaos('sarvam', body):
+            return
+        request = json.loads(body or b'{}')
+        job = self._job(request.get('job_id'))
+        if job is None:
+            return
+        urls = {name: {"file_url": f"{self._base_url()}/blob/{job['job_id']}/input/{name}", "file_metadata": None}
+                for name in request.get('files', [])}
+        self._send(200, {"job_id": job['job_id'], "job_state": job['state'], "upload_urls": urls,
+                         "storage_container_type": "Azure"})
+
+    def _sarvam_start(self, job_id, body):
+        if self._chaos('sarvam', body):
+            return
+        job = self._job(job_id)
+        if job is None:
+            return
+        request = json.loads(body or b'{}')
+        # Snapshot under the lock: parallel upload PUTs are adding blobs meanwhile
+        with self.state.lock:
+            blob_paths = list(self.state.blobs)
+        uploaded = [p.split('/')[-1] for p in blob_paths if p.startswith(f"/blob/{job_id}/input/")]
+        files = request.get('files') or uploaded
+        missing = [f for f in files if f not in uploaded]
+        if missing or not files:
+            return self._error(400, f"Files not uploaded: {missing or 'none'}", "invalid_request_error")
+        rng = self.state.rng('job', job_id, b'')
+        with self.state.lock:
+            job.update(state='Running', files=files, started_at=time.time(),
+                       failed=rng.random() < self.state.config.job_fail_rate)
+        self._send(200, {"job_id": job_id, "job_state": "Running"})
+
+    def _refresh(self, job):
+        """Finishes a running job once its run time has passed, writing its outputs."""
+        if job['state'] != 'Running' or time.time() - job['started_at'] < self.state.config.job_seconds:
+            return
+        with self.state.lock:
+            if job['state'] != 'Running':
+                return
+            if job['failed']:
+                job['state'] = 'Failed'
+                return
+            for name in job['files']:
+                audio = self.state.blobs.get(f"/blob/{job['job_id']}/input/{name}", b'')
+                output = {"request_id": uuid.uuid4().hex, "transcript": mock_transcript(name, len(audio)),
+                          "language_code": job['parameters'].get('language_code', 'te-IN')}
+                self.state.blobs[f"/blob/{job['job_id']}/output/{name}.json"] = json.dumps(output).encode()
+            job['state'] = 'Completed'
+
+    def _sarvam_status(self, job_id):
+        if self._chaos('sarvam', b''):
+            return
+        job = self._job(job_id)
+        if job is None:
+            return
+        self._refresh(job)
+        done = job['state'] == 'Completed'
+        details = [{
+            "inputs": [{"file_name": name, "file_id": str(i)}],
+            "outputs": [{"file_name": f"{name}.json", "file_id": str(i)}] if done else [],
+            "state": "Success" if done else job['state'],
+            "error_message": None, "exception_name": None,
+        } for i, name in enumerate(job['files'])]
+        self._send(200, {
+            "job_id": job_id, "job_state": job['state'], "storage_container_type": "Azure",
+            "created_at": str(job['created_at']), "updated_at": str(time.time()),
+            "total_files": len(job['files']),
+            "successful_files_count": len(job['files']) if done else 0,
+            "failed_files_count": len(job['files']) if job['state'] == 'Failed' else 0,
+            "error_message": "Injected job failure (mock)" if job['state'] == 'Failed' else None,
+            "job_details": details,
+        })
+
+    def _sarvam_download_links(self, body):
+        if self._chaos('sarvam', body):
+            return
+        request = json.loads(body or b'{}')
+        job = self._job(request.get('job_id'))
+        if job is None:
+            return
+        urls = {name: {"file_url": f"{self._base_url()}/blob/{job['job_id']}/output/{name}", "file_metadata": None}
+                for name in request.get('files', [])}
+        self._send(200, {"job_id": job['job_id'], "job_state": job['state'], "download_urls": urls,
+                         "storage_container_type": "Azure"})
+
+    # --- signed-URL blob storage ---
+
+    def _blob_put(self, path):
+        body = self._body()
+        if self.headers.get('x-ms-blob-type') != 'BlockBlob':
+            return self._error(400, "Missing x-ms-blob-type: BlockBlob", "invalid_header")
+        content_md5 = self.headers.get('Content-MD5')
+        actual = base64.b64encode(hashlib.md5(body).digest()).decode()
+        if content_md5 and content_md5 != actual:
+            return self._error(400, "Content-MD5 mismatch", "Md5Mismatch")
+        with self.state.lock:
+            self.state.blobs[path] = body
+        self.state.stats["blob uploads"] += 1
+        self._send(201, raw=b'', headers={'Content-MD5': actual})
+
+    def _blob_get(self, path):
+        with self.state.lock:
+            data = self.state.blobs.get(path)
+        if data is None:
+            return self._error(404, "Blob not found", "BlobNotFound")
+        self._send(200, raw=data, content_type='application/octet-stream')
+
+def serve(config=None, port=DEFAULT_PORT, host='127.0.0.1'):
+    """Starts the mock server on a background thread. Returns the server (call .shutdown())."""
+    handler = type('BoundMockHandler', (MockHandler,), {'state': MockState(config or MockConfig())})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def _flag(name, default, cast=float):
+    return cast(sys.argv[sys.argv.index(name) + 1]) if name in sys.argv else default
+
+if __name__ == "__main__":
+    config = MockConfig(
+        latency=_flag('--latency', 0.2), jitter=_flag('--jitter', 0.1),
+        rate_429=_flag('--rate-429', 0.0), fail_rate=_flag('--fail-rate', 0.0),
+        rpm=_flag('--rpm', 0, int), tpm=_flag('--tpm', 0, int),
+        job_seconds=_flag('--job-seconds', 5.0), job_fail_rate=_flag('--job-fail-rate', 0.0),
+        truncate_rate=_flag('--truncate-rate', 0.0), seed=_flag('--seed', 0, int))
+    port = _flag('--port', DEFAULT_PORT, int)
+    server = serve(config, port)
+    print(f"Mock Sarvam/OpenAI API on http://127.0.0.1:{port}")
+    print(f"  export OPENAI_BASE_URL=http://127.0.0.1:{port}/v1 SARVAM_BASE_URL=http://127.0.0.1:{port}")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.shutdown()
+        print(f"Stats: {dict(server.RequestHandlerClass.state.stats)}")
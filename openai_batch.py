@@ -0,0 +1,160 @@
+import os
+import io
+import json
+import time
+import random
+import hashlib
+import framework_config as config
+import llm_cache
+
+# OpenAI Batch API runner for offline LLM jobs (validators, insight reports).
+# Requests are written as JSONL, uploaded with purpose=batch and run as one batch
+# job; replies come back keyed by custom_id. Half the price of the sync endpoint
+# and a separate, much larger quota, at the cost of minutes-to-hours latency.
+#
+# The submitted batch id is saved next to the JSONL, so a rerun with the same
+# requests (e.g. after Ctrl+C) resumes polling instead of paying again.
+BATCH_DIR = os.path.join(config.AUDIO_DOWNLOAD_DIR, 'openai_batches')
+ENDPOINT = "/v1/chat/completions"
+COMPLETION_WINDOW = "24h"
+POLL_MIN_SECONDS = 10
+POLL_MAX_SECONDS = 300
+POLL_BACKOFF = 1.5
+TERMINAL_STATES = ("completed", "failed", "expired", "cancelled")
+
+def make_client():
+    from openai import OpenAI
+    return OpenAI(api_key=config.OPENAI_API_KEY, base_url=getattr(config, 'OPENAI_BASE_URL', None))
+
+def build_request(custom_id, model, messages, temperature=0, response_format=None, max_tokens=None):
+    """One JSONL line: a chat completion request tagged with custom_id."""
+    body = {"model": model, "messages": messages}
+    if temperature is not None:
+        body["temperature"] = temperature
+    if response_format:
+        body["response_format"] = response_format
+    if max_tokens:
+        body["max_tokens"] = max_tokens
+    return {"custom_id": custom_id, "method": "POST", "url": ENDPOINT, "body": body}
+
+def write_jsonl(lines, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        for line in lines:
+            f.write(json.dumps(line, ensure_ascii=False) + "\n")
+
+def _load_state(path):
+    if os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+    return {}
+
+def _save_state(path, state):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, path)
+
+def submit(client, jsonl_path, description=None):
+    """Uploads the JSONL and creates the batch. Returns the batch id."""
+    with open(jsonl_path, 'rb') as f:
+        input_file = client.files.create(file=f, purpose="batch")
+    batch = client.batches.create(
+        input_file_id=input_file.id, endpoint=ENDPOINT, completion_window=COMPLETION_WINDOW,
+        metadata={"description": description} if description else None)
+    print(f"Submitted batch {batch.id} ({os.path.basename(jsonl_path)})")
+    return batch.id
+
+def wait(client, batch_id):
+    """Polls until the batch reaches a terminal state, backing off while it runs. Returns the batch."""
+    delay = POLL_MIN_SECONDS
+    while True:
+        batch = client.batches.retrieve(batch_id)
+        counts = batch.request_counts
+        progress = f"{counts.completed + counts.failed}/{counts.total}" if counts else "?"
+        print(f"Batch {batch_id}: {batch.status} ({progress})")
+        if batch.status in TERMINAL_STATES:
+            return batch
+        time.sleep(delay * random.uniform(0.8, 1.2))
+        delay = min(delay * POLL_BACKOFF, POLL_MAX_SECONDS)
+
+def _read_file(client, file_id):
+    if not file_id:
+        return []
+    text = client.files.content(file_id).text
+    return [json.loads(line) for line in io.StringIO(text) if line.strip()]
+
+def fetch_choices(client, batch):
+    """
+    custom_id -> first choice (message and finish_reason) for every request that succeeded;
+    failures are logged and left out.
+    """
+    replies = {}
+    for line in _read_file(client, batch.output_file_id):
+        response = line.get('response') or {}
+        if response.get('status_code') == 200:
+            replies[line['custom_id']] = response['body']['choices'][0]
+        else:
+            print(f"Batch request {line.get('custom_id')} failed: {response.get('status_code')}")
+    errors = _read_file(client, batch.error_file_id)
+    for line in errors[:5]:
+        print(f"Batch request {line.get('custom_id')} failed: {line.get('error') or line.get('response')}")
+    if len(errors) > 5:
+        print(f"... and {len(errors) - 5} more failed requests")
+    return replies
+
+def run(requests, name, model=None, client=None, cache=None):
+    """
+    requests: custom_id -> dict(messages=..., response_format=..., max_tokens=..., temperature=...,
+    validate=...) (temperature defaults to 0; None leaves the API default, and such replies
+    are not cached; validate is as for OpenAIChatBackend.complete).
+    Returns custom_id -> reply text. Requests missing from the result failed or expired;
+    callers decide how to retry them. Cached replies are served without submitting; only
+    complete replies that pass validate are cached.
+    """
+    model = model or config.VALIDATION_MODEL
+    replies, lines, keys = {}, [], {}
+    for custom_id, request in requests.items():
+        temperature = request.get('temperature', 0)
+        if cache and temperature == 0:
+            keys[custom_id] = llm_cache.fingerprint(model, request['messages'], temperature,
+                                                    request.get('response_format'), request.get('max_tokens'))
+            cached = cache.get(keys[custom_id])
+            if cached is not None and llm_cache.cacheable(cached, validate=request.get('validate')):
+                replies[custom_id] = cached
+                continue
+        lines.append(build_request(custom_id, model, request['messages'], temperature,
+                                   request.get('response_format'), request.get('max_tokens')))
+    print(f"{name}: {len(replies)} cached, {len(lines)} to submit")
+    if not lines:
+        return replies
+
+    jsonl_path = os.path.join(BATCH_DIR, f"{name}.jsonl")
+    state_path = os.path.join(BATCH_DIR, f"{name}.state.json")
+    write_jsonl(lines, jsonl_path)
+    with open(jsonl_path, 'rb') as f:
+        input_hash = hashlib.sha256(f.read()).hexdigest()
+
+    client = client or make_client()
+    state = _load_state(state_path)
+    if state.get('input_hash') == input_hash and state.get('status') not in ("failed", "expired", "cancelled"):
+        batch_id = state['batch_id']
+        print(f"Resuming batch {batch_id}")
+    else:
+        batch_id = submit(client, jsonl_path, description=name)
+        state = {'input_hash': input_hash, 'batch_id': batch_id, 'status': 'submitted'}
+        _save_state(state_path, state)
+
+    batch = wait(client, batch_id)
+    state['status'] = batch.status
+    _save_state(state_path, state)
+    if batch.status != "completed":
+        print(f"Batch {batch_id} ended {batch.status}; partial results only")
+
+    for custom_id, choice in fetch_choices(client, batch).items():
+        content = choice['message']['content']
+        if custom_id in keys and llm_cache.cacheable(content, choice.get('finish_reason'),
+                                                     requests[custom_id].get('validate')):
+            cache.put(keys[custom_id], model, content)
+        replies[custom_id] = content
+    return replies
@@ -0,0 +1,125 @@
+import os
+import json
+import threading
+import numpy as np
+import pandas as pd
+import framework_config as config
+import audio_decode
+import audio_store
+
+# Decoded-audio cache: every sample's 16kHz mono PCM appended to one flat file,
+# with a JSON index of key -> [offset, length] (in samples). Readers get numpy views
+# into a memory map, so repeated ASR experiments skip the MP3 decode + resample.
+# Keys are audio_store.audio_key(row), i.e. the content hash when available.
+# One instance is safe to share between threads (the transcribe.py --workers driver);
+# separate processes must not write to the same cache.
+CACHE_DIR = os.path.join(config.AUDIO_DOWNLOAD_DIR, 'pcm_cache')
+PCM_DTYPE = 'float32' # 'int16' halves the file; views are then converted to float32 on read
+
+class PcmCache:
+    def __init__(self, cache_dir=CACHE_DIR, dtype=PCM_DTYPE):
+        self.dtype = np.dtype(dtype)
+        self.data_path = os.path.join(cache_dir, f"pcm_{audio_decode.SAMPLE_RATE}_{self.dtype.name}.bin")
+        self.index_path = self.data_path + '.index.json'
+        os.makedirs(cache_dir, exist_ok=True)
+
+        self.index = {}
+        if os.path.exists(self.index_path):
+            with open(self.index_path, 'r') as f:
+                self.index = json.load(f)
+        self._map = None
+        self._lock = threading.Lock() # Guards the data file append, the index and the mapping
+
+    def __contains__(self, key):
+        return key in self.index
+
+    def _mapped(self, end):
+        # Re-map only when the file has grown past the current mapping
+        if self._map is None or end > len(self._map):
+            self._map = np.memmap(self.data_path, dtype=self.dtype, mode='r')
+        return self._map
+
+    def get(self, key):
+        """Zero-copy view of a cached sample (float32 cache), or None if not cached."""
+        with self._lock:
+            if key not in self.index:
+                return None
+            offset, length = self.index[key]
+            view = self._mapped(offset + length)[offset:offset + length]
+        if self.dtype == np.int16:
+            return view.astype(np.float32) / 32768.0
+        return view
+
+    def put(self, key, audio):
+        """Appends decoded audio (thread-safe). Only one process should write to a cache at a time."""
+        if self.dtype == np.int16:
+            data = (np.clip(audio, -1.0, 1.0) * 32767).astype(np.int16)
+        else:
+            data = np.asarray(audio, dtype=self.dtype)
+
+        with self._lock:
+            if key in self.index:
+                return # Another thread decoded the same audio first
+            with open(self.data_path, 'ab') as f:
+                offset = f.tell() // self.dtype.itemsize
+                f.write(data.tobytes())
+
+            self.index[key] = [offset, len(data)]
+            tmp_path = self.index_path + '.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump(self.index, f)
+            os.replace(tmp_path, self.index_path)
+
+    def load(self, key, filepath):
+        """Cached audio for key, decoding filepath and caching it on a miss. Returns (audio, sr)."""
+        audio = self.get(key)
+        if audio is not None:
+            return audio, audio_decode.SAMPLE_RATE
+        audio, sample_rate = audio_decode.load_audio(filepath)
+        if audio is None:
+            return None, None
+        self.put(key, audio)
+        return self.get(key), sample_rate
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+def load_audio(row, filepath=None):
+    """Drop-in for audio_decode.load_audio on a metadata row, served from the default cache."""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = PcmCache()
+    if filepath is None:
+        filepath = audio_store.resolve_audio(row)
+    return _default_cache.load(audio_store.audio_key(row), filepath)
+
+def build_cache():
+    """Decodes every downloaded sample into the cache ahead of a benchmark run."""
+    metadata_path = os.path.join(config.AUDIO_DOWNLOAD_DIR, 'downloaded_metadata.csv')
+    if not os.path.exists(metadata_path):
+        print("Metadata file not found. Run downloader first.")
+        return
+
+    df = pd.read_csv(metadata_path)
+    cache = PcmCache()
+    added = 0
+
+    for index, row in df.iterrows():
+        key = audio_store.audio_key(row)
+        if key in cache:
+            continue
+        filepath = audio_store.resolve_audio(row)
+        if not os.path.exists(filepath):
+            print(f"File not found: {filepath}")
+            continue
+        audio, _ = cache.load(key, filepath)
+        if audio is None:
+            continue
+        added += 1
+        print(f"Cached {row['sample_id']} ({len(audio) / audio_decode.SAMPLE_RATE:.1f}s)")
+
+    print(f"PCM cache ready: {len(cache.index)} entries ({added} new) in {cache.data_path}")
+
+if __name__ == "__main__":
+    build_cache()
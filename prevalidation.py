@@ -0,0 +1,133 @@
+import re
+import pandas as pd
+import framework_config as config
+import llm_backend
+import vad
+
+# Rule tier in front of the LLM validator. classify() settles the obvious records
+# locally (no transcript, no speech, a few words, nothing survey-like, or a clear
+# match on the reported answers) and returns None for everything else, which is
+# escalated to the LLM. Results carry validation_tier = 'rule' or 'llm'.
+USE_RULES = getattr(config, 'VALIDATION_RULES', True)
+MIN_WORDS = 6           # Fewer words than this cannot hold a survey conversation
+SHORT_WORDS = 40        # Below this, a transcript with no survey cue at all is noise
+MIN_CUES_FOR_VALID = 2  # Topic cues needed (with matching Q1, caste and age) to pass without the LLM
+
+# Transcripts that are failure markers rather than speech
+MISSING_MARKERS = ("TRANSCRIPT_NOT_FOUND", "NO_TRANSCRIPT", "PENDING", "ERROR")
+
+# Phrases surveyors use when asking the questions. Caste/age question words only show
+# the question was asked, not what was answered, so they never count toward a VALID.
+TOPIC_CUES = ["సమస్య", "సమస్యలు", "ఓటు", "ఓట్లు", "సర్వే", "పేరు", "పార్టీ", "ఎమ్మెల్యే", "పథకం", "ఎలక్షన్"]
+CASTE_CUES = ["కాస్ట్", "క్యాస్ట్", "కులం"]
+AGE_CUES = ["వయసు", "వయస్సు", "ఏజ్", "సంవత్సరాలు"]
+SURVEY_CUES = TOPIC_CUES + CASTE_CUES + AGE_CUES
+
+# Reported caste (English) -> how it is spoken in the transcripts
+CASTE_ALIASES = {
+    "kapu": ["కాపు"],
+    "mala": ["మాల"],
+    "madiga": ["మాదిగ"],
+    "settibalija": ["శెట్టిబలిజ", "సెట్టిబలిజ", "శెట్టి బలిజ", "సెట్టి బలిజ"],
+    "padmasali": ["పద్మశాలి", "పత్మశాలి", "పద్మశాని", "పత్మశాని"],
+    "devanga": ["దేవాంగ", "దేవంగ"],
+    "yadava": ["యాదవ"],
+    "gowda": ["గౌడ"],
+    "reddy": ["రెడ్డి"],
+    "kamma": ["కమ్మ"],
+    "raju": ["రాజు"],
+    "brahmin": ["బ్రాహ్మణ", "బ్రాహ్మిన్"],
+    "muslim": ["ముస్లిం"],
+    "christian": ["క్రిస్టియన్"],
+    "bc": ["బీసీ"],
+    "sc": ["ఎస్సీ"],
+    "st": ["ఎస్టీ"],
+}
+
+def _text(value):
+    return "" if value is None or pd.isna(value) else str(value).strip()
+
+def q1_mentioned(transcript, q1):
+    """The reported main problem, or its stem (Telugu inflects word endings), appears in the transcript."""
+    for word in re.split(r"[\s,/()]+", _text(q1)):
+        if len(word) >= 3 and (word in transcript or word[:max(len(word) - 2, 3)] in transcript):
+            return True
+    return False
+
+def caste_mentioned(transcript, caste):
+    """A spoken form of the reported caste appears in the transcript."""
+    for name in re.split(r"[\s,/()]+", _text(caste).lower()):
+        if any(alias in transcript for alias in CASTE_ALIASES.get(name, [])):
+            return True
+    return False
+
+def age_in_range(transcript, age):
+    """A number inside the reported range (e.g. '41-59', '60+') was said."""
+    bounds = [int(n) for n in re.findall(r"\d+", _text(age))]
+    if not bounds:
+        return False
+    low, high = bounds[0], bounds[1] if len(bounds) > 1 else 120
+    return any(low <= int(n) <= high for n in re.findall(r"\d+", transcript))
+
+def classify(row, rules=USE_RULES):
+    """
+    (is_valid, reason) when the record can be decided without the LLM, else None.
+    Missing transcripts and VAD silence are always settled here; the heuristic
+    rules only when rules is True.
+    """
+    transcript = _text(row.get('transcript'))
+    # Recordings VAD found (near-)silent never reach the LLM
+    if transcript == vad.NO_SPEECH or not vad.has_speech(row):
+        return False, "No speech detected (VAD)"
+    if transcript.startswith(MISSING_MARKERS):
+        return False, "Transcript Missing"
+    if not rules:
+        return None
+
+    if not transcript or transcript.lower() == 'nan':
+        return False, "Rule: empty transcript"
+    words = len(transcript.split())
+    if words < MIN_WORDS:
+        return False, f"Rule: transcript too short ({words} words)"
+
+    q1_hit = q1_mentioned(transcript, row.get('Q1'))
+    caste_hit = caste_mentioned(transcript, row.get('Caste'))
+    age_hit = age_in_range(transcript, row.get('Age'))
+    # Any sign of a survey, even a bare question word, keeps a record away from INVALID
+    if words < SHORT_WORDS and not any(cue in transcript for cue in SURVEY_CUES) \
+            and not (q1_hit or caste_hit or age_hit):
+        return False, "Rule: no survey questions or reported answers in a short transcript"
+    # VALID only when every reported answer is actually found, never on question words alone
+    topic_cues = sum(1 for cue in TOPIC_CUES if cue in transcript)
+    if topic_cues >= MIN_CUES_FOR_VALID and q1_hit and caste_hit and age_hit:
+        return True, "Rule: survey questions asked; reported problem, caste and age found in the transcript"
+    return None
+
+# --- benchmark reporting ---
+
+INPUT_COST_PER_1M = getattr(config, 'VALIDATION_INPUT_COST_PER_1M', 2.50)   # USD, gpt-4o
+OUTPUT_COST_PER_1M = getattr(config, 'VALIDATION_OUTPUT_COST_PER_1M', 10.00)
+PROMPT_OVERHEAD_TOKENS = 400 # Instructions and reported data around each transcript
+
+def estimated_llm_cost(transcripts):
+    """USD for one single-record LLM validation per transcript."""
+    prompt_tokens = sum(llm_backend.estimate_tokens([{"content": str(t)}]) + PROMPT_OVERHEAD_TOKENS
+                        for t in transcripts)
+    output_tokens = len(transcripts) * llm_backend.OUTPUT_TOKEN_ALLOWANCE
+    return (prompt_tokens * INPUT_COST_PER_1M + output_tokens * OUTPUT_COST_PER_1M) / 1e6
+
+def print_tier_report(df, truth_column='gt_bool', prediction_column='llm_bool'):
+    """Accuracy and estimated cost per validation tier, for the benchmark_framework* scripts."""
+    tiers = df['validation_tier'].fillna('llm') if 'validation_tier' in df.columns else pd.Series('llm', index=df.index)
+    all_llm_cost = estimated_llm_cost(df['transcript'].tolist()) if 'transcript' in df.columns else None
+
+    print("\n--- Per-Tier Breakdown ---")
+    total_cost = 0.0
+    for tier in sorted(tiers.unique()):
+        part = df[tiers == tier]
+        accuracy = (part[truth_column] == part[prediction_column]).mean()
+        cost = 0.0 if tier == 'rule' or 'transcript' not in df.columns else estimated_llm_cost(part['transcript'].tolist())
+        total_cost += cost
+        print(f"{tier:>5}: {len(part):4d} records ({len(part) / len(df):.0%}) | Accuracy: {accuracy:.2f} | Est. cost: ${cost:.4f}")
+    if all_llm_cost:
+        print(f"Est. cost: ${total_cost:.4f} vs ${all_llm_cost:.4f} with every record sent to the LLM")
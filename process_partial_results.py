@@ -2,6 +2,8 @@ import os
 import pandas as pd
 import json
 import framework_config as config
+import audio_store
+import sarvam_orchestrator
 
 def process_partial_results():
     # 1. Load Master Metadata
@@ -19,15 +21,21 @@ def process_partial_results():
         print(f"Output directory {output_dir} does not exist.")
         return
 
+    # Outputs are named after the uploaded file, which may be a transcoded copy of the
+    # (possibly compacted) audio; the journal maps it back to the file queued for the row
+    journal = sarvam_orchestrator.JobJournal()
+    uploaded_as = {os.path.basename(entry.get('upload_path') or entry['path']): name
+                   for name, entry in journal.files.items()}
+
     # Map filename -> transcript
     filename_to_transcript = {}
     
-    # List all JSONs
-    json_files = [f for f in os.listdir(output_dir) if f.endswith('.json')]
+    # List all JSONs (the orchestrator downloads each job into its own subdirectory)
+    json_files = [os.path.join(root, f) for root, _, files in os.walk(output_dir) for f in files if f.endswith('.json')]
     print(f"Found {len(json_files)} JSON transcripts.")
 
-    for json_file in json_files:
-        path = os.path.join(output_dir, json_file)
+    for path in json_files:
+        json_file = os.path.basename(path)
         try:
             with open(path, 'r') as f:
                 data = json.load(f)
@@ -39,6 +47,7 @@ def process_partial_results():
             # Reconstruct original filename
             # If saved as "file.mp3.json", original is "file.mp3"
             original_filename = json_file.replace(".json", "")
+            original_filename = uploaded_as.get(original_filename, original_filename)
             
             if 'transcript' in data:
                  filename_to_transcript[original_filename] = data['transcript']
@@ -53,8 +62,9 @@ def process_partial_results():
     found_count = 0
     
     for index, row in df.iterrows():
-        filepath = row['file_path']
-        filename = os.path.basename(filepath)
+        # The same file the orchestrator queued for this row (compacted audio or blob)
+        filepath = audio_store.resolve_upload_audio(row)
+        filename = os.path.basename(str(filepath))
         
         # Check direct map
         transcript = filename_to_transcript.get(filename)
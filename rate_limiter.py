@@ -0,0 +1,168 @@
+import time
+import random
+import asyncio
+import threading
+
+# Token-bucket rate limiting for paid APIs, usable from threads and from asyncio.
+# Each bucket refills continuously at `per_minute / 60` units per second up to a
+# one-minute burst; a request only proceeds once every bucket can pay its cost.
+RETRY_BASE_SECONDS = 2.0
+RETRY_MAX_SECONDS = 60.0
+
+class TokenBucket:
+    def __init__(self, per_minute, burst=None):
+        self.rate = per_minute / 60.0
+        self.capacity = float(burst or per_minute)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, cost, now):
+        """Seconds until `cost` units are available (0 if they are now)."""
+        self._refill(now)
+        # A single request larger than the burst can still go once the bucket is full
+        cost = min(cost, self.capacity)
+        return 0.0 if self.tokens >= cost else (cost - self.tokens) / self.rate
+
+    def take(self, cost):
+        self.tokens -= min(cost, self.capacity)
+
+class RateLimiter:
+    """
+    Named token buckets (e.g. requests and audio seconds per minute) acquired together.
+    pause(seconds) blocks every caller, e.g. after a 429 with Retry-After.
+    """
+    def __init__(self, **per_minute):
+        self.buckets = {name: TokenBucket(limit) for name, limit in per_minute.items() if limit}
+        self.paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _try_acquire(self, costs):
+        """Takes the costs and returns 0, or returns how long to wait before trying again."""
+        with self._lock:
+            now = time.monotonic()
+            wait = max(self.paused_until - now, 0.0)
+            for name, bucket in self.buckets.items():
+                wait = max(wait, bucket.wait_time(costs.get(name, 0), now))
+            if wait > 0:
+                return wait
+            for name, bucket in self.buckets.items():
+                bucket.take(costs.get(name, 0))
+            return 0.0
+
+    def acquire(self, **costs):
+        """Blocking acquire, for worker threads."""
+        while True:
+            wait = self._try_acquire(costs)
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+    async def acquire_async(self, **costs):
+        """Non-blocking acquire, for coroutines."""
+        while True:
+            wait = self._try_acquire(costs)
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+    def pause(self, seconds):
+        with self._lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+class AdaptiveRateLimiter(RateLimiter):
+    """
+    RateLimiter that learns the real quota as it goes:
+      - x-ratelimit-limit-* headers set each bucket's ceiling, x-ratelimit-remaining-*
+        caps what we think is left (other processes share the same key)
+      - a 429 cuts every rate by DECREASE; each success recovers INCREASE toward the ceiling
+      - settle() corrects a bucket once the real cost (e.g. usage.total_tokens) is known
+    Buckets named 'requests' and 'tokens' map onto OpenAI's headers.
+    """
+    DECREASE = 0.7
+    INCREASE = 0.02
+    FLOOR = 0.1 # Never slow below this fraction of the ceiling
+
+    def __init__(self, **per_minute):
+        super().__init__(**per_minute)
+        self.ceilings = {name: bucket.rate for name, bucket in self.buckets.items()}
+
+    def observe_headers(self, headers):
+        if not headers:
+            return
+        with self._lock:
+            now = time.monotonic()
+            for name, bucket in self.buckets.items():
+                limit = headers.get(f"x-ratelimit-limit-{name}")
+                remaining = headers.get(f"x-ratelimit-remaining-{name}")
+                try:
+                    if limit:
+                        self.ceilings[name] = float(limit) / 60.0
+                        bucket.capacity = float(limit)
+                        bucket.rate = min(bucket.rate, self.ceilings[name])
+                    if remaining is not None:
+                        bucket._refill(now)
+                        bucket.tokens = min(bucket.tokens, float(remaining))
+                except ValueError:
+                    continue
+
+    def on_success(self):
+        with self._lock:
+            for name, bucket in self.buckets.items():
+                bucket.rate = min(bucket.rate * (1 + self.INCREASE), self.ceilings[name])
+
+    def on_rate_limited(self, retry_after=None):
+        with self._lock:
+            for name, bucket in self.buckets.items():
+                bucket.rate = max(bucket.rate * self.DECREASE, self.ceilings[name] * self.FLOOR)
+        if retry_after:
+            self.pause(retry_after)
+
+    def settle(self, name, estimated, actual):
+        """Charges (or refunds) the difference between the estimated and the actual cost."""
+        bucket = self.buckets.get(name)
+        if bucket is None or actual is None:
+            return
+        with self._lock:
+            tokens = bucket.tokens - (actual - min(estimated, bucket.capacity))
+            bucket.tokens = min(max(tokens, -bucket.capacity), bucket.capacity)
+
+_shared = {}
+_shared_lock = threading.Lock()
+
+def shared_limiter(name, **per_minute):
+    """One AdaptiveRateLimiter per name (e.g. API key + model) for the whole process."""
+    with _shared_lock:
+        if name not in _shared:
+            _shared[name] = AdaptiveRateLimiter(**per_minute)
+        return _shared[name]
+
+def retry_after_seconds(error):
+    """Server-requested delay from a Retry-After (or retry-after-ms) header on an API error, else None."""
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None) or {}
+    try:
+        if headers.get('retry-after-ms'):
+            return float(headers['retry-after-ms']) / 1000.0
+        if headers.get('retry-after'):
+            return float(headers['retry-after'])
+    except (TypeError, ValueError):
+        pass # HTTP-date form; fall back to our own backoff
+    return None
+
+def is_retryable(error):
+    """Rate limits, server errors and connection problems are worth retrying."""
+    status = getattr(error, 'status_code', None)
+    if status is None:
+        status = getattr(getattr(error, 'response', None), 'status_code', None)
+    if status is None:
+        return True # timeouts / connection errors
+    return status == 429 or status == 408 or status >= 500
+
+def backoff_seconds(attempt, retry_after=None):
+    """Full-jitter exponential backoff, never shorter than the server's Retry-After."""
+    delay = random.uniform(0, min(RETRY_BASE_SECONDS * (2 ** attempt), RETRY_MAX_SECONDS))
+    return max(delay, retry_after or 0.0)
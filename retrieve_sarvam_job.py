@@ -1,31 +1,43 @@
 import os
+import sys
 import json
-from sarvamai import SarvamAI
-import framework_config as config
+import sarvam_orchestrator
+import transcribe_sarvam_batch
 
-# JOB_ID = "20260217_dee27ec3-7864-4e6e-8ac0-0e6a34672fe2" # Old Job
-JOB_ID = "20260217_814cfd0c-608a-4112-abba-6cef09e2eec3" # Latest Job (Manual Upload)
+def latest_job_id():
+    """Most recently updated job in the orchestrator journal."""
+    journal = sarvam_orchestrator.JobJournal()
+    chunks = [c for c in journal.chunks if c['job_id']]
+    if not chunks:
+        return None
+    return max(chunks, key=lambda c: c['updated_at'])['job_id']
+
+def retrieve_job(job_id=None):
+    job_id = job_id or latest_job_id()
+    if not job_id:
+        print(f"No job ID given and none recorded in {sarvam_orchestrator.JOURNAL_PATH}")
+        return
 
-def retrieve_job():
     print("Initializing Sarvam AI Client...")
     try:
-        client = SarvamAI(api_subscription_key=config.SARVAM_API_KEY)
+        client = transcribe_sarvam_batch.make_client()
     except Exception as e:
         print(f"Error initializing Sarvam Client: {e}")
         return
 
-    print(f"Retrieving Job {JOB_ID}...")
+    print(f"Retrieving Job {job_id}...")
     try:
         # Get Job Status
-        # job = client.speech_to_text_job.get_job(job_id=JOB_ID)
+        # job = client.speech_to_text_job.get_job(job_id=job_id)
         # print("Job Status:", job.status) # Assuming field exists
         
         # Get Results
-        job = client.speech_to_text_job.get_job(job_id=JOB_ID)
+        job = client.speech_to_text_job.get_job(job_id=job_id)
         print("Job Status:", job.get_status())
         
-        # Download Outputs
-        output_dir = "/Users/aierarohit/Desktop/Political Data/sarvam_outputs"
+        # Download Outputs (one directory per job, as the orchestrator does)
+        output_dir = os.path.join(sarvam_orchestrator.OUTPUT_DIR, job_id)
+        os.makedirs(output_dir, exist_ok=True)
         job.download_outputs(output_dir=output_dir)
         print(f"Downloaded outputs to {output_dir}")
 
@@ -60,4 +72,5 @@ def retrieve_job():
         print(f"Error retrieving job: {e}")
 
 if __name__ == "__main__":
-    retrieve_job()
+    # Usage: python retrieve_sarvam_job.py [JOB_ID]  (default: latest job in the journal)
+    retrieve_job(sys.argv[1] if len(sys.argv) > 1 else None)
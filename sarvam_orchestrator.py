@@ -0,0 +1,386 @@
+import os
+import sys
+import json
+import time
+import random
+import threading
+import concurrent.futures
+import pandas as pd
+import framework_config as config
+import audio_store
+import transcript_cache
+import transcribe_sarvam_batch as sarvam
+import sarvam_upload
+import vad
+
+# Sarvam batch orchestrator: chunks are submitted concurrently and every job, chunk
+# and file state is recorded in an on-disk journal, so a crash or Ctrl-C resumes from
+# where it stopped instead of paying for the same audio again.
+# Finished jobs are downloaded and parsed as soon as they complete and the partial
+# CSV is rewritten, so validation can start while other chunks are still running.
+# Usage: python sarvam_orchestrator.py [--retry-failed] [--no-transcode]
+JOURNAL_PATH = os.path.join(config.AUDIO_DOWNLOAD_DIR, 'sarvam_journal.json')
+OUTPUT_DIR = os.path.join(config.AUDIO_DOWNLOAD_DIR, "sarvam_outputs_chunked")
+OUTPUT_CSV = os.path.join(config.AUDIO_DOWNLOAD_DIR, 'transcribed_metadata_sarvam.csv')
+PARTIAL_CSV = os.path.join(config.AUDIO_DOWNLOAD_DIR, 'transcribed_metadata_sarvam_partial.csv')
+SUBMIT_WORKERS = 4    # Chunks being created/uploaded/started at once
+TRANSCODE_WORKERS = os.cpu_count()
+POLL_WORKERS = 8      # Concurrent status checks / downloads
+
+# Per-job adaptive polling: first check soon after start, then back off
+# exponentially (with jitter) while the job keeps running
+POLL_MIN_SECONDS = 5
+POLL_MAX_SECONDS = 120
+POLL_BACKOFF = 1.5
+
+CACHE_ARGS = ('sarvam', 'saaras:v3', 'te-IN', {'mode': 'transcribe'})
+
+# Chunk lifecycle. A chunk with a job_id is never re-created; only failed chunks
+# are resubmitted, and only with --retry-failed.
+#   pending -> created -> uploaded -> started -> completed | failed
+SUBMITTED_STATES = ('started',)
+FINISHED_STATES = ('completed', 'failed')
+
+class JobJournal:
+    """
+    JSON journal of the batch run:
+      files:  filename -> {path, upload_path, chunk, state (queued|running|done|failed), transcript}
+      chunks: [{idx, files, state, job_id, error, updated_at}]
+    Every change is written straight to disk (atomically) under a lock.
+    """
+    def __init__(self, path=JOURNAL_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                self.data = json.load(f)
+        else:
+            self.data = {'files': {}, 'chunks': []}
+
+    def _save(self):
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.data, f, indent=1, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    @property
+    def chunks(self):
+        return self.data['chunks']
+
+    @property
+    def files(self):
+        return self.data['files']
+
+    def add_files(self, filepaths, chunk_size=sarvam.CHUNK_SIZE):
+        """Queues files the journal hasn't seen yet as new pending chunks."""
+        with self._lock:
+            new = [f for f in filepaths if os.path.basename(f) not in self.files]
+            for i in range(0, len(new), chunk_size):
+                idx = len(self.chunks)
+                names = [os.path.basename(f) for f in new[i:i + chunk_size]]
+                self.chunks.append({'idx': idx, 'files': names, 'state': 'pending',
+                                    'job_id': None, 'error': None, 'updated_at': time.time()})
+                for filepath, name in zip(new[i:i + chunk_size], names):
+                    self.files[name] = {'path': filepath, 'chunk': idx, 'state': 'queued', 'transcript': None}
+            self._save()
+            return len(new)
+
+    def update_chunk(self, idx, **fields):
+        with self._lock:
+            self.chunks[idx].update(fields, updated_at=time.time())
+            file_state = {'started': 'running', 'completed': 'done', 'failed': 'failed'}.get(fields.get('state'))
+            if file_state:
+                for name in self.chunks[idx]['files']:
+                    self.files[name]['state'] = file_state
+            self._save()
+
+    def set_upload_paths(self, upload_paths):
+        """filename -> the (possibly transcoded) file actually uploaded for it."""
+        with self._lock:
+            for name, upload_path in upload_paths.items():
+                self.files[name]['upload_path'] = upload_path
+            self._save()
+
+    def record_transcripts(self, transcripts):
+        """filename -> transcript for a finished chunk."""
+        with self._lock:
+            for name, transcript in transcripts.items():
+                if name in self.files:
+                    self.files[name]['transcript'] = transcript
+            self._save()
+
+    def retry_failed(self):
+        """Resets failed chunks so they are submitted as new jobs."""
+        with self._lock:
+            for chunk in self.chunks:
+                if chunk['state'] == 'failed':
+                    chunk.update(state='pending', job_id=None, error=None)
+                    for name in chunk['files']:
+                        self.files[name].update(state='queued', transcript=None)
+            self._save()
+
+def chunk_paths(journal, chunk):
+    return [journal.files[name]['path'] for name in chunk['files']]
+
+def chunk_upload_paths(journal, chunk):
+    return [journal.files[name].get('upload_path') or journal.files[name]['path'] for name in chunk['files']]
+
+def submit(client, journal, idx, transcode_pool=None):
+    """
+    Drives one chunk from wherever the journal left it up to 'started'. Files are
+    transcoded on transcode_pool (when given) and uploaded/verified before /start.
+    """
+    chunk = journal.chunks[idx]
+    try:
+        if chunk['state'] == 'pending':
+            job_id = sarvam.create_job(client).job_id
+            journal.update_chunk(idx, state='created', job_id=job_id)
+        if chunk['state'] == 'created':
+            # A job created before a crash is reused rather than paying for a new one
+            paths = chunk_paths(journal, chunk)
+            upload_paths = sarvam_upload.prepare_files(paths, transcode_pool) if transcode_pool else paths
+            journal.set_upload_paths(dict(zip(chunk['files'], upload_paths)))
+            sarvam_upload.upload_files(client, chunk['job_id'], upload_paths)
+            journal.update_chunk(idx, state='uploaded')
+        if chunk['state'] == 'uploaded':
+            sarvam.start_job(chunk['job_id'], chunk_upload_paths(journal, chunk))
+            journal.update_chunk(idx, state='started')
+    except Exception as e:
+        # Left in its current state (with any job_id) and retried on the next run
+        print(f"  Chunk {idx} stopped at '{chunk['state']}': {e}")
+        journal.update_chunk(idx, error=str(e))
+
+def download_outputs(client, job_id, status):
+    """Uploaded filename -> transcript for a completed job."""
+    # One directory per job: jobs finishing together may use the same output names
+    output_dir = os.path.join(OUTPUT_DIR, job_id)
+    os.makedirs(output_dir, exist_ok=True)
+    sarvam.get_job(client, job_id).download_outputs(output_dir)
+    return sarvam.parse_job_outputs(status, output_dir)
+
+def wait_for_job(client, job_id):
+    """Polls one job on the adaptive schedule until it finishes. Returns the final status."""
+    job = sarvam.get_job(client, job_id)
+    interval = POLL_MIN_SECONDS
+    while True:
+        time.sleep(interval * random.uniform(0.8, 1.2))
+        status = job.get_status()
+        if status.job_state.lower() in FINISHED_STATES:
+            return status
+        interval = min(interval * POLL_BACKOFF, POLL_MAX_SECONDS)
+
+def run_chunk(client, filepaths, transcode=True):
+    """
+    One job outside the journal, for callers that do their own batching and
+    resuming (asr_engine.SarvamBatchEngine): transcode, verified upload, start,
+    adaptive polling, per-job download. Returns a transcript per file; raises if the job fails.
+    """
+    job_id = sarvam.create_job(client).job_id
+    upload_paths = [sarvam_upload.transcode_for_upload(f) for f in filepaths] if transcode else list(filepaths)
+    sarvam_upload.upload_files(client, job_id, upload_paths)
+    sarvam.start_job(job_id, upload_paths)
+    status = wait_for_job(client, job_id)
+    if status.job_state.lower() == 'failed':
+        raise Exception(f"Job {job_id} failed: {status.error_message}")
+    transcripts = download_outputs(client, job_id, status)
+    return [transcripts.get(os.path.basename(path), "TRANSCRIPT_NOT_FOUND") for path in upload_paths]
+
+def finish_chunk(client, journal, cache, idx, status):
+    """Downloads and parses a finished job's outputs into the journal and cache."""
+    chunk = journal.chunks[idx]
+    state = status.job_state.lower()
+    if state == 'failed':
+        print(f"  Job {chunk['job_id']} FAILED. Error: {status.error_message}")
+        journal.update_chunk(idx, state='failed', error=str(status.error_message))
+        return
+
+    # Outputs are named after the uploaded file, which may be a transcoded copy
+    uploaded_as = {os.path.basename(path): name for name, path in zip(chunk['files'], chunk_upload_paths(journal, chunk))}
+    transcripts = {uploaded_as.get(fname, fname): text
+                   for fname, text in download_outputs(client, chunk['job_id'], status).items()}
+    journal.record_transcripts(transcripts)
+    for name, transcript in transcripts.items():
+        if name in journal.files:
+            path = journal.files[name]['path']
+            if os.path.exists(path):
+                cache.put(cache.audio_hash(path), *CACHE_ARGS, transcript)
+    journal.update_chunk(idx, state='completed')
+    print(f"  Job {chunk['job_id']} completed ({len(transcripts)} transcripts)")
+
+def check_job(client, journal, cache, idx, job):
+    """Worker: one status check, finishing the chunk if it's done. Returns the job state."""
+    status = job.get_status()
+    state = status.job_state.lower()
+    if state in FINISHED_STATES:
+        finish_chunk(client, journal, cache, idx, status)
+    return state
+
+def run_jobs(client, journal, cache, workers=SUBMIT_WORKERS, on_finished=None, transcode=True):
+    """
+    Submits outstanding chunks and polls started jobs at the same time. Each job has
+    its own poll schedule; status checks run concurrently, and a finished job is
+    downloaded and parsed right away, then on_finished() is called.
+    """
+    todo = [c['idx'] for c in journal.chunks if c['state'] in ('pending', 'created', 'uploaded')]
+    transcode_pool = concurrent.futures.ProcessPoolExecutor(max_workers=TRANSCODE_WORKERS) if transcode and todo else None
+    submit_pool = concurrent.futures.ThreadPoolExecutor(max_workers=workers)
+    poll_pool = concurrent.futures.ThreadPoolExecutor(max_workers=POLL_WORKERS)
+    submitting = [submit_pool.submit(submit, client, journal, idx, transcode_pool) for idx in todo]
+    if todo:
+        print(f"--- SUBMISSION: {len(todo)} chunks, {workers} at a time ---")
+
+    tracked = {} # chunk idx -> {'job', 'interval', 'next_poll'}
+    checking = {} # future -> chunk idx
+
+    try:
+        while True:
+            now = time.monotonic()
+            # Pick up jobs as they are started (this run or a previous one)
+            for chunk in journal.chunks:
+                if chunk['state'] in SUBMITTED_STATES and chunk['idx'] not in tracked:
+                    # One SDK job object per job, reused for every status check
+                    tracked[chunk['idx']] = {'job': sarvam.get_job(client, chunk['job_id']),
+                                             'interval': POLL_MIN_SECONDS,
+                                             'next_poll': now + POLL_MIN_SECONDS}
+            still_submitting = any(not f.done() for f in submitting)
+            if not tracked and not still_submitting:
+                break
+
+            busy = set(checking.values())
+            for idx, entry in tracked.items():
+                if idx not in busy and entry['next_poll'] <= now:
+                    checking[poll_pool.submit(check_job, client, journal, cache, idx, entry['job'])] = idx
+
+            next_due = min((e['next_poll'] for i, e in tracked.items() if i not in checking.values()),
+                           default=now + POLL_MIN_SECONDS)
+            timeout = max(min(next_due - now, 1.0 if still_submitting else POLL_MAX_SECONDS), 0.1)
+            if checking:
+                done, _ = concurrent.futures.wait(checking, timeout=timeout,
+                                                  return_when=concurrent.futures.FIRST_COMPLETED)
+            else:
+                done = set()
+                time.sleep(timeout)
+            for future in done:
+                idx = checking.pop(future)
+                entry = tracked[idx]
+                try:
+                    state = future.result()
+                except Exception as e:
+                    print(f"Error polling job {entry['job'].job_id}: {e}")
+                    state = None
+                if state in FINISHED_STATES:
+                    del tracked[idx]
+                    if on_finished:
+                        on_finished()
+                    print(f"Status: {len(tracked)} jobs running, "
+                          f"{sum(c['state'] == 'completed' for c in journal.chunks)}/{len(journal.chunks)} chunks completed")
+                    continue
+                entry['interval'] = min(entry['interval'] * POLL_BACKOFF, POLL_MAX_SECONDS)
+                entry['next_poll'] = time.monotonic() + entry['interval'] * random.uniform(0.8, 1.2)
+    except KeyboardInterrupt:
+        # Let in-progress stages land in the journal, but start nothing new
+        submit_pool.shutdown(wait=True, cancel_futures=True)
+        poll_pool.shutdown(wait=True, cancel_futures=True)
+        if transcode_pool:
+            transcode_pool.shutdown(cancel_futures=True)
+        raise
+    submit_pool.shutdown()
+    poll_pool.shutdown()
+    if transcode_pool:
+        transcode_pool.shutdown()
+
+def collect_files(df, journal, cache):
+    """
+    Picks the distinct upload files for the metadata. Returns (row_files, no_speech_rows,
+    cached) where cached maps filename -> transcript served from the transcript cache.
+    """
+    row_files = {}        # row index -> uploaded filename (blobs are content-named, so rows share uploads)
+    no_speech_rows = set()
+    cached = {}
+    to_process = []
+
+    for index, row in df.iterrows():
+        filepath = audio_store.resolve_upload_audio(row)
+        filename = os.path.basename(filepath)
+        if not vad.has_speech(row):
+            no_speech_rows.add(index)
+            continue
+        if not os.path.exists(filepath):
+            print(f"File missing: {filepath}")
+            continue
+        row_files[index] = filename
+        if filename in cached or filename in journal.files or filepath in to_process:
+            continue
+        transcript = cache.get(cache.audio_hash(filepath, row), *CACHE_ARGS)
+        if transcript is not None:
+            cached[filename] = transcript
+        else:
+            to_process.append(filepath)
+
+    added = journal.add_files(to_process)
+    print(f"{len(cached)} files cached, {added} newly queued, "
+          f"{len(journal.files)} tracked in {journal.path}")
+    if no_speech_rows:
+        print(f"Skipping {len(no_speech_rows)} recordings with no detected speech.")
+    return row_files, no_speech_rows, cached
+
+def write_output(df, journal, row_files, no_speech_rows, cached, output_csv, missing="TRANSCRIPT_NOT_FOUND"):
+    """Joins transcripts onto the metadata. Files without one (yet) read `missing`."""
+    transcripts = []
+    success_count = 0
+    for index, row in df.iterrows():
+        filename = row_files.get(index)
+        if index in no_speech_rows:
+            transcript = vad.NO_SPEECH
+        elif filename in cached:
+            transcript = cached[filename]
+        else:
+            entry = journal.files.get(filename) or {}
+            transcript = entry.get('transcript') or missing
+        transcripts.append(transcript)
+        if transcript and transcript != missing and "ERROR" not in transcript:
+            success_count += 1
+
+    df['transcript'] = transcripts
+    df.to_csv(output_csv, index=False)
+    print(f"Saved {len(df)} records ({success_count} successful) to {output_csv}")
+
+def run(retry_failed=False, workers=SUBMIT_WORKERS, transcode=True):
+    metadata_path = os.path.join(config.AUDIO_DOWNLOAD_DIR, 'downloaded_metadata.csv')
+    if not os.path.exists(metadata_path):
+        print("Metadata file not found. Run downloader first.")
+        return
+
+    print("Initializing Sarvam AI Client...")
+    try:
+        client = sarvam.make_client()
+    except Exception as e:
+        print(f"Error initializing Sarvam Client: {e}")
+        return
+
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    df = pd.read_csv(metadata_path)
+    journal = JobJournal()
+    cache = transcript_cache.TranscriptCache()
+    if retry_failed:
+        journal.retry_failed()
+
+    row_files, no_speech_rows, cached = collect_files(df, journal, cache)
+
+    def write_partial():
+        # Unfinished rows read PENDING, which validate_partial_sarvam skips
+        write_output(df.copy(), journal, row_files, no_speech_rows, cached, PARTIAL_CSV, missing="PENDING")
+
+    write_partial()
+    try:
+        run_jobs(client, journal, cache, workers, on_finished=write_partial, transcode=transcode)
+    except KeyboardInterrupt:
+        print(f"\nInterrupted. Progress is saved in {journal.path}; rerun to resume.")
+        return
+
+    write_output(df, journal, row_files, no_speech_rows, cached, OUTPUT_CSV)
+    states = pd.Series([c['state'] for c in journal.chunks]).value_counts().to_dict()
+    print(f"Chunk states: {states}")
+
+if __name__ == "__main__":
+    run(retry_failed='--retry-failed' in sys.argv, transcode='--no-transcode' not in sys.argv)
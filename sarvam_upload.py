@@ -0,0 +1,101 @@
+import os
+import time
+import base64
+import hashlib
+import threading
+import concurrent.futures
+import requests
+import framework_config as config
+import audio_decode
+import rate_limiter
+
+# Upload stage for Sarvam batch jobs:
+#   1. transcode each file to small 16kHz mono audio (worker processes, shared decoder)
+#   2. PUT every file to its signed URL through a bounded pool
+#   3. verify each upload (status + server-checked Content-MD5) before the job is started
+UPLOAD_DIR = os.path.join(config.AUDIO_DOWNLOAD_DIR, 'sarvam_uploads')
+UPLOAD_CODEC = ('libmp3lame', 'mp3', 32000) # codec, container, bit rate: speech-grade 16kHz mono MP3
+UPLOAD_WORKERS = 8    # Concurrent PUTs across all chunks
+UPLOAD_RETRIES = 3
+
+_upload_slots = threading.BoundedSemaphore(UPLOAD_WORKERS)
+
+def upload_path(filepath):
+    """Transcoded copy of filepath in UPLOAD_DIR (same stem, so names stay unique)."""
+    name_part, _ = os.path.splitext(os.path.basename(filepath))
+    return os.path.join(UPLOAD_DIR, f"{name_part}.{UPLOAD_CODEC[1]}")
+
+def transcode_for_upload(filepath):
+    """
+    Returns the path to upload for filepath: the transcoded copy if it is smaller
+    than the original, else the original. Reuses an existing transcode.
+    """
+    out_path = upload_path(filepath)
+    if not os.path.exists(out_path) or os.path.getmtime(out_path) < os.path.getmtime(filepath):
+        os.makedirs(UPLOAD_DIR, exist_ok=True)
+        codec, container_format, bit_rate = UPLOAD_CODEC
+        tmp_path = out_path + '.part'
+        try:
+            audio_decode.transcode(filepath, tmp_path, codec=codec, container_format=container_format, bit_rate=bit_rate)
+            os.replace(tmp_path, out_path)
+        except Exception as e:
+            print(f"Transcode Error for {filepath}, uploading original: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return filepath
+    return out_path if os.path.getsize(out_path) < os.path.getsize(filepath) else filepath
+
+def prepare_files(filepaths, pool=None):
+    """Upload paths for filepaths, transcoded on pool (a ProcessPoolExecutor) if given."""
+    if pool is None:
+        return [transcode_for_upload(f) for f in filepaths]
+    return list(pool.map(transcode_for_upload, filepaths))
+
+def _content_md5(filepath):
+    md5 = hashlib.md5()
+    with open(filepath, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            md5.update(block)
+    return base64.b64encode(md5.digest()).decode()
+
+def put_file(url, filepath):
+    """PUTs one file to an Azure signed URL and verifies it landed intact. Raises on failure."""
+    content_md5 = _content_md5(filepath)
+    headers = {"x-ms-blob-type": "BlockBlob", "Content-MD5": content_md5}
+    for attempt in range(UPLOAD_RETRIES + 1):
+        try:
+            with _upload_slots, open(filepath, 'rb') as f:
+                res = requests.put(url, data=f, headers=headers, timeout=300)
+            if res.status_code in (200, 201):
+                # Azure rejects a body that doesn't match Content-MD5 and echoes it back on success
+                echoed = res.headers.get('Content-MD5')
+                if echoed and echoed != content_md5:
+                    raise Exception(f"MD5 mismatch after upload ({echoed} != {content_md5})")
+                return
+            error = Exception(f"{res.status_code} - {res.text[:200]}")
+            error.status_code = res.status_code
+            error.response = res
+        except requests.RequestException as e:
+            error = e
+        if attempt == UPLOAD_RETRIES or not rate_limiter.is_retryable(error):
+            raise Exception(f"Upload failed for {os.path.basename(filepath)}: {error}")
+        time.sleep(rate_limiter.backoff_seconds(attempt, rate_limiter.retry_after_seconds(error)))
+
+def upload_files(client, job_id, filepaths):
+    """Uploads filepaths into a created job. Returns once every file is verified; raises otherwise."""
+    names = [os.path.basename(f) for f in filepaths]
+    links = client.speech_to_text_job.get_upload_links(job_id=job_id, files=names)
+    urls = {name: details.file_url for name, details in links.upload_urls.items()}
+    missing = [n for n in names if n not in urls]
+    if missing:
+        raise Exception(f"No upload link for {missing}")
+
+    started = time.time()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=UPLOAD_WORKERS) as executor:
+        futures = [executor.submit(put_file, urls[name], path) for name, path in zip(names, filepaths)]
+        errors = [f.exception() for f in futures if f.exception()]
+    if errors:
+        raise Exception(f"{len(errors)}/{len(names)} uploads failed: {errors[0]}")
+
+    size_mb = sum(os.path.getsize(f) for f in filepaths) / 1e6
+    print(f"  Uploaded {len(names)} files ({size_mb:.1f} MB) to {job_id} in {time.time() - started:.1f}s")
@@ -0,0 +1,73 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+sf = pytest.importorskip('soundfile')
+pytest.importorskip('av')
+
+import audio_decode
+from audio_decode import SAMPLE_RATE, load_audio, iter_audio_windows
+
+def write_ramp(path, seconds, sr=SAMPLE_RATE):
+    """A ramp, so every sample's value gives away its position."""
+    audio = np.linspace(-0.9, 0.9, int(seconds * sr), dtype=np.float32)
+    sf.write(str(path), audio, sr, subtype='FLOAT')
+    return str(path), audio
+
+def test_load_audio_decodes_the_whole_file(tmp_path):
+    path, ramp = write_ramp(tmp_path / 'call.wav', 3.5)
+    audio, sr = load_audio(path)
+    assert sr == SAMPLE_RATE and audio.dtype == np.float32
+    np.testing.assert_allclose(audio, ramp, atol=1e-4)
+
+def test_load_audio_grows_the_buffer_when_the_header_under_reports(tmp_path, monkeypatch):
+    path, ramp = write_ramp(tmp_path / 'call.wav', 7.25)
+    # Capacity is then a single second of slack, so the buffer must grow several times
+    monkeypatch.setattr(audio_decode, '_duration_seconds', lambda container: 0.0)
+    audio, _ = load_audio(path)
+    assert len(audio) == len(ramp)
+    np.testing.assert_allclose(audio, ramp, atol=1e-4)
+
+def test_load_audio_resamples_to_16k(tmp_path):
+    path, _ = write_ramp(tmp_path / 'call.wav', 2.0, sr=8000)
+    audio, sr = load_audio(path)
+    assert sr == SAMPLE_RATE
+    assert len(audio) == pytest.approx(2 * SAMPLE_RATE, abs=SAMPLE_RATE // 100)
+
+def test_load_audio_failure_returns_none(tmp_path):
+    bad = tmp_path / 'broken.mp3'
+    bad.write_bytes(b'not audio at all')
+    assert load_audio(str(bad)) == (None, None)
+    assert load_audio(str(tmp_path / 'missing.wav')) == (None, None)
+
+@pytest.mark.parametrize('seconds', [1.0, 2.5, 4.0])
+def test_windows_without_hop_tile_the_file(tmp_path, seconds):
+    path, ramp = write_ramp(tmp_path / 'call.wav', seconds)
+    windows = list(iter_audio_windows(path, window_seconds=1.0))
+    # Only the last window may be short, and an exact multiple leaves no empty tail
+    assert all(len(w) == SAMPLE_RATE for w in windows[:-1])
+    assert 0 < len(windows[-1]) <= SAMPLE_RATE
+    assert len(windows) == int(np.ceil(seconds))
+    np.testing.assert_allclose(np.concatenate(windows), ramp, atol=1e-4)
+
+def test_overlapping_windows_repeat_the_overlap(tmp_path):
+    path, ramp = write_ramp(tmp_path / 'call.wav', 3.3)
+    window, hop = SAMPLE_RATE, SAMPLE_RATE // 4
+    windows = list(iter_audio_windows(path, window_seconds=1.0, hop_seconds=0.25))
+    for n, w in enumerate(windows[:-1]):
+        assert len(w) == window
+        np.testing.assert_allclose(w, ramp[n * hop:n * hop + window], atol=1e-4)
+    # The tail window holds the overlap plus whatever arrived after the last full window
+    last = len(windows) - 1
+    np.testing.assert_allclose(windows[-1], ramp[last * hop:], atol=1e-4)
+    assert len(windows[-1]) < window
+
+def test_overlapping_windows_emit_no_tail_without_fresh_samples(tmp_path):
+    # 2.0 s with 1 s windows every 0.5 s: the last full window ends exactly at the end
+    path, _ = write_ramp(tmp_path / 'call.wav', 2.0)
+    windows = list(iter_audio_windows(path, window_seconds=1.0, hop_seconds=0.5))
+    assert [len(w) for w in windows] == [SAMPLE_RATE] * 3
+
+def test_windows_are_independent_copies(tmp_path):
+    path, ramp = write_ramp(tmp_path / 'call.wav', 2.5)
+    windows = list(iter_audio_windows(path, window_seconds=1.0, hop_seconds=0.5))
+    np.testing.assert_allclose(windows[0], ramp[:SAMPLE_RATE], atol=1e-4)
@@ -0,0 +1,94 @@
+import os
+import urllib.request
+import pytest
+
+pytest.importorskip('pandas')
+pytest.importorskip('requests')
+
+import framework_config
+import audio_store
+import audio_downloader
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(audio_store, 'STORE_DIR', str(tmp_path / 'blobs'))
+    monkeypatch.setattr(audio_store, 'INCOMING_DIR', str(tmp_path / 'blobs' / 'incoming'))
+    monkeypatch.setattr(audio_store, 'INDEX_PATH', str(tmp_path / 'audio_index.csv'))
+    return tmp_path
+
+def make_file(path, data):
+    path.write_bytes(data)
+    return str(path)
+
+def test_put_file_dedups_identical_bytes(store):
+    first = audio_store.put_file(make_file(store / 'a.mp3', b'same audio'))
+    second = audio_store.put_file(make_file(store / 'b.mp3', b'same audio'))
+    assert first == second
+    assert audio_store.has_blob(first, size=len(b'same audio'))
+    assert not os.path.exists(store / 'a.mp3') and not os.path.exists(store / 'b.mp3')
+
+def test_lookup_prefers_url_then_sample_id(store):
+    sha = audio_store.put_file(make_file(store / 'a.mp3', b'audio one'))
+    audio_store.record('s1', 'http://host/one.mp3', sha)
+    index = audio_store.load_index()
+    assert audio_store.lookup(index, url='http://host/one.mp3')['sha256'] == sha
+    assert audio_store.lookup(index, sample_id='s1')['sha256'] == sha
+    assert audio_store.lookup(index, sample_id='s1', url='http://host/one.mp3')['sha256'] == sha
+    assert audio_store.lookup(index, sample_id='s2', url='http://host/two.mp3') is None
+
+def test_lookup_ignores_sample_id_when_the_url_changed(store):
+    sha = audio_store.put_file(make_file(store / 'a.mp3', b'old recording'))
+    audio_store.record('s1', 'http://host/old.mp3', sha)
+    index = audio_store.load_index()
+    # The sample was re-recorded: its stored audio is stale
+    assert audio_store.lookup(index, sample_id='s1', url='http://host/new.mp3') is None
+
+def test_lookup_skips_missing_or_truncated_blobs(store):
+    sha = audio_store.put_file(make_file(store / 'a.mp3', b'complete audio'))
+    audio_store.record('s1', 'http://host/one.mp3', sha)
+    with open(audio_store.blob_path(sha), 'wb') as f:
+        f.write(b'trunc')
+    assert audio_store.lookup(audio_store.load_index(), url='http://host/one.mp3') is None
+
+def test_ingest_files_moves_legacy_downloads_into_the_store(store):
+    entries = [(make_file(store / 'Valid_s1.mp3', b'legacy one'), 's1', 'http://host/one.mp3'),
+               (str(store / 'Valid_missing.mp3'), 's2', 'http://host/two.mp3')]
+    assert audio_store.ingest_files(entries) == 1
+    assert not os.path.exists(store / 'Valid_s1.mp3')
+    entry = audio_store.lookup(audio_store.load_index(), sample_id='s1', url='http://host/one.mp3')
+    assert entry is not None and audio_store.has_blob(entry['sha256'])
+    # Once moved, a rerun has nothing left to ingest
+    assert audio_store.ingest_files(entries) == 0
+
+def test_legacy_downloads_prefers_the_old_metadata_url(store, monkeypatch):
+    monkeypatch.setattr(framework_config, 'AUDIO_DOWNLOAD_DIR', str(store))
+    old_path = make_file(store / 'Valid_s1.mp3', b'legacy one')
+    make_file(store / 'Not Valid_s2.mp3', b'legacy two')
+    (store / 'downloaded_metadata.csv').write_text(f"file_path,url\n{old_path},http://host/fetched.mp3\n")
+    records = [{'Sample ID': 's1', 'Valid or Not': 'Valid', 'Audio URL': 'http://host/current.mp3'},
+               {'Sample ID': 's2', 'Valid or Not': 'Not Valid', 'Audio URL': 'http://host/two.mp3'},
+               {'Sample ID': 's3', 'Valid or Not': 'Valid', 'Audio URL': 'http://host/three.mp3'}]
+    assert audio_downloader.legacy_downloads(records) == [
+        (old_path, 's1', 'http://host/fetched.mp3'),
+        (str(store / 'Not Valid_s2.mp3'), 's2', 'http://host/two.mp3')]
+
+def test_download_file_against_mock_storage(store, mock_server):
+    data = os.urandom(200000)
+    url = f"{mock_server}/blob/recordings/call.mp3"
+    urllib.request.urlopen(urllib.request.Request(
+        url, data=data, method='PUT', headers={'x-ms-blob-type': 'BlockBlob'}), timeout=10).close()
+    target = str(store / 'call.mp3')
+    # A stale partial file: the mock ignores Range, so the download starts over
+    make_file(store / 'call.mp3.part', b'stale bytes')
+    audio_downloader.download_file(audio_downloader.make_session(2), url, target)
+    with open(target, 'rb') as f:
+        assert f.read() == data
+    assert not os.path.exists(target + '.part')
+
+def test_resolve_upload_audio_falls_back_when_compact_is_larger(store):
+    original = make_file(store / 'call.mp3', b'x' * 100)
+    small = make_file(store / 'call_compact_small.mp3', b'x' * 40)
+    large = make_file(store / 'call_compact_large.wav', b'x' * 400)
+    assert audio_store.resolve_upload_audio({'file_path': original, 'compact_file_path': small}) == small
+    assert audio_store.resolve_upload_audio({'file_path': original, 'compact_file_path': large}) == original
+    assert audio_store.resolve_upload_audio({'file_path': original, 'compact_file_path': float('nan')}) == original
@@ -0,0 +1,79 @@
+import os
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('pandas')
+sf = pytest.importorskip('soundfile')
+pytest.importorskip('av')
+
+import audio_decode
+import audio_store
+import compact_audio
+from compact_audio import (JOIN_SECONDS, PAD_SECONDS, padded_segments, build_time_map, to_original_time,
+                           compact_file)
+
+SEGMENTS = [[2.0, 5.0], [10.0, 12.5], [30.0, 31.0]]  # Padded speech in a 40 s recording
+
+def test_padded_segments_pads_merges_and_clamps():
+    segments = [(0.1, 1.0), (1.3, 2.0), (5.0, 6.0), (9.9, 10.0)]
+    assert padded_segments(segments, duration=10.0) == [
+        [0.0, 2.0 + PAD_SECONDS], [5.0 - PAD_SECONDS, 6.0 + PAD_SECONDS], [9.9 - PAD_SECONDS, 10.0]]
+
+def test_build_time_map_joins_segments_with_gaps():
+    time_map = build_time_map(SEGMENTS)
+    assert [(e['compact_start'], e['compact_end']) for e in time_map] == [
+        (0.0, 3.0), (3.0 + JOIN_SECONDS, 5.5 + JOIN_SECONDS), (5.5 + 2 * JOIN_SECONDS, 6.5 + 2 * JOIN_SECONDS)]
+    assert [(e['original_start'], e['original_end']) for e in time_map] == [tuple(s) for s in SEGMENTS]
+
+@pytest.mark.parametrize('original', [2.0, 3.7, 5.0, 10.0, 11.25, 12.5, 30.0, 30.5])
+def test_to_original_time_inverts_compaction(original):
+    time_map = build_time_map(SEGMENTS)
+    entry = next(e for e in time_map if e['original_start'] <= original <= e['original_end'])
+    compact = entry['compact_start'] + (original - entry['original_start'])
+    assert to_original_time(time_map, compact) == pytest.approx(original)
+
+def test_to_original_time_in_a_join_gap_snaps_to_next_segment():
+    time_map = build_time_map(SEGMENTS)
+    assert to_original_time(time_map, 3.0 + JOIN_SECONDS / 2) == pytest.approx(10.0)
+
+def test_to_original_time_outside_the_map():
+    time_map = build_time_map(SEGMENTS)
+    assert to_original_time(time_map, 100.0) == 31.0
+    assert to_original_time(time_map, -1.0) == 2.0
+    assert to_original_time([], 4.2) == 4.2
+
+def test_compacted_audio_lines_up_with_the_time_map(tmp_path):
+    sr = audio_decode.SAMPLE_RATE
+    # A ramp, so every sample's value gives away where in the original it came from
+    original = np.linspace(-0.9, 0.9, 40 * sr, dtype=np.float32)
+    src, out = str(tmp_path / 'call.wav'), str(tmp_path / 'call_compact.wav')
+    sf.write(src, original, sr, subtype='FLOAT')
+    # The last segment straddles the 30 s decode window boundary
+    segments = [[2.0, 5.0], [10.0, 12.5], [28.0, 32.0]]
+    compact_file(src, segments, out)
+
+    compact, out_sr = sf.read(out, dtype='float32')
+    time_map = build_time_map(segments)
+    assert out_sr == sr
+    assert len(compact) / sr == pytest.approx(time_map[-1]['compact_end'], abs=1.0 / sr)
+    for c in (0.5, 2.9, 3.0 + JOIN_SECONDS + 1.0, time_map[-1]['compact_start'] + 1.9, time_map[-1]['compact_end'] - 0.01):
+        expected = original[int(round(to_original_time(time_map, c) * sr))]
+        assert compact[int(round(c * sr))] == pytest.approx(expected, abs=1e-4)
+
+def test_compacted_mp3_is_smaller_than_the_original_and_kept_out_of_the_store(tmp_path, monkeypatch):
+    monkeypatch.setattr(compact_audio, 'COMPACT_DIR', str(tmp_path / 'compact'))
+    sr = audio_decode.SAMPLE_RATE
+    t = np.arange(40 * sr) / sr
+    src = str(tmp_path / 'blobs' / 'ab' / 'abc.wav')
+    os.makedirs(os.path.dirname(src))
+    sf.write(src, (0.3 * np.sin(2 * np.pi * 220 * t)).astype(np.float32), sr, subtype='PCM_16')
+
+    out_path, map_path = compact_audio.compact_paths(src)
+    assert os.path.dirname(out_path) == str(tmp_path / 'compact') and out_path.endswith('abc_compact.mp3')
+    compact_file(src, SEGMENTS, out_path)
+    assert os.path.getsize(out_path) < os.path.getsize(src) / 4
+    assert not os.path.exists(out_path + '.part.wav')
+    compact_seconds = build_time_map(SEGMENTS)[-1]['compact_end']
+    assert audio_decode.probe_duration(out_path) == pytest.approx(compact_seconds, abs=0.2)
+    row = {'file_path': src, 'compact_file_path': out_path}
+    assert audio_store.resolve_upload_audio(row) == out_path
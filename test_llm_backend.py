@@ -0,0 +1,58 @@
+import json
+import urllib.request
+import pytest
+
+pytest.importorskip('openai')
+
+import framework_config
+import llm_backend
+import rate_limiter
+
+def prompt(n):
+    return [{'role': 'user', 'content': f'Sample ID: {n}\nReply {{"is_valid": bool, "reason": str}}'}]
+
+def mock_stats(base_url):
+    with urllib.request.urlopen(f"{base_url}/mock/stats", timeout=10) as response:
+        return json.load(response)
+
+@pytest.fixture
+def backend(mock_server, monkeypatch):
+    """Uncached backend on the mock with its own limiter and near-zero backoff."""
+    monkeypatch.setattr(framework_config, 'OPENAI_BASE_URL', f"{mock_server}/v1", raising=False)
+    monkeypatch.setattr(rate_limiter, 'RETRY_BASE_SECONDS', 0.01)
+    limiter = rate_limiter.AdaptiveRateLimiter(requests=6000, tokens=1000000)
+    return llm_backend.OpenAIChatBackend(limiter=limiter, cache=False)
+
+def test_estimate_tokens_counts_utf8_bytes():
+    english, telugu = 'a' * 400, 'స' * 400
+    assert llm_backend.estimate_tokens([{'content': english}]) == 100 + 4
+    assert llm_backend.estimate_tokens([{'content': telugu}]) == 300 + 4
+
+@pytest.mark.parametrize('mock_server', [{'rate_429': 0.4, 'retry_after': 0.01, 'seed': 1}], indirect=True)
+def test_retries_through_rate_limits(backend, mock_server):
+    replies = [backend.complete(prompt(n), response_format={'type': 'json_object'}) for n in range(10)]
+    assert all('is_valid' in json.loads(reply) for reply in replies)
+    stats = mock_stats(mock_server)
+    assert stats['openai 429'] > 0
+    assert stats['openai requests'] == 10 + stats['openai 429']
+
+@pytest.mark.parametrize('mock_server', [{'rate_429': 1.0, 'retry_after': 0.01}], indirect=True)
+def test_gives_up_after_max_retries(backend, mock_server, monkeypatch):
+    monkeypatch.setattr(llm_backend, 'MAX_RETRIES', 2)
+    with pytest.raises(Exception):
+        backend.complete(prompt(0))
+    assert mock_stats(mock_server)['openai requests'] == 3
+    # Every 429 slowed the limiter down
+    requests = backend.limiter.buckets['requests']
+    assert requests.rate < backend.limiter.ceilings['requests']
+
+@pytest.mark.parametrize('mock_server', [{'tpm': 60000}], indirect=True)
+def test_learns_quota_and_settles_real_usage(backend):
+    backend.complete(prompt(0), max_tokens=500)
+    tokens = backend.limiter.buckets['tokens']
+    # Ceiling comes from the mock's x-ratelimit-limit-tokens header
+    assert tokens.capacity == 60000
+    assert backend.limiter.ceilings['tokens'] == pytest.approx(1000.0)
+    # The 500-token reply allowance was refunded once the real usage was known
+    estimated = llm_backend.estimate_tokens(prompt(0)) + 500
+    assert tokens.tokens > 60000 - estimated + 400
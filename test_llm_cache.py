@@ -0,0 +1,133 @@
+import json
+import threading
+import urllib.request
+import pytest
+import framework_config
+import llm_cache
+from llm_cache import fingerprint, LLMCache
+
+MESSAGES = [{'role': 'system', 'content': 'You are a precise data validator.'},
+            {'role': 'user', 'content': 'Sample ID: 1\nTranscript: సమస్య రోడ్లు\nReply {"is_valid": bool, "reason": str}'}]
+JSON_FORMAT = {'type': 'json_object'}
+
+def test_fingerprint_is_stable_and_order_independent():
+    key = fingerprint('gpt-4o', MESSAGES, 0, JSON_FORMAT, 100)
+    reordered = [{'content': m['content'], 'role': m['role']} for m in MESSAGES]
+    assert fingerprint('gpt-4o', reordered, 0, {'type': 'json_object'}, 100) == key
+    assert len(key) == 64
+
+@pytest.mark.parametrize('changed', [
+    ('gpt-4o-mini', MESSAGES, 0, JSON_FORMAT, 100),
+    ('gpt-4o', MESSAGES[:1], 0, JSON_FORMAT, 100),
+    ('gpt-4o', [MESSAGES[0], {'role': 'user', 'content': 'Sample ID: 2\nTranscript: సమస్య రోడ్లు'}], 0, JSON_FORMAT, 100),
+    ('gpt-4o', MESSAGES, 0.7, JSON_FORMAT, 100),
+    ('gpt-4o', MESSAGES, 0, None, 100),
+    ('gpt-4o', MESSAGES, 0, JSON_FORMAT, None),
+])
+def test_fingerprint_changes_with_every_field(changed):
+    assert fingerprint(*changed) != fingerprint('gpt-4o', MESSAGES, 0, JSON_FORMAT, 100)
+
+def test_cache_get_put_and_counters(tmp_path):
+    cache = LLMCache(str(tmp_path / 'cache.sqlite'))
+    assert cache.get('k') is None
+    cache.put('k', 'gpt-4o', '{"is_valid": true}')
+    assert cache.get('k') == '{"is_valid": true}'
+    assert (cache.hits, cache.misses) == (1, 1)
+
+def test_cache_skips_empty_replies(tmp_path):
+    cache = LLMCache(str(tmp_path / 'cache.sqlite'))
+    cache.put('empty', 'gpt-4o', '')
+    cache.put('none', 'gpt-4o', None)
+    assert cache.get('empty') is None and cache.get('none') is None
+
+def reject(content):
+    raise ValueError("unusable reply")
+
+def test_cacheable_needs_a_finished_reply_the_caller_accepts():
+    assert llm_cache.cacheable('{"is_valid": true}')
+    assert llm_cache.cacheable('{"is_valid": true}', 'stop', json.loads)
+    assert not llm_cache.cacheable('{"is_valid": tr', 'length')
+    assert not llm_cache.cacheable('{"is_valid": true}', 'content_filter')
+    assert not llm_cache.cacheable('not json', 'stop', json.loads)
+    assert not llm_cache.cacheable('', 'stop')
+    assert not llm_cache.cacheable(None, 'stop')
+
+def test_cache_persists_across_connections(tmp_path):
+    path = str(tmp_path / 'cache.sqlite')
+    LLMCache(path).put('k', 'gpt-4o', 'reply')
+    assert LLMCache(path).get('k') == 'reply'
+
+def test_cache_is_shared_safely_between_threads(tmp_path):
+    cache = LLMCache(str(tmp_path / 'cache.sqlite'))
+    def worker(n):
+        for i in range(25):
+            cache.put(f"{n}-{i}", 'gpt-4o', f"reply {n}-{i}")
+            assert cache.get(f"{n}-{i}") == f"reply {n}-{i}"
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert cache.hits == 200
+
+def openai_requests(base_url):
+    with urllib.request.urlopen(f"{base_url}/mock/stats", timeout=10) as response:
+        return json.load(response).get('openai requests', 0)
+
+def test_backend_replays_identical_requests_from_cache(tmp_path, mock_server, monkeypatch):
+    pytest.importorskip('openai')
+    import llm_backend
+    monkeypatch.setattr(framework_config, 'OPENAI_BASE_URL', f"{mock_server}/v1", raising=False)
+    cache = LLMCache(str(tmp_path / 'cache.sqlite'))
+
+    backend = llm_backend.OpenAIChatBackend(cache=cache)
+    first = backend.complete(MESSAGES, response_format=JSON_FORMAT)
+    assert 'is_valid' in json.loads(first)
+    # A new process (new backend) with the same prompt is served from disk
+    again = llm_backend.OpenAIChatBackend(cache=cache).complete(MESSAGES, response_format=JSON_FORMAT)
+    assert again == first
+    assert openai_requests(mock_server) == 1
+
+    backend.complete(MESSAGES + [{'role': 'user', 'content': 'one more'}], response_format=JSON_FORMAT)
+    assert openai_requests(mock_server) == 2
+
+def test_sampled_backend_is_never_cached(mock_server, monkeypatch):
+    pytest.importorskip('openai')
+    import llm_backend
+    monkeypatch.setattr(framework_config, 'OPENAI_BASE_URL', f"{mock_server}/v1", raising=False)
+    monkeypatch.setattr(llm_cache, 'shared_cache', lambda: pytest.fail("sampled replies must not use the cache"))
+    backend = llm_backend.OpenAIChatBackend(temperature=0.7)
+    assert backend.cache is None
+    backend.complete(MESSAGES)
+    backend.complete(MESSAGES)
+    assert openai_requests(mock_server) == 2
+
+@pytest.mark.parametrize('mock_server', [{'truncate_rate': 1.0}], indirect=True)
+def test_backend_does_not_cache_truncated_replies(tmp_path, mock_server, monkeypatch):
+    pytest.importorskip('openai')
+    import llm_backend
+    monkeypatch.setattr(framework_config, 'OPENAI_BASE_URL', f"{mock_server}/v1", raising=False)
+    cache = LLMCache(str(tmp_path / 'cache.sqlite'))
+    backend = llm_backend.OpenAIChatBackend(cache=cache)
+    backend.complete(MESSAGES, response_format=JSON_FORMAT)
+    backend.complete(MESSAGES, response_format=JSON_FORMAT)
+    assert openai_requests(mock_server) == 2
+
+def test_backend_caches_only_replies_that_pass_validate(tmp_path, mock_server, monkeypatch):
+    pytest.importorskip('openai')
+    import llm_backend
+    monkeypatch.setattr(framework_config, 'OPENAI_BASE_URL', f"{mock_server}/v1", raising=False)
+    cache = LLMCache(str(tmp_path / 'cache.sqlite'))
+    backend = llm_backend.OpenAIChatBackend(cache=cache)
+    backend.complete(MESSAGES, response_format=JSON_FORMAT, validate=reject)
+    backend.complete(MESSAGES, response_format=JSON_FORMAT, validate=reject)
+    assert openai_requests(mock_server) == 2
+
+    # A bad reply cached before validation existed is asked for again, then replaced
+    key = llm_cache.fingerprint(backend.model, MESSAGES, 0, JSON_FORMAT, None)
+    cache.put(key, backend.model, '{"is_valid": tr')
+    reply = backend.complete(MESSAGES, response_format=JSON_FORMAT, validate=json.loads)
+    assert openai_requests(mock_server) == 3
+    assert cache.get(key) == reply
+    assert backend.complete(MESSAGES, response_format=JSON_FORMAT, validate=json.loads) == reply
+    assert openai_requests(mock_server) == 3
@@ -0,0 +1,104 @@
+import json
+import pytest
+
+pytest.importorskip('openai')
+
+import framework_config
+import openai_batch
+from llm_cache import LLMCache
+
+def make_requests(count):
+    prompt = 'Sample ID: {}\nTranscript: సమస్య రోడ్లు\nReply {{"is_valid": bool, "reason": str}}'
+    return {f"req-{i}": {'messages': [{'role': 'user', 'content': prompt.format(i)}],
+                         'response_format': {'type': 'json_object'}, 'max_tokens': 100}
+            for i in range(count)}
+
+@pytest.fixture
+def batch_env(tmp_path, mock_server, monkeypatch):
+    """openai_batch pointed at the mock, polling fast, writing under tmp_path. Returns submitted batch ids."""
+    monkeypatch.setattr(framework_config, 'OPENAI_BASE_URL', f"{mock_server}/v1", raising=False)
+    monkeypatch.setattr(openai_batch, 'BATCH_DIR', str(tmp_path / 'batches'))
+    monkeypatch.setattr(openai_batch, 'POLL_MIN_SECONDS', 0.01)
+    submitted = []
+    submit = openai_batch.submit
+    def counting_submit(client, jsonl_path, description=None):
+        submitted.append(submit(client, jsonl_path, description))
+        return submitted[-1]
+    monkeypatch.setattr(openai_batch, 'submit', counting_submit)
+    return submitted
+
+def submitted_ids(name):
+    with open(f"{openai_batch.BATCH_DIR}/{name}.jsonl", encoding='utf-8') as f:
+        return {json.loads(line)['custom_id'] for line in f}
+
+@pytest.mark.parametrize('mock_server', [{'job_seconds': 0}], indirect=True)
+def test_run_returns_a_reply_per_request(batch_env):
+    requests = make_requests(6)
+    replies = openai_batch.run(requests, name='all_ok', model='gpt-4o')
+    assert set(replies) == set(requests)
+    assert all('is_valid' in json.loads(reply) for reply in replies.values())
+    assert len(batch_env) == 1
+
+@pytest.mark.parametrize('mock_server', [{'job_seconds': 0}], indirect=True)
+def test_rerun_resumes_the_recorded_batch(batch_env):
+    requests = make_requests(3)
+    first = openai_batch.run(requests, name='resume', model='gpt-4o')
+    again = openai_batch.run(requests, name='resume', model='gpt-4o')
+    assert again == first
+    assert len(batch_env) == 1
+    # Different requests under the same name are a new batch
+    openai_batch.run(make_requests(4), name='resume', model='gpt-4o')
+    assert len(batch_env) == 2
+
+@pytest.mark.parametrize('mock_server', [{'job_seconds': 0, 'job_fail_rate': 0.5, 'seed': 3}], indirect=True)
+def test_cached_replies_skip_submission_and_failures_are_resubmitted(tmp_path, batch_env):
+    cache = LLMCache(str(tmp_path / 'cache.sqlite'))
+    requests = make_requests(12)
+    first = openai_batch.run(requests, name='partial', model='gpt-4o', cache=cache)
+    failed = set(requests) - set(first)
+    assert first and failed, "seed should fail some but not all requests"
+
+    second = openai_batch.run(requests, name='partial', model='gpt-4o', cache=cache)
+    assert submitted_ids('partial') == failed
+    assert {k: second[k] for k in first} == first
+    assert len(batch_env) == 2
+
+@pytest.mark.parametrize('mock_server', [{'job_seconds': 0}], indirect=True)
+def test_fully_cached_run_never_submits(tmp_path, batch_env):
+    cache = LLMCache(str(tmp_path / 'cache.sqlite'))
+    requests = make_requests(3)
+    first = openai_batch.run(requests, name='cached', model='gpt-4o', cache=cache)
+    assert openai_batch.run(requests, name='cached_again', model='gpt-4o', cache=cache) == first
+    assert len(batch_env) == 1
+
+@pytest.mark.parametrize('mock_server', [{'job_seconds': 0}], indirect=True)
+def test_sampled_requests_are_not_cached(tmp_path, batch_env):
+    cache = LLMCache(str(tmp_path / 'cache.sqlite'))
+    requests = {'warm': dict(make_requests(1)['req-0'], temperature=0.7)}
+    assert set(openai_batch.run(requests, name='sampled', model='gpt-4o', cache=cache)) == {'warm'}
+    with open(f"{openai_batch.BATCH_DIR}/sampled.jsonl", encoding='utf-8') as f:
+        assert json.loads(f.readline())['body']['temperature'] == 0.7
+    assert (cache.hits, cache.misses) == (0, 0)
+
+@pytest.mark.parametrize('mock_server', [{'job_seconds': 0, 'truncate_rate': 0.5, 'seed': 1}], indirect=True)
+def test_truncated_replies_are_returned_but_not_cached(tmp_path, batch_env):
+    cache = LLMCache(str(tmp_path / 'cache.sqlite'))
+    requests = make_requests(12)
+    first = openai_batch.run(requests, name='truncated', model='gpt-4o', cache=cache)
+    assert set(first) == set(requests)
+    truncated = {k for k, reply in first.items() if not reply.endswith('}')}
+    assert truncated and truncated != set(requests), "seed should truncate some but not all replies"
+
+    openai_batch.run(requests, name='truncated', model='gpt-4o', cache=cache)
+    assert submitted_ids('truncated') == truncated
+
+@pytest.mark.parametrize('mock_server', [{'job_seconds': 0}], indirect=True)
+def test_replies_failing_validate_are_not_cached(tmp_path, batch_env):
+    def reject(content):
+        raise ValueError("unusable reply")
+    cache = LLMCache(str(tmp_path / 'cache.sqlite'))
+    requests = {k: dict(request, validate=reject) for k, request in make_requests(2).items()}
+    openai_batch.run(requests, name='rejected', model='gpt-4o', cache=cache)
+    openai_batch.run(requests, name='rejected_again', model='gpt-4o', cache=cache)
+    assert len(batch_env) == 2
+    assert submitted_ids('rejected_again') == set(requests)
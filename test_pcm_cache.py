@@ -0,0 +1,109 @@
+import threading
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('pandas')
+pytest.importorskip('av')
+
+import audio_decode
+import pcm_cache
+from pcm_cache import PcmCache
+
+def tone(seconds, value=0.5):
+    return np.full(int(seconds * audio_decode.SAMPLE_RATE), value, dtype=np.float32)
+
+def test_put_get_round_trip(tmp_path):
+    cache = PcmCache(str(tmp_path))
+    first, second = tone(1.0, 0.25), np.linspace(-1, 1, 8000, dtype=np.float32)
+    cache.put('a', first)
+    cache.put('b', second)
+    assert 'a' in cache and 'c' not in cache
+    np.testing.assert_array_equal(cache.get('a'), first)
+    np.testing.assert_array_equal(cache.get('b'), second)
+    assert cache.get('c') is None
+
+def test_get_is_a_view_into_the_memory_map(tmp_path):
+    cache = PcmCache(str(tmp_path))
+    cache.put('a', tone(0.5))
+    assert isinstance(cache.get('a').base, np.memmap)
+
+def test_reader_sees_samples_appended_after_mapping(tmp_path):
+    cache = PcmCache(str(tmp_path))
+    cache.put('a', tone(0.5, 0.1))
+    cache.get('a')
+    cache.put('b', tone(2.0, 0.2))
+    np.testing.assert_array_equal(cache.get('b'), tone(2.0, 0.2))
+
+def test_index_persists_across_instances(tmp_path):
+    PcmCache(str(tmp_path)).put('a', tone(1.0, 0.3))
+    reopened = PcmCache(str(tmp_path))
+    assert 'a' in reopened
+    np.testing.assert_array_equal(reopened.get('a'), tone(1.0, 0.3))
+
+def test_int16_cache_is_half_size_and_close(tmp_path):
+    audio = np.linspace(-1.5, 1.5, 16000, dtype=np.float32)
+    cache = PcmCache(str(tmp_path), dtype='int16')
+    cache.put('a', audio)
+    restored = cache.get('a')
+    assert restored.dtype == np.float32
+    np.testing.assert_allclose(restored, np.clip(audio, -1.0, 1.0), atol=1e-4)
+    assert PcmCache(str(tmp_path / 'f32')).dtype.itemsize == 2 * cache.dtype.itemsize
+
+def test_load_decodes_once(tmp_path, monkeypatch):
+    decoded = []
+    def fake_load_audio(filepath):
+        decoded.append(filepath)
+        return tone(1.0, 0.4), audio_decode.SAMPLE_RATE
+    monkeypatch.setattr(audio_decode, 'load_audio', fake_load_audio)
+
+    cache = PcmCache(str(tmp_path))
+    for _ in range(3):
+        audio, sr = cache.load('hash', 'call.mp3')
+        np.testing.assert_array_equal(audio, tone(1.0, 0.4))
+        assert sr == audio_decode.SAMPLE_RATE
+    assert decoded == ['call.mp3']
+
+def test_load_does_not_cache_decode_failures(tmp_path, monkeypatch):
+    monkeypatch.setattr(audio_decode, 'load_audio', lambda filepath: (None, None))
+    cache = PcmCache(str(tmp_path))
+    assert cache.load('bad', 'broken.mp3') == (None, None)
+    assert 'bad' not in cache
+
+def test_load_audio_keys_rows_by_content_hash(tmp_path, monkeypatch):
+    decoded = []
+    monkeypatch.setattr(audio_decode, 'load_audio',
+                        lambda filepath: (decoded.append(filepath) or tone(0.5), audio_decode.SAMPLE_RATE))
+    monkeypatch.setattr(pcm_cache, '_default_cache', PcmCache(str(tmp_path)))
+    # Two rows (e.g. a relabelled duplicate) sharing the same audio decode once
+    pcm_cache.load_audio({'audio_hash': 'abc', 'file_path': 'one.mp3'}, 'one.mp3')
+    pcm_cache.load_audio({'audio_hash': 'abc', 'file_path': 'two.mp3'}, 'two.mp3')
+    assert decoded == ['one.mp3']
+
+def test_concurrent_puts_from_driver_threads(tmp_path):
+    cache = PcmCache(str(tmp_path))
+    errors = []
+    def worker(thread):
+        try:
+            for i in range(25):
+                cache.put(f"{thread}-{i}", tone(0.1, (thread * 25 + i) / 1000))
+        except Exception as e:
+            errors.append(e)
+    threads = [threading.Thread(target=worker, args=(t,)) for t in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert errors == []
+    reopened = PcmCache(str(tmp_path))
+    assert len(reopened.index) == 200
+    for thread in range(8):
+        for i in range(25):
+            np.testing.assert_array_equal(reopened.get(f"{thread}-{i}"), tone(0.1, (thread * 25 + i) / 1000))
+
+def test_put_keeps_the_first_copy_of_a_key(tmp_path):
+    cache = PcmCache(str(tmp_path))
+    cache.put('a', tone(0.5, 0.1))
+    cache.put('a', tone(0.5, 0.2))
+    np.testing.assert_array_equal(cache.get('a'), tone(0.5, 0.1))
+    assert cache.get('a').base.size == len(tone(0.5))
@@ -0,0 +1,67 @@
+import pytest
+
+pytest.importorskip('numpy')
+pytest.importorskip('pandas')
+
+import vad
+import prevalidation
+from prevalidation import classify, age_in_range, caste_mentioned, q1_mentioned
+
+# Surveyor asks about problems, party and caste/age; respondent answers
+FULL_SURVEY = ("నమస్కారం సర్వే చేస్తున్నాం మీ ప్రాంతంలో ప్రధాన సమస్య ఏమిటి రోడ్లు బాగాలేవు "
+               "ఏ పార్టీకి ఓటు వేస్తారు మీ కులం ఏమిటి కాపు మీ వయసు ఎంత 45 సంవత్సరాలు")
+QUESTIONS_ONLY = ("నమస్కారం సర్వే చేస్తున్నాం మీ ప్రాంతంలో ప్రధాన సమస్య ఏమిటి చెప్పండి "
+                  "ఏ పార్టీకి ఓటు వేస్తారు మీ కులం ఏమిటి మీ వయసు ఎంత")
+
+def make_row(transcript, q1='రోడ్లు', caste='Kapu', age='41-59', **extra):
+    return {'transcript': transcript, 'Q1': q1, 'Caste': caste, 'Age': age, **extra}
+
+def test_vad_silence_and_missing_transcripts_are_always_settled():
+    assert classify(make_row(vad.NO_SPEECH), rules=False) == (False, "No speech detected (VAD)")
+    quiet = make_row(FULL_SURVEY, speech_seconds=0.5, speech_ratio=0.01)
+    assert classify(quiet, rules=False) == (False, "No speech detected (VAD)")
+    assert classify(make_row("TRANSCRIPT_NOT_FOUND"), rules=False) == (False, "Transcript Missing")
+    assert classify(make_row("ERROR: timeout"), rules=True) == (False, "Transcript Missing")
+
+def test_rules_off_escalates_everything_else():
+    assert classify(make_row(FULL_SURVEY), rules=False) is None
+    assert classify(make_row("హలో"), rules=False) is None
+
+def test_empty_and_too_short_are_invalid():
+    assert classify(make_row(""), rules=True)[0] is False
+    assert classify(make_row(float('nan')), rules=True)[0] is False
+    assert classify(make_row("హలో ఎవరు మాట్లాడేది"), rules=True)[0] is False
+
+def test_short_transcript_without_survey_signs_is_invalid():
+    row = make_row("హలో ఎవరు మాట్లాడేది నేను తర్వాత ఫోన్ చేస్తాను సరే అండి")
+    is_valid, reason = classify(row, rules=True)
+    assert is_valid is False and reason.startswith("Rule:")
+
+def test_bare_question_word_keeps_short_transcript_from_invalid():
+    row = make_row("హలో అండి మీ కులం ఏమిటి చెప్పండి సరే అండి")
+    assert classify(row, rules=True) is None
+
+def test_questions_without_reported_answers_go_to_the_llm():
+    # Caste and age were asked but the reported answers never appear: not a rule VALID
+    assert classify(make_row(QUESTIONS_ONLY), rules=True) is None
+
+def test_every_reported_answer_found_is_valid():
+    is_valid, reason = classify(make_row(FULL_SURVEY), rules=True)
+    assert is_valid is True and reason.startswith("Rule:")
+
+@pytest.mark.parametrize('field, value', [('q1', 'పెన్షన్'), ('caste', 'Mala'), ('age', '18-25')])
+def test_one_mismatched_answer_goes_to_the_llm(field, value):
+    assert classify(make_row(FULL_SURVEY, **{field: value}), rules=True) is None
+
+def test_answer_matchers():
+    assert q1_mentioned("రోడ్డు బాగాలేదు", "రోడ్లు")   # stem match on the inflected word
+    assert not q1_mentioned("నీళ్ళు లేవు", "రోడ్లు")
+    assert caste_mentioned("మేము శెట్టి బలిజ", "SettiBalija")
+    assert not caste_mentioned("మీ కులం ఏమిటి", "Kapu")
+    assert age_in_range("వయసు 45", "41-59")
+    assert not age_in_range("వయసు 30", "41-59")
+    assert age_in_range("72 సంవత్సరాలు", "60+")
+    assert not age_in_range("45", None)
+
+def test_cue_lists_keep_caste_and_age_words_out_of_topic_cues():
+    assert not set(prevalidation.TOPIC_CUES) & set(prevalidation.CASTE_CUES + prevalidation.AGE_CUES)
@@ -0,0 +1,145 @@
+import json
+import types
+import urllib.error
+import urllib.request
+import pytest
+import rate_limiter
+from rate_limiter import TokenBucket, AdaptiveRateLimiter
+
+def api_error(status_code, headers=None):
+    """Shaped like the SDK errors: status_code plus a response carrying the headers."""
+    return types.SimpleNamespace(status_code=status_code,
+                                 response=types.SimpleNamespace(status_code=status_code, headers=headers or {}))
+
+# --- TokenBucket ---
+
+def test_bucket_starts_full_and_refills_at_rate():
+    bucket = TokenBucket(per_minute=60)
+    now = bucket.updated
+    assert bucket.wait_time(60, now) == 0.0
+    bucket.take(60)
+    assert bucket.wait_time(1, now) == pytest.approx(1.0)
+    assert bucket.wait_time(1, now + 1.0) == 0.0
+
+def test_bucket_caps_oversized_cost_at_capacity():
+    bucket = TokenBucket(per_minute=60)
+    now = bucket.updated
+    assert bucket.wait_time(1000, now) == 0.0
+    bucket.take(1000)
+    assert bucket.tokens == 0.0
+
+# --- settle ---
+
+def test_settle_charges_underestimate_as_debt():
+    limiter = AdaptiveRateLimiter(tokens=600)
+    bucket = limiter.buckets['tokens']
+    bucket.take(100)
+    limiter.settle('tokens', 100, 700)
+    assert bucket.tokens == pytest.approx(-100)
+    # Debt has to be paid back at 10 tokens/s before the next request fits
+    assert bucket.wait_time(1, bucket.updated) == pytest.approx(10.1)
+
+def test_settle_clamps_debt_and_refund():
+    limiter = AdaptiveRateLimiter(tokens=600)
+    bucket = limiter.buckets['tokens']
+    limiter.settle('tokens', 100, 100000)
+    assert bucket.tokens == -600
+    # Only what was actually taken (at most the capacity) is refunded
+    limiter.settle('tokens', 100000, 0)
+    assert bucket.tokens == 0
+    limiter.settle('tokens', 600, 0)
+    limiter.settle('tokens', 600, 0)
+    assert bucket.tokens == 600
+
+def test_settle_ignores_unknown_bucket_and_missing_usage():
+    limiter = AdaptiveRateLimiter(tokens=600)
+    limiter.settle('requests', 1, 5)
+    limiter.settle('tokens', 100, None)
+    assert limiter.buckets['tokens'].tokens == 600
+
+# --- adaptive limits ---
+
+def test_observe_headers_sets_ceiling_and_caps_remaining():
+    limiter = AdaptiveRateLimiter(requests=600, tokens=60000)
+    limiter.observe_headers({'x-ratelimit-limit-requests': '120', 'x-ratelimit-remaining-requests': '5',
+                             'x-ratelimit-limit-tokens': 'not a number'})
+    requests = limiter.buckets['requests']
+    assert limiter.ceilings['requests'] == pytest.approx(2.0)
+    assert requests.capacity == 120
+    assert requests.rate == pytest.approx(2.0)
+    assert requests.tokens == pytest.approx(5, abs=0.5)
+    assert limiter.buckets['tokens'].rate == pytest.approx(1000.0)
+
+def test_on_rate_limited_backs_off_to_floor_and_pauses():
+    limiter = AdaptiveRateLimiter(requests=600)
+    limiter.on_rate_limited()
+    assert limiter.buckets['requests'].rate == pytest.approx(10.0 * AdaptiveRateLimiter.DECREASE)
+    for _ in range(50):
+        limiter.on_rate_limited()
+    assert limiter.buckets['requests'].rate == pytest.approx(10.0 * AdaptiveRateLimiter.FLOOR)
+    limiter.on_rate_limited(retry_after=30)
+    assert limiter._try_acquire({'requests': 1}) > 25
+
+def test_on_success_recovers_up_to_ceiling():
+    limiter = AdaptiveRateLimiter(requests=600)
+    limiter.on_rate_limited()
+    for _ in range(100):
+        limiter.on_success()
+    assert limiter.buckets['requests'].rate == pytest.approx(10.0)
+
+# --- retry helpers ---
+
+@pytest.mark.parametrize('error, expected', [
+    (api_error(429), True),
+    (api_error(408), True),
+    (api_error(503), True),
+    (api_error(400), False),
+    (api_error(401), False),
+    (types.SimpleNamespace(response=types.SimpleNamespace(status_code=502)), True),
+    (TimeoutError(), True),
+])
+def test_is_retryable(error, expected):
+    assert rate_limiter.is_retryable(error) is expected
+
+def test_retry_after_seconds():
+    assert rate_limiter.retry_after_seconds(api_error(429, {'retry-after-ms': '1500'})) == 1.5
+    assert rate_limiter.retry_after_seconds(api_error(429, {'retry-after': '7'})) == 7.0
+    assert rate_limiter.retry_after_seconds(api_error(429, {'retry-after': 'Wed, 21 Oct 2015 07:28:00 GMT'})) is None
+    assert rate_limiter.retry_after_seconds(TimeoutError()) is None
+
+def test_backoff_never_shorter_than_retry_after():
+    for attempt in range(10):
+        assert 0 <= rate_limiter.backoff_seconds(attempt) <= rate_limiter.RETRY_MAX_SECONDS
+        assert rate_limiter.backoff_seconds(attempt, retry_after=90) >= 90
+
+# --- against mock_api_server ---
+
+def post_chat(base_url, content):
+    body = json.dumps({'model': 'gpt-4o', 'messages': [{'role': 'user', 'content': content}]}).encode()
+    request = urllib.request.Request(f"{base_url}/v1/chat/completions", data=body,
+                                     headers={'Content-Type': 'application/json'})
+    with urllib.request.urlopen(request, timeout=10) as response:
+        return response.headers
+
+@pytest.mark.parametrize('mock_server', [{'rate_429': 1.0, 'retry_after': 3.0}], indirect=True)
+def test_mock_429_drives_backoff(mock_server):
+    with pytest.raises(urllib.error.HTTPError) as caught:
+        post_chat(mock_server, 'hello')
+    error = api_error(caught.value.code, caught.value.headers)
+    assert rate_limiter.is_retryable(error)
+    retry_after = rate_limiter.retry_after_seconds(error)
+    assert retry_after == 3.0
+    assert rate_limiter.backoff_seconds(0, retry_after) >= 3.0
+
+    limiter = AdaptiveRateLimiter(requests=600)
+    limiter.on_rate_limited(retry_after)
+    assert limiter._try_acquire({'requests': 1}) > 2.5
+
+@pytest.mark.parametrize('mock_server', [{'tpm': 6000}], indirect=True)
+def test_mock_quota_headers_set_ceiling(mock_server):
+    limiter = AdaptiveRateLimiter(tokens=60000)
+    limiter.observe_headers(post_chat(mock_server, 'x' * 400))
+    tokens = limiter.buckets['tokens']
+    assert limiter.ceilings['tokens'] == pytest.approx(100.0)
+    assert tokens.capacity == 6000
+    assert tokens.tokens <= 6000 - 100
@@ -0,0 +1,188 @@
+import json
+import os
+import urllib.request
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('pandas')
+sf = pytest.importorskip('soundfile')
+pytest.importorskip('av')
+pytest.importorskip('requests')
+pytest.importorskip('sarvamai')
+
+import sarvam_orchestrator
+import sarvam_upload
+import transcribe_sarvam_batch as sarvam
+import transcript_cache
+
+def write_wav(path, seconds=2.0, sr=16000):
+    t = np.arange(int(seconds * sr)) / sr
+    sf.write(str(path), 0.3 * np.sin(2 * np.pi * 220 * t), sr, subtype='PCM_16')
+    return str(path)
+
+def sarvam_requests(base_url):
+    with urllib.request.urlopen(f"{base_url}/mock/stats", timeout=10) as response:
+        return json.load(response).get('sarvam requests', 0)
+
+@pytest.fixture
+def orchestrator(tmp_path, mock_server, monkeypatch):
+    """Orchestrator on the mock with fast polling and every path under tmp_path. Returns the client."""
+    monkeypatch.setattr(sarvam, 'SARVAM_BASE_URL', mock_server)
+    monkeypatch.setattr(sarvam_upload, 'UPLOAD_DIR', str(tmp_path / 'uploads'))
+    monkeypatch.setattr(sarvam_orchestrator, 'OUTPUT_DIR', str(tmp_path / 'outputs'))
+    monkeypatch.setattr(sarvam_orchestrator, 'POLL_MIN_SECONDS', 0.05)
+    monkeypatch.setattr(sarvam_orchestrator, 'POLL_MAX_SECONDS', 0.2)
+    return sarvam.make_client()
+
+# --- journaled run ---
+
+@pytest.mark.parametrize('mock_server', [{'job_seconds': 0.2}], indirect=True)
+def test_run_jobs_transcribes_every_chunk(tmp_path, orchestrator):
+    journal = sarvam_orchestrator.JobJournal(str(tmp_path / 'journal.json'))
+    cache = transcript_cache.TranscriptCache(str(tmp_path / 'transcripts.sqlite'))
+    paths = [write_wav(tmp_path / f"call{i}.wav", seconds=1.0 + i) for i in range(5)]
+    assert journal.add_files(paths, chunk_size=2) == 5
+    assert len(journal.chunks) == 3
+
+    finished = []
+    sarvam_orchestrator.run_jobs(orchestrator, journal, cache, workers=2,
+                                 on_finished=lambda: finished.append(1), transcode=False)
+    assert [c['state'] for c in journal.chunks] == ['completed'] * 3
+    assert len(finished) == 3
+    for path in paths:
+        entry = journal.files[os.path.basename(path)]
+        assert entry['state'] == 'done'
+        assert os.path.basename(path) in entry['transcript']
+        assert cache.get(cache.audio_hash(path), *sarvam_orchestrator.CACHE_ARGS) == entry['transcript']
+    # Each job was downloaded into its own directory
+    assert sorted(os.listdir(tmp_path / 'outputs')) == sorted(c['job_id'] for c in journal.chunks)
+
+@pytest.mark.parametrize('mock_server', [{'job_seconds': 0}], indirect=True)
+def test_rerun_resumes_without_new_jobs(tmp_path, orchestrator, mock_server):
+    path = str(tmp_path / 'journal.json')
+    cache = transcript_cache.TranscriptCache(str(tmp_path / 'transcripts.sqlite'))
+    journal = sarvam_orchestrator.JobJournal(path)
+    journal.add_files([write_wav(tmp_path / 'a.wav'), write_wav(tmp_path / 'b.wav', seconds=3.0)])
+    sarvam_orchestrator.run_jobs(orchestrator, journal, cache, transcode=False)
+    calls = sarvam_requests(mock_server)
+
+    # A new process reads the journal: nothing is queued twice or paid for again
+    reopened = sarvam_orchestrator.JobJournal(path)
+    assert reopened.add_files([str(tmp_path / 'a.wav')]) == 0
+    sarvam_orchestrator.run_jobs(orchestrator, reopened, cache, transcode=False)
+    assert sarvam_requests(mock_server) == calls
+    assert reopened.files == journal.files
+
+@pytest.mark.parametrize('mock_server', [{'job_seconds': 0}], indirect=True)
+def test_created_job_is_reused_after_a_crash(tmp_path, orchestrator):
+    journal = sarvam_orchestrator.JobJournal(str(tmp_path / 'journal.json'))
+    cache = transcript_cache.TranscriptCache(str(tmp_path / 'transcripts.sqlite'))
+    journal.add_files([write_wav(tmp_path / 'a.wav')])
+    # Crashed right after creating the job, before uploading
+    job_id = sarvam.create_job(orchestrator).job_id
+    journal.update_chunk(0, state='created', job_id=job_id)
+
+    sarvam_orchestrator.run_jobs(orchestrator, journal, cache, transcode=False)
+    assert journal.chunks[0]['job_id'] == job_id
+    assert journal.chunks[0]['state'] == 'completed'
+
+@pytest.mark.parametrize('mock_server', [{'job_seconds': 0, 'job_fail_rate': 1.0}], indirect=True)
+def test_failed_jobs_wait_for_retry_failed(tmp_path, orchestrator):
+    journal = sarvam_orchestrator.JobJournal(str(tmp_path / 'journal.json'))
+    cache = transcript_cache.TranscriptCache(str(tmp_path / 'transcripts.sqlite'))
+    journal.add_files([write_wav(tmp_path / 'a.wav')])
+    sarvam_orchestrator.run_jobs(orchestrator, journal, cache, transcode=False)
+    assert journal.chunks[0]['state'] == 'failed'
+    assert journal.files['a.wav']['state'] == 'failed'
+
+    failed_job = journal.chunks[0]['job_id']
+    journal.retry_failed()
+    assert journal.chunks[0]['state'] == 'pending' and journal.chunks[0]['job_id'] is None
+    assert journal.files['a.wav']['state'] == 'queued'
+    sarvam_orchestrator.run_jobs(orchestrator, journal, cache, transcode=False)
+    assert journal.chunks[0]['job_id'] != failed_job
+
+# --- single jobs (asr_engine.SarvamBatchEngine) ---
+
+@pytest.mark.parametrize('mock_server', [{'job_seconds': 0.2}], indirect=True)
+def test_run_chunk_returns_transcripts_in_input_order(tmp_path, orchestrator):
+    paths = [write_wav(tmp_path / f"call{i}.wav", seconds=1.0 + i) for i in range(3)]
+    transcripts = sarvam_orchestrator.run_chunk(orchestrator, paths)
+    # Transcoded uploads keep the stem, and the mock names it in the transcript
+    for path, transcript in zip(paths, transcripts):
+        assert os.path.splitext(os.path.basename(path))[0] + '.mp3' in transcript
+    assert len(os.listdir(tmp_path / 'outputs')) == 1
+
+@pytest.mark.parametrize('mock_server', [{'job_seconds': 0, 'job_fail_rate': 1.0}], indirect=True)
+def test_run_chunk_raises_on_failed_job(tmp_path, orchestrator):
+    with pytest.raises(Exception, match='failed'):
+        sarvam_orchestrator.run_chunk(orchestrator, [write_wav(tmp_path / 'a.wav')], transcode=False)
+
+@pytest.mark.parametrize('mock_server', [{'job_seconds': 0}], indirect=True)
+def test_concurrent_chunks_keep_their_own_outputs(tmp_path, orchestrator):
+    import concurrent.futures
+    # Every job uploads a file with the same name; outputs must not overwrite each other
+    dirs = [tmp_path / f"survey{i}" for i in range(4)]
+    for d in dirs:
+        d.mkdir()
+    paths = [write_wav(d / 'call.wav', seconds=1.0 + i) for i, d in enumerate(dirs)]
+    with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
+        transcripts = list(executor.map(lambda p: sarvam_orchestrator.run_chunk(orchestrator, [p], transcode=False)[0], paths))
+    # mock transcripts encode the uploaded size, so distinct files give distinct transcripts
+    assert len(set(transcripts)) == 4
+    assert len(os.listdir(tmp_path / 'outputs')) == 4
+
+@pytest.mark.parametrize('mock_server', [{'job_seconds': 0, 'job_fail_rate': 1.0}], indirect=True)
+def test_batch_engine_reports_job_failure_per_item(tmp_path, orchestrator):
+    import asr_engine
+    engine = asr_engine.SarvamBatchEngine()
+    items = [{'filepath': write_wav(tmp_path / f"call{i}.wav")} for i in range(2)]
+    results = engine.transcribe_batch(items)
+    assert len(results) == 2 and all(isinstance(r, Exception) for r in results)
+
+# --- partial results and retrieval ---
+
+@pytest.mark.parametrize('mock_server', [{'job_seconds': 0}], indirect=True)
+def test_partial_results_match_transcoded_uploads(tmp_path, orchestrator, monkeypatch):
+    import functools
+    import concurrent.futures
+    import pandas as pd
+    import framework_config
+    import process_partial_results
+
+    monkeypatch.setattr(framework_config, 'AUDIO_DOWNLOAD_DIR', str(tmp_path))
+    monkeypatch.setattr(sarvam_orchestrator, 'OUTPUT_DIR', str(tmp_path / 'sarvam_outputs_chunked'))
+    journal_path = str(tmp_path / 'journal.json')
+    monkeypatch.setattr(sarvam_orchestrator, 'JobJournal',
+                        functools.partial(sarvam_orchestrator.JobJournal, journal_path))
+    # Transcode in threads so the patched upload directory applies
+    monkeypatch.setattr(concurrent.futures, 'ProcessPoolExecutor', concurrent.futures.ThreadPoolExecutor)
+
+    paths = [write_wav(tmp_path / f"call{i}.wav", seconds=1.0 + i) for i in range(3)]
+    # Two rows share call0.wav; call2.wav is never submitted
+    pd.DataFrame({'sample_id': ['a', 'b', 'c', 'd'],
+                  'file_path': [paths[0], paths[0], paths[1], paths[2]]}).to_csv(
+        tmp_path / 'downloaded_metadata.csv', index=False)
+    journal = sarvam_orchestrator.JobJournal()
+    cache = transcript_cache.TranscriptCache(str(tmp_path / 'transcripts.sqlite'))
+    journal.add_files(paths[:2])
+    sarvam_orchestrator.run_jobs(orchestrator, journal, cache, transcode=True)
+    assert journal.files['call0.wav']['upload_path'].endswith('call0.mp3')
+
+    process_partial_results.process_partial_results()
+    partial = pd.read_csv(tmp_path / 'transcribed_metadata_sarvam_partial.csv')
+    expected = [journal.files['call0.wav']['transcript']] * 2 + [journal.files['call1.wav']['transcript'], 'PENDING']
+    assert partial['transcript'].tolist() == expected
+
+@pytest.mark.parametrize('mock_server', [{'job_seconds': 0}], indirect=True)
+def test_retrieve_downloads_into_the_job_directory(tmp_path, orchestrator):
+    import retrieve_sarvam_job
+    transcripts = sarvam_orchestrator.run_chunk(orchestrator, [write_wav(tmp_path / 'a.wav')], transcode=False)
+    job_id = os.listdir(tmp_path / 'outputs')[0]
+    for name in os.listdir(tmp_path / 'outputs' / job_id):
+        os.remove(tmp_path / 'outputs' / job_id / name)
+
+    retrieve_sarvam_job.retrieve_job(job_id)
+    with open(tmp_path / 'outputs' / job_id / 'a.wav.json') as f:
+        assert json.load(f)['transcript'] == transcripts[0]
+    assert os.listdir(tmp_path / 'outputs') == [job_id]
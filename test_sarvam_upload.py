@@ -0,0 +1,65 @@
+import urllib.request
+import pytest
+
+np = pytest.importorskip('numpy')
+sf = pytest.importorskip('soundfile')
+pytest.importorskip('av')
+pytest.importorskip('requests')
+pytest.importorskip('sarvamai')
+
+import sarvam_upload
+import transcribe_sarvam_batch as sarvam
+
+def write_wav(path, seconds=3.0, sr=16000):
+    t = np.arange(int(seconds * sr)) / sr
+    sf.write(str(path), 0.3 * np.sin(2 * np.pi * 220 * t), sr, subtype='PCM_16')
+    return str(path)
+
+def blob(url):
+    with urllib.request.urlopen(url, timeout=10) as response:
+        return response.read()
+
+@pytest.fixture
+def sarvam_env(tmp_path, mock_server, monkeypatch):
+    monkeypatch.setattr(sarvam, 'SARVAM_BASE_URL', mock_server)
+    monkeypatch.setattr(sarvam_upload, 'UPLOAD_DIR', str(tmp_path / 'uploads'))
+    monkeypatch.setattr(sarvam_upload.rate_limiter, 'RETRY_BASE_SECONDS', 0.01)
+    return mock_server
+
+def test_transcode_shrinks_and_is_reused(tmp_path, sarvam_env):
+    src = write_wav(tmp_path / 'call.wav')
+    upload = sarvam_upload.transcode_for_upload(src)
+    assert upload == sarvam_upload.upload_path(src) and upload.endswith('call.mp3')
+    assert tmp_path.joinpath('uploads', 'call.mp3').stat().st_size < tmp_path.joinpath('call.wav').stat().st_size
+    mtime = tmp_path.joinpath('uploads', 'call.mp3').stat().st_mtime_ns
+    assert sarvam_upload.transcode_for_upload(src) == upload
+    assert tmp_path.joinpath('uploads', 'call.mp3').stat().st_mtime_ns == mtime
+
+def test_transcode_failure_uploads_the_original(tmp_path, sarvam_env):
+    src = tmp_path / 'broken.mp3'
+    src.write_bytes(b'not audio at all')
+    assert sarvam_upload.transcode_for_upload(str(src)) == str(src)
+    assert not list(tmp_path.joinpath('uploads').glob('*.part'))
+
+def test_put_file_lands_intact(tmp_path, sarvam_env):
+    src = write_wav(tmp_path / 'call.wav')
+    url = f"{sarvam_env}/blob/job/input/call.wav"
+    sarvam_upload.put_file(url, src)
+    assert blob(url) == tmp_path.joinpath('call.wav').read_bytes()
+
+def test_put_file_rejected_checksum_is_not_retried(tmp_path, sarvam_env, monkeypatch):
+    src = write_wav(tmp_path / 'call.wav')
+    monkeypatch.setattr(sarvam_upload, '_content_md5', lambda filepath: '1B2M2Y8AsgTpgAmY7PhCfg==')
+    with pytest.raises(Exception, match='Upload failed for call.wav'):
+        sarvam_upload.put_file(f"{sarvam_env}/blob/job/input/call.wav", src)
+
+def test_upload_files_then_start(tmp_path, sarvam_env):
+    client = sarvam.make_client()
+    job_id = sarvam.create_job(client).job_id
+    paths = [write_wav(tmp_path / f"call{i}.wav", seconds=1.0 + i) for i in range(4)]
+    sarvam_upload.upload_files(client, job_id, paths)
+    for path in paths:
+        name = path.rsplit('/', 1)[-1]
+        assert blob(f"{sarvam_env}/blob/{job_id}/input/{name}") == open(path, 'rb').read()
+    # /start only succeeds once every file is in storage
+    sarvam.start_job(job_id, paths)
@@ -0,0 +1,75 @@
+import functools
+import pytest
+
+np = pytest.importorskip('numpy')
+pd = pytest.importorskip('pandas')
+pytest.importorskip('av')
+
+import framework_config
+import asr_engine
+import pcm_cache
+import transcribe
+import transcript_cache
+
+class FakeEngine(asr_engine.AsrEngine):
+    name = 'fake'
+    model_id = 'fake-1'
+    output_name = 'fake'
+    batch_size = 2
+    stat_columns = ('asr_seconds',)
+
+    def __init__(self):
+        self.calls = []
+
+    def transcribe_batch(self, items):
+        self.calls.append([item['sample_id'] for item in items])
+        return [f"text of {item['sample_id']}" for item in items]
+
+    def item_stats(self, key):
+        return {'asr_seconds': 1.5}
+
+@pytest.fixture
+def metadata(tmp_path, monkeypatch):
+    monkeypatch.setattr(framework_config, 'AUDIO_DOWNLOAD_DIR', str(tmp_path))
+    monkeypatch.setattr(transcript_cache, 'TranscriptCache',
+                        functools.partial(transcript_cache.TranscriptCache, path=str(tmp_path / 'cache.sqlite')))
+    for name in ('a', 'b', 'c'):
+        (tmp_path / f"{name}.mp3").write_bytes(name.encode() * 100)
+    rows = [('s1', 'a', None), ('s2', 'b', None), ('s3', 'a', None), ('s4', 'c', 0.1), ('s5', 'missing', None)]
+    pd.DataFrame([{'sample_id': sample_id, 'file_path': str(tmp_path / f"{name}.mp3"), 'audio_hash': name,
+                   'speech_seconds': speech, 'speech_ratio': speech} for sample_id, name, speech in rows]
+                 ).to_csv(tmp_path / 'downloaded_metadata.csv', index=False)
+    return tmp_path
+
+def test_run_engine_dedups_skips_and_writes_stat_columns(metadata):
+    engine = FakeEngine()
+    transcribe.run_engine(engine)
+    assert engine.calls == [['s1', 's2']]
+    out = pd.read_csv(metadata / 'transcribed_metadata_fake.csv')
+    assert out['transcript'].tolist()[:4] == ['text of s1', 'text of s2', 'text of s1', 'NO_SPEECH']
+    assert out['transcript'][4] == 'ERROR: File not found'
+    assert out['asr_seconds'].tolist()[:3] == [1.5, 1.5, 1.5]
+    assert out['asr_seconds'][3:].isna().all()
+
+    # A rerun is served from the transcript cache
+    engine = FakeEngine()
+    transcribe.run_engine(engine)
+    assert engine.calls == []
+
+def test_indic_whisper_streams_audio_and_times_each_file(monkeypatch):
+    audio = {'one.wav': np.zeros(16000 * 4, dtype=np.float32), 'two.wav': np.zeros(16000 * 12, dtype=np.float32)}
+    monkeypatch.setattr(pcm_cache, 'load_audio', lambda row, filepath: (audio.get(filepath), 16000))
+    fed = []
+    def fake_pipeline(inputs, batch_size):
+        for entry in inputs:
+            fed.append(entry)
+            yield {'text': f"{len(entry['raw']) // 16000} seconds"}
+
+    engine = object.__new__(asr_engine.IndicWhisperEngine)
+    engine.transcriber, engine.pipeline_batch_size, engine.timings = fake_pipeline, 2, {}
+    items = [{'key': name, 'filepath': name, 'row': {}} for name in ('one.wav', 'broken.wav', 'two.wav')]
+    assert engine.transcribe_batch(items) == ['4 seconds', "ERROR: Failed to load audio with AV", '12 seconds']
+    assert len(fed) == 2
+    assert set(engine.timings) == {'one.wav', 'two.wav'}
+    assert engine.item_stats('two.wav')['rtf'] >= 0
+    assert engine.item_stats('broken.wav') == {}
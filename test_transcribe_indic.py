@@ -0,0 +1,55 @@
+import pytest
+
+pytest.importorskip('numpy')
+pytest.importorskip('pandas')
+pytest.importorskip('torch')
+pytest.importorskip('transformers')
+
+import transcribe_indic
+from transcribe_indic import (SAMPLE_RATE, WINDOW_SECONDS, STRIDE_SECONDS, BATCH_SIZE, MAX_BATCH_SECONDS,
+                              plan_items, item_seconds, make_batches)
+
+WINDOW = WINDOW_SECONDS * SAMPLE_RATE
+STRIDE = STRIDE_SECONDS * SAMPLE_RATE
+
+def cores(items, job_idx=0):
+    """The [start, end) sample ranges each item keeps after its context is trimmed."""
+    return sorted((start + left, end - right) for j, start, end, left, right in items if j == job_idx)
+
+@pytest.mark.parametrize('total', [
+    1, WINDOW, WINDOW + 2 * STRIDE, WINDOW + 2 * STRIDE + 1, 2 * WINDOW, 2 * WINDOW + 1,
+    2 * WINDOW + STRIDE // 2, 2 * WINDOW + STRIDE, 3 * WINDOW + STRIDE + 7, 7 * WINDOW - 3])
+def test_cores_tile_the_whole_file(total):
+    items = plan_items([{'samples': total}])
+    kept = cores(items)
+    assert kept[0][0] == 0 and kept[-1][1] == total
+    assert all(a_end == b_start for (_, a_end), (b_start, _) in zip(kept, kept[1:]))
+    for _, start, end, left, right in items:
+        assert 0 <= start < end <= total
+        assert 0 <= left <= STRIDE and 0 <= right <= STRIDE
+
+def test_last_core_shorter_than_the_stride_keeps_its_audio():
+    total = 2 * WINDOW + STRIDE // 2
+    items = plan_items([{'samples': total}])
+    # The middle window's right context is only what is left of the file
+    assert items[1] == (0, WINDOW - STRIDE, total, STRIDE, STRIDE // 2)
+    assert items[2] == (0, 2 * WINDOW - STRIDE, total, STRIDE, 0)
+
+def test_short_files_are_one_item_and_empty_ones_none():
+    jobs = [{'samples': 5 * SAMPLE_RATE}, {'samples': 0}, {'samples': WINDOW + 2 * STRIDE}]
+    assert plan_items(jobs) == [(0, 0, 5 * SAMPLE_RATE, 0, 0), (2, 0, WINDOW + 2 * STRIDE, 0, 0)]
+
+def test_item_seconds():
+    assert item_seconds((0, SAMPLE_RATE, 3 * SAMPLE_RATE, 0, 0)) == 2.0
+
+def test_make_batches_buckets_by_length_within_limits():
+    lengths = [1, 30, 2, 24, 3, 5, 8, 13, 21, 1, 1, 1, 1, 1, 1, 1, 1]
+    items = [(i, 0, seconds * SAMPLE_RATE, 0, 0) for i, seconds in enumerate(lengths)]
+    batches = make_batches(items)
+    assert sorted(item for batch in batches for item in batch) == sorted(items)
+    flat = [item_seconds(item) for batch in batches for item in batch]
+    assert flat == sorted(flat)
+    for batch in batches:
+        assert len(batch) <= BATCH_SIZE
+        assert len(batch) == 1 or len(batch) * max(map(item_seconds, batch)) <= MAX_BATCH_SECONDS
+    assert [len(batch) for batch in batches][0] == BATCH_SIZE
@@ -0,0 +1,73 @@
+import os
+import pytest
+
+pytest.importorskip('pandas')
+
+import audio_store
+from transcript_cache import TranscriptCache, UNCACHEABLE_PREFIXES
+
+ARGS = ('indic_whisper', 'vasista22/whisper-telugu-tiny', 'te', {'backend': 'fp32', 'chunk_length_s': 30})
+
+@pytest.fixture
+def cache(tmp_path):
+    return TranscriptCache(str(tmp_path / 'cache.sqlite'))
+
+def test_put_get_round_trip_and_persistence(cache, tmp_path):
+    assert cache.get('abc', *ARGS) is None
+    cache.put('abc', *ARGS, "మీ ప్రాంతంలో సమస్య")
+    assert cache.get('abc', *ARGS) == "మీ ప్రాంతంలో సమస్య"
+    assert TranscriptCache(str(tmp_path / 'cache.sqlite')).get('abc', *ARGS) == "మీ ప్రాంతంలో సమస్య"
+
+@pytest.mark.parametrize('transcript', [f"{prefix}: details" for prefix in UNCACHEABLE_PREFIXES] + [None, 3.0])
+def test_failures_are_never_cached(cache, transcript):
+    cache.put('abc', *ARGS, transcript)
+    assert cache.get('abc', *ARGS) is None
+
+def test_empty_and_no_speech_transcripts_are_cached(cache):
+    cache.put('silent', *ARGS, "")
+    assert cache.get('silent', *ARGS) == ""
+
+@pytest.mark.parametrize('changed', [
+    ('def', *ARGS),
+    ('abc', 'indic', *ARGS[1:]),
+    ('abc', ARGS[0], 'openai/whisper-small', *ARGS[2:]),
+    ('abc', *ARGS[:2], 'hi', ARGS[3]),
+    ('abc', *ARGS[:3], {'backend': 'int8', 'chunk_length_s': 30}),
+    ('abc', *ARGS[:3], {}),
+])
+def test_key_covers_audio_engine_model_language_and_params(cache, changed):
+    cache.put('abc', *ARGS, "transcript")
+    assert cache.get(*changed) is None
+
+def test_params_order_and_missing_values_do_not_matter(cache):
+    cache.put('abc', 'whisper', None, None, {'b': 1, 'a': 2}, "transcript")
+    assert cache.get('abc', 'whisper', '', '', {'a': 2, 'b': 1}) == "transcript"
+    cache.put('abc', 'sarvam', 'saaras:v3', 'te-IN', None, "other")
+    assert cache.get('abc', 'sarvam', 'saaras:v3', 'te-IN', {}) == "other"
+
+def test_audio_hash_trusts_the_blob_name(cache, tmp_path):
+    blob = tmp_path / 'abc123.mp3'
+    blob.write_bytes(b'raw audio')
+    # The raw blob is named by its hash, so the file is not read
+    assert cache.audio_hash(str(blob), {'audio_hash': 'abc123'}) == 'abc123'
+
+@pytest.mark.parametrize('name', ['abc123_compact.wav', 'abc123_compact.mp3', 'abc123_cleaned.wav', 'legacy_abc123.mp3'])
+def test_audio_hash_reads_derived_files(cache, tmp_path, name):
+    derived = tmp_path / name
+    derived.write_bytes(b'derived audio ' + name.encode())
+    audio_hash = cache.audio_hash(str(derived), {'audio_hash': 'abc123'})
+    assert audio_hash != 'abc123'
+    assert audio_hash == audio_store.file_sha256(str(derived))
+
+def test_audio_hash_is_memoized_until_the_file_changes(cache, tmp_path, monkeypatch):
+    path = tmp_path / 'abc123_compact.wav'
+    path.write_bytes(b'first')
+    reads = []
+    file_sha256 = audio_store.file_sha256
+    monkeypatch.setattr(audio_store, 'file_sha256', lambda p: reads.append(p) or file_sha256(p))
+    first = cache.audio_hash(str(path))
+    assert cache.audio_hash(str(path)) == first and len(reads) == 1
+
+    path.write_bytes(b'second, longer')
+    os.utime(path, (1, 1))
+    assert cache.audio_hash(str(path)) != first and len(reads) == 2
@@ -0,0 +1,83 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('pandas')
+
+import vad
+from vad import FRAME_SECONDS, MAX_GAP_SECONDS, MIN_SEGMENT_SECONDS, frame_levels_db, segments_from_levels, has_speech
+
+SR = 16000
+FRAME = int(FRAME_SECONDS * SR)
+
+def sine(seconds, amplitude, freq=220.0):
+    t = np.arange(int(seconds * SR)) / SR
+    return (amplitude * np.sin(2 * np.pi * freq * t)).astype(np.float32)
+
+def levels(*spans):
+    """Per-frame levels from (frames, dBFS) spans."""
+    return np.concatenate([np.full(frames, db, dtype=np.float64) for frames, db in spans])
+
+def seconds(frames):
+    return pytest.approx(frames * FRAME_SECONDS)
+
+def test_frame_levels_match_sine_rms():
+    db = frame_levels_db([sine(1.0, 0.5, freq=1000.0)], SR)
+    assert len(db) == int(1.0 / FRAME_SECONDS)
+    # RMS of a sine is amplitude / sqrt(2)
+    np.testing.assert_allclose(db, 20 * np.log10(0.5 / np.sqrt(2)), atol=0.1)
+
+def test_frame_levels_carry_partial_frames_across_blocks():
+    audio = sine(2.0, 0.3) + np.linspace(0, 0.2, 2 * SR, dtype=np.float32)
+    whole = frame_levels_db([audio], SR)
+    cuts = [0, 7, FRAME + 3, 5000, 5001, 17777, len(audio)]
+    blocks = [audio[a:b] for a, b in zip(cuts, cuts[1:])]
+    np.testing.assert_allclose(frame_levels_db(blocks, SR), whole)
+    # The trailing partial frame is dropped
+    assert len(whole) == len(audio) // FRAME
+
+def test_frame_levels_of_silence_and_nothing():
+    assert frame_levels_db([np.zeros(FRAME * 4, dtype=np.float32)], SR).tolist() == [-200.0] * 4
+    assert len(frame_levels_db([], SR)) == 0
+    assert len(frame_levels_db([np.zeros(FRAME - 1, dtype=np.float32)], SR)) == 0
+
+def test_segments_found_above_the_noise_floor():
+    segments = segments_from_levels(levels((60, -45), (50, -20), (100, -45), (30, -25), (40, -45)))
+    assert segments == [(seconds(60), seconds(110)), (seconds(210), seconds(240))]
+
+def test_short_gaps_are_bridged_and_blips_dropped():
+    gap = int(MAX_GAP_SECONDS / FRAME_SECONDS) - 1
+    blip = int(MIN_SEGMENT_SECONDS / FRAME_SECONDS) - 1
+    segments = segments_from_levels(levels((40, -60), (20, -20), (gap, -60), (20, -20), (60, -60),
+                                           (blip, -20), (60, -60)))
+    assert segments == [(seconds(40), seconds(80 + gap))]
+
+def test_long_gaps_split_segments():
+    gap = int(MAX_GAP_SECONDS / FRAME_SECONDS) + 2
+    segments = segments_from_levels(levels((40, -60), (20, -20), (gap, -60), (20, -20), (60, -60)))
+    assert segments == [(seconds(40), seconds(60)), (seconds(60 + gap), seconds(80 + gap))]
+
+def test_speech_running_to_the_end_is_closed():
+    segments = segments_from_levels(levels((100, -60), (30, -20)))
+    assert segments == [(seconds(100), seconds(130))]
+
+def test_absolute_floor_rejects_quiet_recordings():
+    # 20 dB over the noise floor, but the whole call is below ABSOLUTE_FLOOR_DB
+    assert segments_from_levels(levels((60, -90), (60, -70), (60, -90))) == []
+    assert segments_from_levels(np.empty(0)) == []
+
+def test_end_to_end_on_a_synthetic_call():
+    audio = np.concatenate([sine(1.0, 0.001), sine(2.0, 0.4), sine(1.5, 0.001), sine(1.0, 0.3), sine(0.5, 0.001)])
+    segments = segments_from_levels(frame_levels_db([audio[:12345], audio[12345:]], SR))
+    assert len(segments) == 2
+    assert segments[0] == pytest.approx((1.0, 3.0), abs=FRAME_SECONDS)
+    assert segments[1] == pytest.approx((4.5, 5.5), abs=FRAME_SECONDS)
+
+@pytest.mark.parametrize('row, expected', [
+    ({}, True),
+    ({'speech_seconds': float('nan'), 'speech_ratio': float('nan')}, True),
+    ({'speech_seconds': vad.MIN_SPEECH_SECONDS, 'speech_ratio': vad.MIN_SPEECH_RATIO}, True),
+    ({'speech_seconds': vad.MIN_SPEECH_SECONDS - 0.1, 'speech_ratio': 0.5}, False),
+    ({'speech_seconds': 60.0, 'speech_ratio': vad.MIN_SPEECH_RATIO / 2}, False),
+])
+def test_has_speech(row, expected):
+    assert has_speech(row) is expected
@@ -0,0 +1,160 @@
+import json
+import pytest
+
+pytest.importorskip('numpy')
+pytest.importorskip('pandas')
+
+import llm_backend
+import validator_engine
+from validator_engine import SOURCES, plan_batches, parse_batch_verdicts, request_for, merge_reply
+
+SOURCE = SOURCES['sarvam']
+
+def make_row(sample_id, words=20, caste='Kapu'):
+    return {'sample_id': sample_id, 'transcript': ' '.join(['సమస్య'] * words),
+            'Q1': 'రోడ్లు', 'Caste': caste, 'Age': '41-59'}
+
+class FakeBackend:
+    """complete() that records every request and answers VALID, or with a canned reply."""
+    model = 'gpt-4o'
+    cache = None
+
+    def __init__(self, reply=None):
+        self.reply = reply
+        self.calls = []
+
+    def complete(self, messages, response_format=None, max_tokens=None, validate=None):
+        self.calls.append(messages)
+        return self.reply or json.dumps({'is_valid': True, 'reason': 'ok'})
+
+# --- plan_batches ---
+
+def batch_tokens(batch):
+    request = request_for(SOURCE, [row for _, row in batch])
+    return llm_backend.estimate_tokens(request['messages']) + validator_engine.VERDICT_TOKENS * len(batch)
+
+def test_plan_batches_keeps_order_and_every_record():
+    rows = list(enumerate(make_row(f"s{i}") for i in range(30)))
+    batches = plan_batches(SOURCE, rows, budget=100000, max_records=7)
+    assert [i for batch in batches for i, _ in batch] == list(range(30))
+    assert [len(batch) for batch in batches] == [7, 7, 7, 7, 2]
+
+def test_plan_batches_fits_the_token_budget():
+    rows = list(enumerate(make_row(f"s{i}", words=20 + 40 * (i % 5)) for i in range(40)))
+    budget = 3000
+    batches = plan_batches(SOURCE, rows, budget=budget, max_records=100)
+    assert len(batches) > 1
+    for batch in batches:
+        assert len(batch) == 1 or batch_tokens(batch) <= budget
+
+def test_plan_batches_gives_oversized_record_its_own_batch():
+    rows = [(0, make_row('small')), (1, make_row('huge', words=5000)), (2, make_row('small2'))]
+    batches = plan_batches(SOURCE, rows, budget=2000, max_records=25)
+    assert [[i for i, _ in batch] for batch in batches] == [[0], [1], [2]]
+
+def test_plan_batches_splits_repeated_sample_ids():
+    rows = [(0, make_row('a')), (1, make_row('b')), (2, make_row('a'))]
+    batches = plan_batches(SOURCE, rows, budget=100000, max_records=25)
+    assert [[i for i, _ in batch] for batch in batches] == [[0, 1], [2]]
+
+# --- parse_batch_verdicts / merge_reply ---
+
+def test_parse_batch_verdicts_reads_results_and_drops_bad_entries():
+    reply = json.dumps({'results': [
+        {'sample_id': 1, 'is_valid': True, 'reason': 'asked everything'},
+        {'sample_id': 'b', 'is_valid': False},
+        {'sample_id': 'c', 'is_valid': 'yes', 'reason': 'not a boolean'},
+        {'is_valid': True, 'reason': 'no id'},
+        'garbage',
+    ]})
+    assert parse_batch_verdicts(reply) == {'1': (True, 'asked everything'), 'b': (False, 'No reason provided')}
+
+def test_parse_batch_verdicts_accepts_bare_list_and_code_fence():
+    reply = '```json\n[{"sample_id": "a", "is_valid": false, "reason": "r"}]\n```'
+    assert parse_batch_verdicts(reply) == {'a': (False, 'r')}
+    assert parse_batch_verdicts('{"results": "nope"}') == {}
+
+def test_request_validators_reject_replies_not_worth_caching():
+    rows = [make_row('a'), make_row('b')]
+    request_for(SOURCE, rows[:1])['validate']('{"is_valid": false, "reason": "r"}')
+    for bad in ('{"is_valid": fal', '{"reason": "no verdict"}', '["not a dict"]'):
+        with pytest.raises(Exception):
+            request_for(SOURCE, rows[:1])['validate'](bad)
+
+    check = request_for(SOURCE, rows)['validate']
+    check(json.dumps({'results': [{'sample_id': 'a', 'is_valid': True}, {'sample_id': 'b', 'is_valid': False}]}))
+    with pytest.raises(ValueError):
+        check(json.dumps({'results': [{'sample_id': 'a', 'is_valid': True}]}))
+
+def test_merge_reply_validates_missing_records_singly():
+    batch = [(0, make_row('a')), (1, make_row('b')), (2, make_row('c'))]
+    reply = json.dumps({'results': [{'sample_id': 'a', 'is_valid': False, 'reason': 'r'},
+                                    {'sample_id': 'c', 'is_valid': True, 'reason': 'r'}]})
+    backend = FakeBackend()
+    results = merge_reply(SOURCE, backend, batch, reply)
+    assert results == [(0, (False, 'r')), (1, (True, 'ok')), (2, (True, 'r'))]
+    assert len(backend.calls) == 1
+    assert 'Sample ID: b' in backend.calls[0][1]['content']
+
+def test_merge_reply_falls_back_on_failed_request():
+    batch = [(0, make_row('a')), (1, make_row('b'))]
+    backend = FakeBackend()
+    assert merge_reply(SOURCE, backend, batch, None) == [(0, (True, 'ok')), (1, (True, 'ok'))]
+    assert len(backend.calls) == 2
+
+# --- Checkpoint resume ---
+
+def test_checkpoint_round_trip(tmp_path):
+    checkpoint = validator_engine.Checkpoint(str(tmp_path / 'c.csv'), SOURCE, 'gpt-4o')
+    rows = [make_row('a'), make_row(7)]
+    checkpoint.append([(rows[0], True, 'fine, with a comma', 'llm'), (rows[1], False, 'no', 'llm')])
+    done = checkpoint.load()
+    assert done[checkpoint.key(rows[0])] == (True, 'fine, with a comma', 'llm')
+    assert done[checkpoint.key(rows[1])] == (False, 'no', 'llm')
+
+def test_checkpoint_misses_when_the_request_changes(tmp_path):
+    path = str(tmp_path / 'c.csv')
+    checkpoint = validator_engine.Checkpoint(path, SOURCE, 'gpt-4o')
+    row = make_row('a')
+    checkpoint.append([(row, True, 'ok', 'llm')])
+    done = checkpoint.load()
+    # Corrected reported answers or transcript re-render the prompt
+    assert checkpoint.key(make_row('a', caste='Mala')) not in done
+    assert checkpoint.key(make_row('a', words=21)) not in done
+    # Another model or source prompt is another prompt version
+    assert validator_engine.Checkpoint(path, SOURCE, 'gpt-4o-mini').load() == {}
+    assert validator_engine.Checkpoint(path, SOURCES['whisper'], 'gpt-4o').load() == {}
+
+def test_checkpoint_ignores_entries_without_request_hash(tmp_path):
+    path = tmp_path / 'c.csv'
+    checkpoint = validator_engine.Checkpoint(str(path), SOURCE, 'gpt-4o')
+    path.write_text("sample_id,prompt_version,llm_is_valid,llm_reason,validation_tier\n"
+                    f"a,{checkpoint.version},True,ok,llm\n", encoding='utf-8')
+    assert checkpoint.load() == {}
+
+def test_validate_resumes_from_checkpoint(tmp_path):
+    import pandas as pd
+    source = validator_engine.TranscriptSource('test', 'in.csv', 'out.csv', "(test)")
+    source.transcript_path = str(tmp_path / 'in.csv')
+    source.output_path = str(tmp_path / 'out.csv')
+    pd.DataFrame([make_row(f"s{i}") for i in range(5)]).to_csv(source.transcript_path, index=False)
+
+    backend = FakeBackend()
+    validator_engine.validate(source, backend, workers=2, rules=False)
+    assert len(backend.calls) == 5
+
+    # A rerun pays for nothing; a corrected record is validated again
+    df = pd.read_csv(source.transcript_path)
+    df.loc[2, 'Caste'] = 'Mala'
+    df.to_csv(source.transcript_path, index=False)
+    backend = FakeBackend()
+    validator_engine.validate(source, backend, workers=2, rules=False)
+    assert len(backend.calls) == 1
+    assert 'Mala' in backend.calls[0][1]['content']
+    results = pd.read_csv(source.output_path)
+    assert results['llm_is_valid'].tolist() == [True] * 5
+    assert results['validation_tier'].tolist() == ['llm'] * 5
+
+    backend = FakeBackend()
+    validator_engine.validate(source, backend, workers=2, rules=False, resume=False)
+    assert len(backend.calls) == 5
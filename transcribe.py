@@ -0,0 +1,229 @@
+import os
+import sys
+import inspect
+import time
+import random
+import asyncio
+import concurrent.futures
+import pandas as pd
+import framework_config as config
+import audio_store
+import asr_engine
+import rate_limiter
+import transcript_cache
+import vad
+
+# Single transcription driver for every AsrEngine.
+# Usage: python transcribe.py <engine> [--workers N] [--int8] [--async]
+#   engines: whisper, enhanced_whisper, indic, indic_whisper, sarvam
+#   --async: asyncio mode for API engines (whisper, enhanced_whisper), scheduled
+#            against the engine's requests/min and audio seconds/min quota
+RETRY_BASE_SECONDS = 2.0
+CHECKPOINT_EVERY = 10   # Rewrite the output CSV after this many completed batches
+RESULT_QUEUE_SIZE = 64  # Async mode: finished transcripts waiting for the writer
+
+def output_path(engine):
+    suffix = f"_{engine.output_name}" if engine.output_name else ""
+    return os.path.join(config.AUDIO_DOWNLOAD_DIR, f"transcribed_metadata{suffix}.csv")
+
+def _retry_later(engine, items, attempt):
+    # Jittered exponential backoff, run on the worker thread
+    time.sleep(RETRY_BASE_SECONDS * (2 ** attempt) * (0.5 + random.random()))
+    return engine.transcribe_batch(items)
+
+def run_items(engine, items, max_in_flight, on_batch_done=None, on_result=None):
+    """
+    Runs items through the engine with at most max_in_flight batches outstanding.
+    Items that come back as an Exception are retried individually up to engine.max_retries.
+    on_result(item, transcript) is called as each item finishes. Returns key -> transcript.
+    """
+    size = engine.batch_size or max(len(items), 1)
+    batches = [(items[i:i + size], 0) for i in range(0, len(items), size)]
+    results = {}
+    done_batches = 0
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_in_flight) as executor:
+        in_flight = {}
+
+        def refill():
+            while batches and len(in_flight) < max_in_flight:
+                batch, attempt = batches.pop(0)
+                if attempt == 0:
+                    future = engine.submit_batch(batch, executor)
+                else:
+                    future = executor.submit(_retry_later, engine, batch, attempt)
+                in_flight[future] = (batch, attempt)
+
+        refill()
+        while in_flight:
+            finished, _ = concurrent.futures.wait(in_flight, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in finished:
+                batch, attempt = in_flight.pop(future)
+                try:
+                    outputs = future.result()
+                except Exception as e:
+                    outputs = [e] * len(batch)
+
+                for item, output in zip(batch, outputs):
+                    if isinstance(output, Exception):
+                        if attempt < engine.max_retries:
+                            print(f"Retrying {item['sample_id']} (attempt {attempt+2}): {output}")
+                            batches.append(([item], attempt + 1))
+                            continue
+                        print(f"Error transcribing {item['sample_id']}: {output}")
+                        output = f"ERROR: {str(output)}"
+                    results[item['key']] = output
+                    if on_result:
+                        on_result(item, output)
+
+                done_batches += 1
+                print(f"[{len(results)}/{len(items)}] files transcribed")
+                if on_batch_done and done_batches % CHECKPOINT_EVERY == 0:
+                    on_batch_done(results)
+            refill()
+
+    return results
+
+async def _transcribe_with_retries(engine, item, limiter):
+    """One item through engine.transcribe_async, retrying rate limits / transient errors."""
+    for attempt in range(engine.async_max_retries + 1):
+        await limiter.acquire_async(requests=1, audio_seconds=engine.audio_seconds(item))
+        try:
+            return await engine.transcribe_async(item)
+        except Exception as e:
+            if attempt >= engine.async_max_retries or not rate_limiter.is_retryable(e):
+                print(f"Error transcribing {item['sample_id']}: {e}")
+                return f"ERROR: {str(e)}"
+            retry_after = rate_limiter.retry_after_seconds(e)
+            if retry_after:
+                # The quota is shared, so every request waits, not just this one
+                limiter.pause(retry_after)
+            delay = rate_limiter.backoff_seconds(attempt, retry_after)
+            print(f"Retrying {item['sample_id']} in {delay:.1f}s (attempt {attempt+2}): {e}")
+            await asyncio.sleep(delay)
+
+async def _run_items_async(engine, items, max_in_flight, on_batch_done, on_result):
+    limiter = rate_limiter.RateLimiter(requests=engine.requests_per_minute,
+                                       audio_seconds=engine.audio_seconds_per_minute)
+    pending = asyncio.Queue()
+    for item in items:
+        pending.put_nowait(item)
+    # Bounded: if the writer falls behind, workers stop taking new requests
+    finished = asyncio.Queue(maxsize=RESULT_QUEUE_SIZE)
+    results = {}
+
+    async def worker():
+        while not pending.empty():
+            item = pending.get_nowait()
+            await finished.put((item, await _transcribe_with_retries(engine, item, limiter)))
+
+    async def writer():
+        while True:
+            entry = await finished.get()
+            if entry is None:
+                return
+            item, output = entry
+            results[item['key']] = output
+            if on_result:
+                on_result(item, output)
+            print(f"[{len(results)}/{len(items)}] files transcribed")
+            if on_batch_done and len(results) % CHECKPOINT_EVERY == 0:
+                on_batch_done(results)
+
+    writer_task = asyncio.create_task(writer())
+    await asyncio.gather(*(worker() for _ in range(min(max_in_flight, len(items)))))
+    await finished.put(None)
+    await writer_task
+    return results
+
+def run_items_async(engine, items, max_in_flight, on_batch_done=None, on_result=None):
+    """
+    asyncio counterpart of run_items for engines with transcribe_async: up to max_in_flight
+    concurrent requests, paced by a token bucket over the engine's requests_per_minute and
+    audio_seconds_per_minute. Each result is handed to on_result as it arrives.
+    """
+    return asyncio.run(_run_items_async(engine, items, max_in_flight, on_batch_done, on_result))
+
+def run_engine(engine, max_in_flight=None, use_async=False):
+    metadata_path = os.path.join(config.AUDIO_DOWNLOAD_DIR, engine.metadata_file)
+    if not os.path.exists(metadata_path):
+        print(f"Metadata file not found: {metadata_path}")
+        return
+
+    if use_async and type(engine).transcribe_async is asr_engine.AsrEngine.transcribe_async:
+        print(f"Engine {engine.name} has no async mode.")
+        return
+
+    df = pd.read_csv(metadata_path)
+    max_in_flight = max_in_flight or (engine.async_in_flight if use_async else engine.max_in_flight)
+    print(f"Transcribing {len(df)} files with {engine.name} ({engine.model_id}), {max_in_flight} in flight...")
+
+    transcripts = [None] * len(df)
+    row_keys = {}  # position -> audio key
+    items = {}     # audio key -> item; rows sharing audio share one transcription
+
+    for position, (index, row) in enumerate(df.iterrows()):
+        filepath = engine.audio_path(row)
+        sample_id = row['sample_id']
+        key = audio_store.audio_key(row)
+
+        if not vad.has_speech(row):
+            # Silent / near-empty recording: don't spend ASR time on it
+            transcripts[position] = vad.NO_SPEECH
+            continue
+        if not os.path.exists(filepath):
+            print(f"File not found: {filepath}")
+            transcripts[position] = "ERROR: File not found"
+            continue
+
+        row_keys[position] = key
+        items.setdefault(key, {'key': key, 'filepath': filepath, 'row': row, 'sample_id': sample_id})
+
+    output_csv = output_path(engine)
+
+    def write(results):
+        for position, key in row_keys.items():
+            transcripts[position] = results.get(key, "PENDING")
+        df['transcript'] = transcripts
+        for column in engine.stat_columns:
+            df[column] = [engine.item_stats(row_keys[position]).get(column) if position in row_keys else None
+                          for position in range(len(df))]
+        df.to_csv(output_csv, index=False)
+
+    # Persistent cache: only audio/engine/model/params combinations not seen before are run
+    cache = transcript_cache.TranscriptCache()
+    cache_args = (engine.name, engine.model_id, engine.language, engine.params())
+    results = {}
+    for key, item in items.items():
+        item['audio_hash'] = cache.audio_hash(item['filepath'], item['row'])
+        cached = cache.get(item['audio_hash'], *cache_args)
+        if cached is not None:
+            results[key] = cached
+    pending = [item for key, item in items.items() if key not in results]
+
+    def remember(item, transcript):
+        cache.put(item['audio_hash'], *cache_args, transcript)
+
+    print(f"{len(items)} distinct files: {len(results)} cached, {len(pending)} to transcribe "
+          f"({len(df) - len(row_keys)} rows skipped).")
+    runner = run_items_async if use_async else run_items
+    results.update(runner(engine, pending, max_in_flight,
+                          on_batch_done=lambda done: write({**results, **done}), on_result=remember))
+    write(results)
+    print(f"Transcription complete. Saved to {output_csv}")
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] not in asr_engine.ENGINES:
+        print(f"Usage: python transcribe.py <{'|'.join(asr_engine.ENGINES)}> [--workers N] [--int8] [--async]")
+        sys.exit(1)
+
+    engine_cls = asr_engine.ENGINES[sys.argv[1]]
+    kwargs = {}
+    if '--int8' in sys.argv:
+        # Only the local model engines have a backend to quantize
+        if 'backend' not in inspect.signature(engine_cls.__init__).parameters:
+            print(f"--int8 is not supported by the {engine_cls.name} engine")
+            sys.exit(1)
+        kwargs['backend'] = 'int8'
+    workers = int(sys.argv[sys.argv.index('--workers') + 1]) if '--workers' in sys.argv else None
+    run_engine(engine_cls(**kwargs), max_in_flight=workers, use_async='--async' in sys.argv)
@@ -1,111 +1,134 @@
-import os
-import pandas as pd
 import torch
-import av
-import numpy as np
-from transformers import Wav2Vec2ForCTC, Wav2Vec2Processor
-import framework_config as config
+import asr_backend
+import asr_engine
+import audio_decode
+import pcm_cache
+import transcribe
 
 # Model ID
 # Using a well-known Telugu Wav2Vec2 fine-tune
 MODEL_ID = "anuragshas/wav2vec2-large-xlsr-53-telugu" 
 
-def load_audio_av(filepath):
-    """Loads audio using PyAV, resamples to 16kHz, and converts to torch tensor."""
-    try:
-        container = av.open(filepath)
-        audio_stream = container.streams.audio[0]
-        
-        # Configure resampler for 16kHz mono
-        resampler = av.AudioResampler(format='fltp', layout='mono', rate=16000)
-        
-        audio_frames = []
-        for frame in container.decode(audio_stream):
-            # Resample on the fly using AV's resampler
-            frame.pts = None # Ignore PTS to avoid warning
-            resampled_frames = resampler.resample(frame)
-            for r_frame in resampled_frames:
-                audio_frames.append(r_frame.to_ndarray())
-        
-        # Flush the resampler
-        resampled_frames = resampler.resample(None)
-        if resampled_frames:
-             for r_frame in resampled_frames:
-                audio_frames.append(r_frame.to_ndarray())
+# Batched inference settings
+BATCH_SIZE = 8              # Max utterances/windows per forward pass
+MAX_BATCH_SECONDS = 160     # Cap on padded audio per batch (batch size x longest item)
+WINDOW_SECONDS = 20         # Longer files are split into windows of this length...
+STRIDE_SECONDS = 2          # ...each with this much context either side, trimmed after inference
+SAMPLE_RATE = audio_decode.SAMPLE_RATE
 
-        if not audio_frames:
-             return None, None
-             
-        # Concatenate all frames (they are [1, samples] or [samples])
-        # av returns [1, samples] for mono usually
-        audio_data = np.concatenate(audio_frames, axis=1) # Concatenate along time dimension
-        
-        return torch.from_numpy(audio_data), 16000
-    except Exception as e:
-        print(f"AV Load Error for {filepath}: {e}")
-        return None, None
+def plan_items(jobs):
+    """
+    Splits jobs into inference items (job_idx, start, end, left_ctx, right_ctx) in samples.
+    Files up to WINDOW_SECONDS are one item; longer ones become strided windows whose
+    context regions are dropped from the logits so the cores tile [0, samples) exactly.
+    Lengths come from job['samples'], the decoded length (container headers can be off).
+    """
+    window = WINDOW_SECONDS * SAMPLE_RATE
+    stride = STRIDE_SECONDS * SAMPLE_RATE
+    items = []
+    for job_idx, job in enumerate(jobs):
+        total = job['samples']
+        if total == 0:
+            continue
+        if total <= window + 2 * stride:
+            items.append((job_idx, 0, total, 0, 0))
+            continue
+        for core_start in range(0, total, window):
+            core_end = min(core_start + window, total)
+            start = max(core_start - stride, 0)
+            # The context may be cut short by the end of the file (a last core shorter than the stride)
+            end = min(core_end + stride, total)
+            items.append((job_idx, start, end, core_start - start, end - core_end))
+    return items
 
-def transcribe_samples_indic():
-    metadata_path = os.path.join(config.AUDIO_DOWNLOAD_DIR, 'downloaded_metadata.csv')
-    if not os.path.exists(metadata_path):
-        print("Metadata file not found. Run downloader first.")
-        return
+def item_seconds(item):
+    _, start, end, _, _ = item
+    return (end - start) / SAMPLE_RATE
 
-    print(f"Loading Model: {MODEL_ID}...")
-    try:
-        processor = Wav2Vec2Processor.from_pretrained(MODEL_ID)
-        model = Wav2Vec2ForCTC.from_pretrained(MODEL_ID)
-    except Exception as e:
-        print(f"Error loading model: {e}")
-        return
+def make_batches(items):
+    """Length-bucketed batches: items sorted by duration, cut by BATCH_SIZE and MAX_BATCH_SECONDS."""
+    ordered = sorted(items, key=item_seconds)
+    batches, current = [], []
+    for item in ordered:
+        longest = item_seconds(item)
+        if current and (len(current) >= BATCH_SIZE or (len(current) + 1) * longest > MAX_BATCH_SECONDS):
+            batches.append(current)
+            current = []
+        current.append(item)
+    if current:
+        batches.append(current)
+    return batches
 
-    df = pd.read_csv(metadata_path)
-    print(f"Transcribing {len(df)} files...")
+def transcribe_batched(jobs, processor, model):
+    """
+    Transcribes jobs ({'row', 'filepath'}) with padded, attention-masked batches.
+    Returns one transcript (or 'ERROR: ...') per job.
+    """
+    pieces = [[] for _ in jobs]  # job_idx -> [(start, predicted ids)]
+    errors = {}
 
-    transcripts = []
+    # Decode (or map from the PCM cache) up front so windows are planned from the real length
+    for job_idx, job in enumerate(jobs):
+        audio, _ = pcm_cache.load_audio(job['row'], job['filepath'])
+        if audio is None:
+            errors[job_idx] = "ERROR: Failed to load audio with AV"
+        job['samples'] = 0 if audio is None else len(audio)
 
-    for index, row in df.iterrows():
-        filepath = row['file_path']
-        sample_id = row['sample_id']
-        
-        if not os.path.exists(filepath):
-            print(f"File not found: {filepath}")
-            transcripts.append("ERROR: File not found")
+    items = plan_items(jobs)
+    batches = make_batches(items)
+    print(f"Running {len(items)} items in {len(batches)} batches (<= {BATCH_SIZE} per batch)...")
+
+    for b, batch in enumerate(batches):
+        arrays, kept = [], []
+        for item in batch:
+            job_idx, start, end, left_ctx, right_ctx = item
+            if job_idx in errors:
+                continue
+            # Served from the decoded PCM cache (decoded once, then memmap views)
+            audio, _ = pcm_cache.load_audio(jobs[job_idx]['row'], jobs[job_idx]['filepath'])
+            segment = audio[start:end]
+            if len(segment) == 0:
+                continue
+            arrays.append(segment)
+            kept.append(item)
+        if not arrays:
             continue
 
-        print(f"Transcribing {sample_id} ({row['ground_truth_validity']})...")
-        
         try:
-            # Load audio using AV
-            waveform, sample_rate = load_audio_av(filepath)
-            
-            if waveform is None:
-                raise Exception("Failed to load audio with AV")
+            inputs = processor(arrays, sampling_rate=SAMPLE_RATE, padding=True,
+                               return_attention_mask=True, return_tensors="pt")
+            with torch.inference_mode():
+                logits = model(inputs.input_values, attention_mask=inputs.attention_mask).logits
+            predicted_ids = torch.argmax(logits, dim=-1)
+            valid_frames = model._get_feat_extract_output_lengths(inputs.attention_mask.sum(-1))
+            frames_per_sample = logits.shape[1] / inputs.input_values.shape[1]
 
-            # Waveform should be [1, N]
-            # Squeeze to 1D array for processor
-            input_values = processor(waveform.squeeze().numpy(), return_tensors="pt", sampling_rate=16000).input_values
+            for row_idx, (job_idx, start, end, left_ctx, right_ctx) in enumerate(kept):
+                n_valid = int(valid_frames[row_idx])
+                left = int(round(left_ctx * frames_per_sample))
+                right = int(round(right_ctx * frames_per_sample))
+                pieces[job_idx].append((start, predicted_ids[row_idx, left:max(n_valid - right, left)]))
+        except Exception as e:
+            print(f"Error in batch {b+1}: {e}")
+            for job_idx, *_ in kept:
+                errors[job_idx] = f"ERROR: {str(e)}"
 
-            # Inference
-            with torch.no_grad():
-                logits = model(input_values).logits
+        print(f"  Batch {b+1}/{len(batches)}: {len(kept)} items")
 
-            # Decode
-            predicted_ids = torch.argmax(logits, dim=-1)
-            transcription = processor.batch_decode(predicted_ids)[0]
-            
-            print(f"Transcript: {transcription[:50]}...")
-            transcripts.append(transcription)
-            
-        except Exception as e:
-            print(f"Error transcribing {sample_id}: {e}")
-            transcripts.append(f"ERROR: {str(e)}")
+    transcripts = []
+    for job_idx, job in enumerate(jobs):
+        if job_idx in errors or not pieces[job_idx]:
+            transcripts.append(errors.get(job_idx, ""))
+            continue
+        # Windows are stitched in time order before CTC decoding
+        ids = torch.cat([p for _, p in sorted(pieces[job_idx], key=lambda piece: piece[0])])
+        transcripts.append(processor.decode(ids))
+    return transcripts
 
-    # Save to a NEW metadata file for the validator to pick up
-    df['transcript'] = transcripts
-    output_csv = os.path.join(config.AUDIO_DOWNLOAD_DIR, 'transcribed_metadata_indic.csv')
-    df.to_csv(output_csv, index=False)
-    print(f"Transcription complete. Saved to {output_csv}")
+def transcribe_samples_indic(backend='fp32'):
+    # Telugu wav2vec2 over downloaded_metadata.csv -> transcribed_metadata_indic[_int8].csv
+    transcribe.run_engine(asr_engine.IndicWav2Vec2Engine(backend=backend))
 
 if __name__ == "__main__":
-    transcribe_samples_indic()
+    # Usage: python transcribe_indic.py [--int8]
+    transcribe_samples_indic(backend=asr_backend.backend_from_argv())
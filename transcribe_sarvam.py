@@ -1,47 +1,18 @@
-import av
 import io
 import os
 import pandas as pd
-from sarvamai import SarvamAI
 import framework_config as config
+import audio_decode
+import audio_store
+import transcript_cache
+import transcribe_sarvam_batch
+import vad
 
 def load_audio_wav_bytes(filepath):
-    """Loads audio using PyAV and converts to WAV bytes."""
+    """Loads audio using PyAV and converts to 16kHz mono WAV bytes."""
     try:
-        # Open the file with PyAV
-        container = av.open(filepath)
-        audio_stream = container.streams.audio[0]
-        
-        # Resample to 16kHz mono
-        resampler = av.AudioResampler(format='s16', layout='mono', rate=16000)
-        
-        # Output buffer
         output_buffer = io.BytesIO()
-        
-        # Create a WAV container for the output buffer
-        output_container = av.open(output_buffer, mode='w', format='wav')
-        # Pass layout='mono' to add_stream
-        output_stream = output_container.add_stream('pcm_s16le', rate=16000, layout='mono')
-        # output_stream.channels = 1 # Removed logic causing error
-        
-        for frame in container.decode(audio_stream):
-            frame.pts = None
-            resampled_frames = resampler.resample(frame)
-            for r_frame in resampled_frames:
-                for packet in output_stream.encode(r_frame):
-                    output_container.mux(packet)
-                    
-        # Flush
-        resampled_frames = resampler.resample(None)
-        if resampled_frames:
-             for r_frame in resampled_frames:
-                for packet in output_stream.encode(r_frame):
-                    output_container.mux(packet)
-
-        for packet in output_stream.encode(None): # Flush stream
-            output_container.mux(packet)
-            
-        output_container.close()
+        audio_decode.transcode(filepath, output_buffer)
         return output_buffer.getvalue()
         
     except Exception as e:
@@ -57,7 +28,7 @@ def transcribe_sarvam():
     print("Initializing Sarvam AI Client...")
     try:
         # Correct init argument based on inspection
-        client = SarvamAI(api_subscription_key=config.SARVAM_API_KEY)
+        client = transcribe_sarvam_batch.make_client()
     except Exception as e:
         print(f"Error initializing Sarvam Client: {e}")
         return
@@ -66,16 +37,41 @@ def transcribe_sarvam():
     print(f"Transcribing {len(df)} files with Sarvam AI...")
 
     transcripts = []
+    # audio key -> transcript, so duplicate audio is only decoded once
+    done = {}
+    # Persistent across runs: audio already transcribed with these settings is never re-sent
+    cache = transcript_cache.TranscriptCache()
+    cache_args = ('sarvam_sync', 'saaras:v3', 'te-IN', {'mode': 'transcribe'})
 
     for index, row in df.iterrows():
-        filepath = row['file_path']
+        filepath = audio_store.resolve_upload_audio(row)
         sample_id = row['sample_id']
-        
+        key = audio_store.audio_key(row)
+
+        if key in done:
+            print(f"Reusing transcript for {sample_id} (duplicate audio)")
+            transcripts.append(done[key])
+            continue
+
+        if not vad.has_speech(row):
+            # Silent / near-empty recording: don't spend ASR time on it
+            print(f"Skipping {sample_id}: no speech detected")
+            transcripts.append(vad.NO_SPEECH)
+            continue
+
         if not os.path.exists(filepath):
             print(f"File not found: {filepath}")
             transcripts.append("ERROR: File not found")
             continue
 
+        audio_hash = cache.audio_hash(filepath, row)
+        cached = cache.get(audio_hash, *cache_args)
+        if cached is not None:
+            print(f"Cached transcript for {sample_id}")
+            transcripts.append(cached)
+            done[key] = cached
+            continue
+
         print(f"Transcribing {sample_id} ({row['ground_truth_validity']})...")
         
         try:
@@ -96,6 +92,8 @@ def transcribe_sarvam():
             transcript = result.transcript
             print(f"Transcript: {transcript[:50]}...")
             transcripts.append(transcript)
+            done[key] = transcript
+            cache.put(audio_hash, *cache_args, transcript)
             
         except Exception as e:
             print(f"Error transcribing {sample_id}: {e}")
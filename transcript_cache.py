@@ -0,0 +1,71 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+import framework_config as config
+import audio_store
+
+# Persistent transcript cache shared by every transcription path.
+# Keyed by (content hash of the audio actually sent, engine, model id, language, params),
+# so reruns, crash recovery and A/B comparisons only pay for audio/model combos not seen before.
+CACHE_PATH = os.path.join(config.AUDIO_DOWNLOAD_DIR, 'transcript_cache.sqlite')
+
+# Results that describe a failure rather than the audio are never cached
+UNCACHEABLE_PREFIXES = ("ERROR", "TRANSCRIPT_NOT_FOUND", "OUTPUT_MISSING", "READ_ERROR", "PENDING")
+
+class TranscriptCache:
+    def __init__(self, path=CACHE_PATH):
+        self._lock = threading.Lock()
+        self._hashes = {} # (path, size, mtime) -> sha256
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS transcripts (
+                audio_hash TEXT NOT NULL,
+                engine TEXT NOT NULL,
+                model_id TEXT NOT NULL,
+                language TEXT NOT NULL,
+                params TEXT NOT NULL,
+                transcript TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (audio_hash, engine, model_id, language, params)
+            )
+        """)
+        self.conn.commit()
+
+    def audio_hash(self, filepath, row=None):
+        """
+        Content hash of the file being transcribed. Raw blobs are named by their hash, so
+        this only reads the file for derived audio (enhanced / compacted / legacy paths).
+        """
+        if row is not None:
+            known = row.get('audio_hash')
+            if isinstance(known, str) and known and os.path.basename(filepath).startswith(known + '.'):
+                return known
+        stat = os.stat(filepath)
+        memo_key = (filepath, stat.st_size, stat.st_mtime)
+        if memo_key not in self._hashes:
+            self._hashes[memo_key] = audio_store.file_sha256(filepath)
+        return self._hashes[memo_key]
+
+    @staticmethod
+    def _key(audio_hash, engine, model_id, language, params):
+        return (audio_hash, engine, model_id or '', language or '', json.dumps(params or {}, sort_keys=True))
+
+    def get(self, audio_hash, engine, model_id, language=None, params=None):
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT transcript FROM transcripts WHERE audio_hash=? AND engine=? AND model_id=? "
+                "AND language=? AND params=?",
+                self._key(audio_hash, engine, model_id, language, params)).fetchone()
+        return row[0] if row else None
+
+    def put(self, audio_hash, engine, model_id, language, params, transcript):
+        if not isinstance(transcript, str) or transcript.startswith(UNCACHEABLE_PREFIXES):
+            return
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO transcripts VALUES (?, ?, ?, ?, ?, ?, ?)",
+                self._key(audio_hash, engine, model_id, language, params) + (transcript, time.time()))
+            self.conn.commit()
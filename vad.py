@@ -0,0 +1,144 @@
+import os
+import sys
+import concurrent.futures
+import numpy as np
+import pandas as pd
+import framework_config as config
+import audio_store
+
+# Energy-based voice activity detection.
+# A frame is speech if its level is ENERGY_MARGIN_DB above the recording's noise floor
+# (a low percentile of frame levels) and above an absolute floor, which handles both
+# quiet rooms and constant background hiss. Short gaps are bridged and blips dropped.
+FRAME_SECONDS = 0.03
+NOISE_FLOOR_PERCENTILE = 10
+ENERGY_MARGIN_DB = 12.0
+ABSOLUTE_FLOOR_DB = -50.0     # dBFS; anything quieter is never speech
+MIN_SEGMENT_SECONDS = 0.2
+MAX_GAP_SECONDS = 0.3
+
+# Recordings below either threshold are skipped by the transcribe_* / validate_* scripts
+MIN_SPEECH_SECONDS = 3.0
+MIN_SPEECH_RATIO = 0.05
+NO_SPEECH = "NO_SPEECH"
+
+def frame_levels_db(frames_source, sample_rate):
+    """Per-frame RMS level in dBFS for an iterable of audio blocks."""
+    frame_len = int(FRAME_SECONDS * sample_rate)
+    levels = []
+    carry = np.empty(0, dtype=np.float32)
+    for block in frames_source:
+        block = np.concatenate([carry, block]) if len(carry) else block
+        usable = len(block) - len(block) % frame_len
+        if usable:
+            frames = block[:usable].reshape(-1, frame_len)
+            rms = np.sqrt(np.mean(frames.astype(np.float64) ** 2, axis=1))
+            levels.append(20 * np.log10(np.maximum(rms, 1e-10)))
+        carry = block[usable:]
+    if not levels:
+        return np.empty(0)
+    return np.concatenate(levels)
+
+def segments_from_levels(levels_db):
+    """Speech segments as [(start_s, end_s), ...] from per-frame levels."""
+    if len(levels_db) == 0:
+        return []
+    noise_floor = np.percentile(levels_db, NOISE_FLOOR_PERCENTILE)
+    threshold = max(noise_floor + ENERGY_MARGIN_DB, ABSOLUTE_FLOOR_DB)
+    active = levels_db > threshold
+
+    segments = []
+    start = None
+    for i, is_speech in enumerate(active):
+        if is_speech and start is None:
+            start = i
+        elif not is_speech and start is not None:
+            segments.append([start * FRAME_SECONDS, i * FRAME_SECONDS])
+            start = None
+    if start is not None:
+        segments.append([start * FRAME_SECONDS, len(active) * FRAME_SECONDS])
+
+    # Bridge short pauses, then drop blips
+    merged = []
+    for seg in segments:
+        if merged and seg[0] - merged[-1][1] <= MAX_GAP_SECONDS:
+            merged[-1][1] = seg[1]
+        else:
+            merged.append(seg)
+    return [(s, e) for s, e in merged if e - s >= MIN_SEGMENT_SECONDS]
+
+def analyze_speech(filepath):
+    """
+    Runs VAD over a file without holding the full waveform.
+    Returns dict(duration_seconds, speech_seconds, speech_ratio, segments) or None on decode failure.
+    """
+    # Imported here so validators can use has_speech() without PyAV installed
+    import audio_decode
+
+    try:
+        windows = audio_decode.iter_audio_windows(filepath)
+        levels = frame_levels_db(windows, audio_decode.SAMPLE_RATE)
+    except Exception as e:
+        print(f"VAD Error for {filepath}: {e}")
+        return None
+
+    segments = segments_from_levels(levels)
+    duration = len(levels) * FRAME_SECONDS
+    speech = sum(e - s for s, e in segments)
+    return {
+        'duration_seconds': round(duration, 2),
+        'speech_seconds': round(speech, 2),
+        'speech_ratio': round(speech / duration, 3) if duration > 0 else 0.0,
+        'segments': segments,
+    }
+
+def has_speech(row):
+    """False only if VAD ran on this row and found too little speech."""
+    speech_seconds = row.get('speech_seconds')
+    speech_ratio = row.get('speech_ratio')
+    if speech_seconds is None or pd.isna(speech_seconds):
+        return True
+    return speech_seconds >= MIN_SPEECH_SECONDS and speech_ratio >= MIN_SPEECH_RATIO
+
+def _analyze_worker(filepath):
+    result = analyze_speech(filepath)
+    if result is not None:
+        result.pop('segments')
+    return result
+
+def analyze_samples(workers=os.cpu_count()):
+    """Adds duration_seconds / speech_seconds / speech_ratio to downloaded_metadata.csv."""
+    metadata_path = os.path.join(config.AUDIO_DOWNLOAD_DIR, 'downloaded_metadata.csv')
+    if not os.path.exists(metadata_path):
+        print("Metadata file not found. Run downloader first.")
+        return
+
+    df = pd.read_csv(metadata_path)
+    print(f"Running VAD on {len(df)} files with {workers} workers...")
+
+    # One analysis per distinct audio
+    paths = {}
+    for index, row in df.iterrows():
+        filepath = audio_store.resolve_audio(row)
+        if os.path.exists(filepath):
+            paths.setdefault(audio_store.audio_key(row), filepath)
+
+    keys = list(paths)
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        results = dict(zip(keys, executor.map(_analyze_worker, [paths[k] for k in keys], chunksize=4)))
+
+    for column in ['duration_seconds', 'speech_seconds', 'speech_ratio']:
+        df[column] = [
+            (results.get(audio_store.audio_key(row)) or {}).get(column)
+            for _, row in df.iterrows()
+        ]
+
+    skipped = sum(1 for _, row in df.iterrows() if not has_speech(row))
+    df.to_csv(metadata_path, index=False)
+    print(f"VAD complete. {skipped}/{len(df)} recordings below threshold "
+          f"(<{MIN_SPEECH_SECONDS}s speech or <{MIN_SPEECH_RATIO:.0%} ratio). Saved to {metadata_path}")
+
+if __name__ == "__main__":
+    # Usage: python vad.py [workers]
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else os.cpu_count()
+    analyze_samples(workers=workers)
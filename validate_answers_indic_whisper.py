@@ -1,96 +1,12 @@
-import os
-import pandas as pd
-import json
-from openai import OpenAI
-import framework_config as config
+import sys
+import validator_engine
 
-client = OpenAI(api_key=config.OPENAI_API_KEY)
-
-def validate_answers_indic_whisper():
-    # Points to the INDIC WHISPER transcription file
-    transcript_path = os.path.join(config.AUDIO_DOWNLOAD_DIR, 'transcribed_metadata_indic_whisper.csv')
-    if not os.path.exists(transcript_path):
-        print("Indic Whisper Transcript file not found.")
-        return
-
-    df = pd.read_csv(transcript_path)
-    print(f"Validating {len(df)} records (Indic Whisper Check)...")
-
-    validation_results = []
-    reasons = []
-
-    for index, row in df.iterrows():
-        sample_id = row['sample_id']
-        transcript = str(row['transcript'])
-        
-        # Prepare data context
-        data_context = f"""
-        Sample ID: {sample_id}
-        Reported Q1 (Main Problem): {row.get('Q1', 'N/A')}
-        Reported Caste: {row.get('Caste', 'N/A')}
-        Reported Age: {row.get('Age', 'N/A')}
-        """
-
-        prompt = f"""
-        You are a Quality Control Auditor for a Telugu political survey.
-        
-        TASK:
-        Compare the provided TELUGU TRANSCRIPT (generated by a specialized Telugu model) with the REPORTED DATA.
-        
-        TRANSCRIPT (Telugu):
-        "{transcript}"
-        
-        REPORTED DATA:
-        {data_context}
-        
-        INSTRUCTIONS:
-        1. Check if the transcript contains a conversation relevant to a survey.
-        2. Check if the reported data (Problem, Caste, Age) is mentioned or consistent with the audio.
-        3. If the audio is empty, noise, or irrelevant, mark as INVALID.
-        
-        OUTPUT FORMAT:
-        Return ONLY a JSON object with two keys:
-        - "is_valid": boolean (true/false)
-        - "reason": string (brief explanation)
-        """
-
-        try:
-            print(f"Validating {sample_id}...")
-            response = client.chat.completions.create(
-                model=config.VALIDATION_MODEL, 
-                messages=[
-                    {"role": "system", "content": "You are a precise data validator."},
-                    {"role": "user", "content": prompt}
-                ],
-                response_format={"type": "json_object"},
-                temperature=0
-            )
-            
-            content = response.choices[0].message.content
-            try:
-                result = json.loads(content)
-            except json.JSONDecodeError:
-                result = json.loads(content.replace("```json", "").replace("```", ""))
-
-            is_valid = result.get('is_valid', False)
-            reason = result.get('reason', 'No reason provided')
-            
-            print(f"Result: {is_valid} | {reason}")
-            
-            validation_results.append(is_valid)
-            reasons.append(reason)
-            
-        except Exception as e:
-            print(f"Error validating {sample_id}: {e}")
-            validation_results.append(False)
-            reasons.append(f"Error: {str(e)}")
-
-    df['llm_is_valid'] = validation_results
-    df['llm_reason'] = reasons
-    
-    output_path = os.path.join(config.AUDIO_DOWNLOAD_DIR, 'validation_results_indic_whisper.csv')
-    df.to_csv(output_path, index=False)
-    print(f"Validation complete. Results saved to {output_path}")
+# Validates the indic_whisper transcripts; the prompt, workers and retries live in validator_engine.
+def validate_answers_indic_whisper(limit=None, batch=False, batch_api=False):
+    validator_engine.run_variant('indic_whisper', limit=limit, batch=batch, batch_api=batch_api)
 
 if __name__ == "__main__":
-    validate_answers_indic_whisper()
+    # Optional: --limit N validates only the first N records (cost-limited spot checks),
+    # --batch packs several records into each request, --batch-api runs them as an OpenAI batch job
+    limit = int(sys.argv[sys.argv.index('--limit') + 1]) if '--limit' in sys.argv else None
+    validate_answers_indic_whisper(limit=limit, batch='--batch' in sys.argv, batch_api='--batch-api' in sys.argv)
@@ -0,0 +1,437 @@
+import os
+import sys
+import csv
+import json
+import hashlib
+import concurrent.futures
+import pandas as pd
+import framework_config as config
+import llm_backend
+import llm_cache
+import openai_batch
+import prevalidation
+
+# One LLM validator for every ASR variant. A TranscriptSource says where the transcripts
+# come from and where results go; an LLM backend (anything with
+# complete(messages, response_format)) answers the prompt. Concurrency, retries,
+# rate limiting and checkpointing live here, so every variant gets them.
+# Records the prevalidation rule tier can decide never reach the LLM (--no-rules sends them anyway).
+# Usage: python validator_engine.py <variant> [--workers N] [--limit N] [--no-cache] [--batch] [--batch-api]
+#            [--no-rules] [--no-resume]
+VALIDATION_WORKERS = getattr(config, 'VALIDATION_WORKERS', 16)
+CHECKPOINT_EVERY = 50   # Rewrite the output CSV after this many new results
+# Every LLM verdict is also appended to <output>.checkpoint.csv as it arrives. A rerun
+# skips records whose request (prompt, transcript and reported answers) is unchanged, so an
+# interrupted run never pays twice (--no-resume starts over).
+
+# --batch packs several records into one request, sharing the instructions between them.
+# Records are added until the prompt plus the expected replies would exceed the budget.
+BATCH_TOKEN_BUDGET = getattr(config, 'VALIDATION_BATCH_TOKENS', 8000)
+BATCH_MAX_RECORDS = getattr(config, 'VALIDATION_BATCH_MAX_RECORDS', 25)
+VERDICT_TOKENS = 60     # Reply tokens reserved per record in a batch
+# --batch-api sends every request through the OpenAI Batch API (openai_batch) instead of
+# the sync endpoint; replies that fail there are retried synchronously.
+
+SYSTEM_PROMPT = "You are a precise data validator."
+
+PROMPT_TEMPLATE = """
+        You are a Quality Control Auditor for a Telugu political survey.
+
+        TASK:
+        Compare the provided TELUGU TRANSCRIPT {transcript_label} with the REPORTED DATA.{task_detail}
+
+        TRANSCRIPT (Telugu):
+        "{transcript}"
+
+        REPORTED DATA:
+        {data_context}
+
+        INSTRUCTIONS:
+        1. Check if the transcript contains a conversation relevant to a survey.
+        2. Check if the reported data (Problem, Caste, Age) is mentioned or consistent with the audio.
+        3. If the audio is empty, noise, or irrelevant, mark as INVALID.{extra_rules}
+
+        OUTPUT FORMAT:
+        Return ONLY a JSON object with two keys:
+        - "is_valid": boolean (true/false)
+        - "reason": string (brief explanation)
+        """
+
+BATCH_PROMPT_TEMPLATE = """
+        You are a Quality Control Auditor for a Telugu political survey.
+
+        TASK:
+        Below are {count} survey records. For EACH record, compare the provided TELUGU TRANSCRIPT {transcript_label} with the REPORTED DATA.{task_detail}
+        Judge every record on its own; records are unrelated to each other.
+
+        INSTRUCTIONS (apply to every record):
+        1. Check if the transcript contains a conversation relevant to a survey.
+        2. Check if the reported data (Problem, Caste, Age) is mentioned or consistent with the audio.
+        3. If the audio is empty, noise, or irrelevant, mark as INVALID.{extra_rules}
+
+        RECORDS:
+        {records}
+
+        OUTPUT FORMAT:
+        Return ONLY a JSON object with one key "results": an array with exactly one entry per record, each with:
+        - "sample_id": string (the record's Sample ID, copied exactly)
+        - "is_valid": boolean (true/false)
+        - "reason": string (brief explanation)
+        """
+
+BATCH_RECORD_TEMPLATE = """
+        --- RECORD ---
+        Sample ID: {sample_id}
+        TRANSCRIPT (Telugu): "{transcript}"
+        Reported Q1 (Main Problem): {q1}
+        Reported Caste: {caste}
+        Reported Age: {age}
+        """
+
+class TranscriptSource:
+    """A transcribed_metadata CSV to validate and the validation_results CSV it produces."""
+    def __init__(self, name, transcript_file, output_file, transcript_label,
+                 task_detail="", extra_rules="", skip_pending=False):
+        self.name = name
+        self.transcript_path = os.path.join(config.AUDIO_DOWNLOAD_DIR, transcript_file)
+        self.output_path = os.path.join(config.AUDIO_DOWNLOAD_DIR, output_file)
+        self.transcript_label = transcript_label  # How the prompt describes this ASR output
+        self.task_detail = task_detail
+        self.extra_rules = extra_rules
+        self.skip_pending = skip_pending          # Partial files: only rows already transcribed
+
+    def load(self):
+        df = pd.read_csv(self.transcript_path)
+        if self.skip_pending:
+            df = df[df['transcript'] != 'PENDING'].reset_index(drop=True)
+        return df
+
+    def build_prompt(self, row):
+        data_context = f"""
+        Sample ID: {row['sample_id']}
+        Reported Q1 (Main Problem): {row.get('Q1', 'N/A')}
+        Reported Caste: {row.get('Caste', 'N/A')}
+        Reported Age: {row.get('Age', 'N/A')}
+        """
+        return PROMPT_TEMPLATE.format(
+            transcript_label=self.transcript_label, task_detail=self.task_detail,
+            transcript=str(row['transcript']), data_context=data_context, extra_rules=self.extra_rules)
+
+    def build_batch_prompt(self, rows):
+        return BATCH_PROMPT_TEMPLATE.format(
+            count=len(rows), transcript_label=self.transcript_label, task_detail=self.task_detail,
+            extra_rules=self.extra_rules, records="".join(render_record(row) for row in rows))
+
+def render_record(row):
+    return BATCH_RECORD_TEMPLATE.format(
+        sample_id=row['sample_id'], transcript=str(row['transcript']),
+        q1=row.get('Q1', 'N/A'), caste=row.get('Caste', 'N/A'), age=row.get('Age', 'N/A'))
+
+SURVEYOR_RULE = "\n        4. If the surveyor fills data without asking, mark as INVALID."
+
+SOURCES = {source.name: source for source in [
+    TranscriptSource(
+        'whisper', 'transcribed_metadata.csv', 'validation_results.csv', "of the audio",
+        task_detail="\n        Determine if the surveyor actually asked the questions and if the respondent's answers match the data.",
+        extra_rules="\n        4. If the surveyor fills data without asking (e.g. asking only name but filling caste/problems), mark as INVALID."),
+    TranscriptSource('enhanced', 'transcribed_metadata_enhanced.csv', 'validation_results_enhanced.csv',
+                     "(from enhanced audio)", extra_rules=SURVEYOR_RULE),
+    TranscriptSource('indic', 'transcribed_metadata_indic.csv', 'validation_results_indic.csv',
+                     "(generated by IndicWav2Vec)", extra_rules=SURVEYOR_RULE),
+    TranscriptSource('indic_whisper', 'transcribed_metadata_indic_whisper.csv', 'validation_results_indic_whisper.csv',
+                     "(generated by a specialized Telugu model)"),
+    TranscriptSource('sarvam', 'transcribed_metadata_sarvam.csv', 'validation_results_sarvam.csv',
+                     "(generated by Sarvam AI)"),
+    TranscriptSource('sarvam_partial', 'transcribed_metadata_sarvam_partial.csv', 'validation_results_sarvam_partial.csv',
+                     "(generated by Sarvam AI)", skip_pending=True),
+]}
+
+def _load_json(content):
+    try:
+        return json.loads(content)
+    except json.JSONDecodeError:
+        return json.loads(content.replace("```json", "").replace("```", ""))
+
+def prompt_version(source, model):
+    """Short hash of everything that shapes a verdict besides the record itself."""
+    parts = [SYSTEM_PROMPT, PROMPT_TEMPLATE, BATCH_PROMPT_TEMPLATE, BATCH_RECORD_TEMPLATE,
+             source.transcript_label, source.task_detail, source.extra_rules, model or '']
+    return hashlib.sha256("\x00".join(parts).encode('utf-8')).hexdigest()[:12]
+
+def request_hash(source, row, model):
+    """
+    Fingerprint of the single-record request for row: the rendered prompt carries the
+    transcript and the reported Q1/Caste/Age, so correcting any of them changes it.
+    """
+    request = request_for(source, [row])
+    return llm_cache.fingerprint(model or '', request['messages'], 0, request['response_format'])[:16]
+
+class Checkpoint:
+    """Append-only CSV of LLM verdicts keyed by (sample_id, request hash, prompt version)."""
+    FIELDS = ['sample_id', 'request_hash', 'prompt_version', 'llm_is_valid', 'llm_reason', 'validation_tier']
+
+    def __init__(self, path, source, model):
+        self.path = path
+        self.source = source
+        self.model = model
+        self.version = prompt_version(source, model)
+
+    def key(self, row):
+        return str(row['sample_id']), request_hash(self.source, row, self.model)
+
+    def load(self):
+        """key(row) -> (is_valid, reason, tier) for this prompt version."""
+        done = {}
+        if not os.path.exists(self.path):
+            return done
+        with open(self.path, newline='', encoding='utf-8') as f:
+            for entry in csv.DictReader(f):
+                # Entries written before a key change lack request_hash and never match
+                if entry.get('prompt_version') == self.version and entry.get('request_hash'):
+                    done[(entry['sample_id'], entry['request_hash'])] = (
+                        entry['llm_is_valid'] == 'True', entry['llm_reason'], entry['validation_tier'])
+        return done
+
+    def append(self, entries):
+        """entries: [(row, is_valid, reason, tier)]. Flushed before returning."""
+        is_new = not os.path.exists(self.path)
+        with open(self.path, 'a', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            if is_new:
+                writer.writerow(self.FIELDS)
+            for row, is_valid, reason, tier in entries:
+                writer.writerow([*self.key(row), self.version, is_valid, reason, tier])
+            f.flush()
+            os.fsync(f.fileno())
+
+def parse_verdict(content):
+    """(is_valid, reason) from the model's JSON reply."""
+    result = _load_json(content)
+    return result.get('is_valid', False), result.get('reason', 'No reason provided')
+
+def parse_batch_verdicts(content):
+    """sample_id -> (is_valid, reason) from a batch reply; entries without a boolean verdict are dropped."""
+    result = _load_json(content)
+    entries = result.get('results', []) if isinstance(result, dict) else result
+    verdicts = {}
+    for entry in entries if isinstance(entries, list) else []:
+        if isinstance(entry, dict) and isinstance(entry.get('is_valid'), bool) and 'sample_id' in entry:
+            verdicts[str(entry['sample_id'])] = (entry['is_valid'], entry.get('reason', 'No reason provided'))
+    return verdicts
+
+def check_verdict(content):
+    """Raises unless content is a JSON reply carrying a boolean is_valid."""
+    result = _load_json(content)
+    if not isinstance(result, dict) or not isinstance(result.get('is_valid'), bool):
+        raise ValueError("Reply has no boolean is_valid")
+
+def batch_checker(rows):
+    """Validator for a batch reply: raises unless it has a verdict for every record in rows."""
+    expected = {str(row['sample_id']) for row in rows}
+    def check(content):
+        missing = expected - set(parse_batch_verdicts(content))
+        if missing:
+            raise ValueError(f"Reply has no verdict for {len(missing)}/{len(expected)} records")
+    return check
+
+def request_for(source, rows):
+    """
+    complete() arguments for one record, or for several packed into a batch prompt.
+    validate keeps unusable replies out of the LLM cache, so a rerun asks again.
+    """
+    if len(rows) == 1:
+        return {'messages': [{"role": "system", "content": SYSTEM_PROMPT},
+                             {"role": "user", "content": source.build_prompt(rows[0])}],
+                'response_format': {"type": "json_object"},
+                'validate': check_verdict}
+    return {'messages': [{"role": "system", "content": SYSTEM_PROMPT},
+                         {"role": "user", "content": source.build_batch_prompt(rows)}],
+            'response_format': {"type": "json_object"},
+            'max_tokens': VERDICT_TOKENS * len(rows) + 100,
+            'validate': batch_checker(rows)}
+
+def validate_row(source, backend, row):
+    """(is_valid, reason) for one transcript row. Never raises."""
+    verdict = prevalidation.classify(row, rules=False)
+    if verdict:
+        return verdict
+
+    try:
+        content = backend.complete(**request_for(source, [row]))
+    except Exception as e:
+        print(f"Error validating {row['sample_id']}: {e}")
+        return False, f"Error: {str(e)}"
+    try:
+        return parse_verdict(content)
+    except Exception as e:
+        print(f"Error parsing response for {row['sample_id']}: {e}")
+        return False, f"Error parsing: {str(e)}"
+
+def plan_batches(source, indexed_rows, budget=BATCH_TOKEN_BUDGET, max_records=BATCH_MAX_RECORDS):
+    """
+    Splits [(index, row)] into batches whose prompt plus reserved reply tokens fit budget.
+    Long transcripts make small batches; a single oversized record still gets its own.
+    """
+    overhead = llm_backend.estimate_tokens([{"content": SYSTEM_PROMPT}, {"content": source.build_batch_prompt([])}])
+    batches, current, used = [], [], overhead
+    for i, row in indexed_rows:
+        cost = llm_backend.estimate_tokens([{"content": render_record(row)}]) + VERDICT_TOKENS
+        same_id = any(str(r['sample_id']) == str(row['sample_id']) for _, r in current)
+        if current and (used + cost > budget or len(current) >= max_records or same_id):
+            batches.append(current)
+            current, used = [], overhead
+        current.append((i, row))
+        used += cost
+    if current:
+        batches.append(current)
+    return batches
+
+def validate_batch(source, backend, batch):
+    """
+    [(index, verdict)] for a batch of (index, row). Records the reply leaves out or
+    garbles, or the whole batch if the request fails, fall back to one call per record.
+    """
+    if len(batch) == 1:
+        return [(batch[0][0], validate_row(source, backend, batch[0][1]))]
+    try:
+        content = backend.complete(**request_for(source, [row for _, row in batch]))
+    except Exception as e:
+        print(f"Batch of {len(batch)} failed, falling back to single records: {e}")
+        content = None
+    return merge_reply(source, backend, batch, content)
+
+def merge_reply(source, backend, batch, content):
+    """
+    [(index, verdict)] from the reply (or None) to request_for(batch). Records it
+    leaves out or garbles are validated with one sync call each.
+    """
+    rows = [row for _, row in batch]
+    verdicts = {}
+    if content is not None:
+        try:
+            if len(rows) == 1:
+                verdicts = {str(rows[0]['sample_id']): parse_verdict(content)}
+            else:
+                verdicts = parse_batch_verdicts(content)
+        except Exception as e:
+            print(f"Error parsing reply for {len(rows)} records, falling back to single records: {e}")
+
+    results = []
+    missing = 0
+    for i, row in batch:
+        verdict = verdicts.get(str(row['sample_id']))
+        if verdict is None:
+            missing += 1
+            verdict = validate_row(source, backend, row)
+        results.append((i, verdict))
+    if verdicts and missing:
+        print(f"Reply missed {missing}/{len(rows)} records, validated them singly")
+    return results
+
+def validate(source, backend=None, workers=VALIDATION_WORKERS, limit=None, batch=False, batch_api=False,
+             rules=prevalidation.USE_RULES, resume=True):
+    if not os.path.exists(source.transcript_path):
+        print(f"Transcript file not found: {source.transcript_path}")
+        return
+
+    df = source.load()
+    if limit:
+        # Optional cap for cost-limited spot checks
+        df = df.head(limit)
+    backend = backend or llm_backend.OpenAIChatBackend()
+    mode = ("batched" if batch else "single-record") + (", Batch API" if batch_api else "")
+    print(f"Validating {len(df)} records ({source.name}, {mode}, {workers} workers)...")
+
+    validation_results = [None] * len(df)
+    reasons = [None] * len(df)
+    tiers = [None] * len(df)
+
+    def write():
+        out = df.copy()
+        out['llm_is_valid'] = validation_results
+        out['llm_reason'] = reasons
+        out['validation_tier'] = tiers
+        out.to_csv(source.output_path, index=False)
+
+    checkpoint = Checkpoint(os.path.splitext(source.output_path)[0] + '.checkpoint.csv',
+                            source, getattr(backend, 'model', None))
+    if not resume and os.path.exists(checkpoint.path):
+        os.remove(checkpoint.path)
+    previous = checkpoint.load()
+
+    rows = df.to_dict('records')
+    done = 0
+    resumed = 0
+    pending = []
+    for i, row in enumerate(rows):
+        verdict = prevalidation.classify(row, rules=rules)
+        if verdict:
+            validation_results[i], reasons[i] = verdict
+            tiers[i] = 'rule'
+            done += 1
+        elif checkpoint.key(row) in previous:
+            validation_results[i], reasons[i], tiers[i] = previous[checkpoint.key(row)]
+            done += 1
+            resumed += 1
+        else:
+            pending.append((i, row))
+    # Batches of one are plain per-record calls
+    batches = plan_batches(source, pending) if batch else [[item] for item in pending]
+    print(f"Rule tier settled {done - resumed}/{len(rows)} records, {resumed} resumed from {checkpoint.path}; "
+          f"{len(pending)} need the LLM: {len(batches)} requests")
+
+    replies = None
+    if batch_api:
+        requests = {f"{source.name}-{n}": request_for(source, [row for _, row in b]) for n, b in enumerate(batches)}
+        replies = openai_batch.run(requests, name=f"validation_{source.name}",
+                                   model=getattr(backend, 'model', None), cache=getattr(backend, 'cache', None))
+
+    last_checkpoint = done
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=workers)
+    try:
+        if replies is None:
+            futures = [executor.submit(validate_batch, source, backend, b) for b in batches]
+        else:
+            futures = [executor.submit(merge_reply, source, backend, b, replies.get(f"{source.name}-{n}"))
+                       for n, b in enumerate(batches)]
+        for future in concurrent.futures.as_completed(futures):
+            finished = []
+            for i, (is_valid, reason) in future.result():
+                validation_results[i], reasons[i], tiers[i] = is_valid, reason, 'llm'
+                done += 1
+                # Transient failures are left out so the next run retries them
+                if not str(reason).startswith("Error"):
+                    finished.append((rows[i], is_valid, reason, 'llm'))
+            checkpoint.append(finished)
+            if done - last_checkpoint >= CHECKPOINT_EVERY:
+                last_checkpoint = done
+                write()
+                print(f"Validated {done}/{len(rows)}...")
+    except KeyboardInterrupt:
+        executor.shutdown(wait=False, cancel_futures=True)
+        write()
+        print(f"Interrupted after {done}/{len(rows)} records; rerun to resume from {checkpoint.path}")
+        raise
+    executor.shutdown()
+
+    write()
+    cache = getattr(backend, 'cache', None)
+    if cache:
+        print(f"LLM cache: {cache.hits} hits, {cache.misses} misses")
+    print(f"Validation complete. Results saved to {source.output_path}")
+
+def run_variant(name, workers=None, limit=None, use_cache=True, batch=False, batch_api=False,
+                rules=prevalidation.USE_RULES, resume=True):
+    backend = None if use_cache else llm_backend.OpenAIChatBackend(cache=False)
+    validate(SOURCES[name], backend=backend, workers=workers or VALIDATION_WORKERS, limit=limit,
+             batch=batch, batch_api=batch_api, rules=rules, resume=resume)
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] not in SOURCES:
+        print(f"Usage: python validator_engine.py <{'|'.join(SOURCES)}> [--workers N] [--limit N] [--no-cache] [--batch] [--batch-api] [--no-rules] [--no-resume]")
+        sys.exit(1)
+    workers = int(sys.argv[sys.argv.index('--workers') + 1]) if '--workers' in sys.argv else None
+    limit = int(sys.argv[sys.argv.index('--limit') + 1]) if '--limit' in sys.argv else None
+    run_variant(sys.argv[1], workers=workers, limit=limit, use_cache='--no-cache' not in sys.argv,
+                batch='--batch' in sys.argv, batch_api='--batch-api' in sys.argv,
+                rules=prevalidation.USE_RULES and '--no-rules' not in sys.argv, resume='--no-resume' not in sys.argv)